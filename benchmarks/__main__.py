@@ -0,0 +1,107 @@
+"""
+Run the TARDIS micro-benchmarks
+
+Usage: ``python -m benchmarks [name ...]`` runs all benchmarks or only
+those whose name starts with any of the given names.
+
+The results can be stored as JSON via ``--output results.json`` and compared
+to the results of a previous run, e.g. of the last release, via
+``--compare baseline.json``. Benchmarks whose median got slower than the
+``--threshold`` are reported as regressions and let the run fail.
+"""
+
+from .utilities import BENCHMARKS, BenchmarkResult
+from . import (  # noqa: F401
+    bench_asyncbulkcall,
+    bench_csvparser,
+    bench_dronestates,
+    bench_poolfactory,
+    bench_restservice,
+    bench_shellexecutor,
+    bench_siteadapter,
+    bench_sqliteregistry,
+)
+
+from tardis import __about__
+
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import json
+import platform
+import sys
+
+
+def run(selection: List[str]) -> Dict[str, BenchmarkResult]:
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if not selection or name.startswith(tuple(selection)):
+            results[name] = func()
+            print(results[name])
+    return results
+
+
+def dump(results: Dict[str, BenchmarkResult], output: str) -> None:
+    """Store the ``results`` and the environment they were obtained in"""
+    with open(output, "w") as output_file:
+        json.dump(
+            {
+                "metadata": {
+                    "tardis": __about__.__version__,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                },
+                "results": {name: result._asdict() for name, result in results.items()},
+            },
+            output_file,
+            indent=2,
+        )
+
+
+def compare(
+    results: Dict[str, BenchmarkResult], baseline: str, threshold: float
+) -> bool:
+    """Compare the median of the ``results`` to the ``baseline``"""
+    with open(baseline) as baseline_file:
+        reference = json.load(baseline_file)
+    print(
+        f"\nComparison to {baseline} (TARDIS {reference['metadata']['tardis']},"
+        f" Python {reference['metadata']['python']})"
+    )
+    regressions = 0
+    for name, result in results.items():
+        try:
+            previous = BenchmarkResult(**reference["results"][name])
+        except KeyError:
+            print(f"{name:<40} {'new':>12}")
+            continue
+        ratio = result.median / previous.median
+        regression = ratio > 1 + threshold
+        regressions += regression
+        print(f"{name:<40} {ratio:>11.2f}x{'  REGRESSION' if regression else ''}")
+    return regressions == 0
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("selection", nargs="*", help="prefixes of benchmark names")
+    parser.add_argument("--output", help="store the results as JSON")
+    parser.add_argument("--compare", help="compare to results stored as JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slow down considered a regression (default: %(default)s)",
+    )
+    options = parser.parse_args(argv)
+    results = run(options.selection)
+    if options.output:
+        dump(results, options.output)
+    if options.compare:
+        return 0 if compare(results, options.compare, options.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,43 @@
+"""Throughput of bundling tasks via AsyncBulkCall"""
+
+from tardis.utilities.asyncbulkcall import AsyncBulkCall
+
+from .utilities import benchmark, measure_async
+
+import asyncio
+
+TASKS = 10_000
+
+
+async def echo(*tasks):
+    return tasks
+
+
+def bulk_call_benchmark(size: int, delay: float, concurrent=None):
+    """Measure queueing ``TASKS`` tasks at once and awaiting all results"""
+    name = f"asyncbulkcall.size{size}.delay{delay}"
+    bulk_call = None
+
+    async def setup():
+        nonlocal bulk_call
+        bulk_call = AsyncBulkCall(echo, size=size, delay=delay, concurrent=concurrent)
+
+    async def execute_tasks():
+        await asyncio.gather(*(bulk_call(task) for task in range(TASKS)))
+
+    return measure_async(name, execute_tasks, iterations=1, setup=setup, items=TASKS)
+
+
+@benchmark("asyncbulkcall.size10.delay0.001")
+def bench_small_bulks():
+    return bulk_call_benchmark(size=10, delay=0.001)
+
+
+@benchmark("asyncbulkcall.size100.delay0.01")
+def bench_medium_bulks():
+    return bulk_call_benchmark(size=100, delay=0.01)
+
+
+@benchmark("asyncbulkcall.size1000.delay0.1")
+def bench_large_bulks():
+    return bulk_call_benchmark(size=1000, delay=0.1)
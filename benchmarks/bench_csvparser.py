@@ -0,0 +1,74 @@
+"""Parsing of the batch system status of large pools"""
+
+from tardis.utilities.utils import csv_parser
+
+from .utilities import benchmark, measure
+
+ROWS = 100_000
+
+CONDOR_STATUS_FIELDS = (
+    "Machine",
+    "Name",
+    "State",
+    "Activity",
+    "TardisDroneUuid",
+    "cpu_ratio",
+    "memory_ratio",
+)
+
+SINFO_FIELDS = ("State", "CPUs", "AllocMem", "TotalMem", "Features", "Machine")
+
+
+def condor_status_output(rows: int) -> str:
+    """Output of ``condor_status -af:t`` for ``rows`` partitionable slots"""
+    return "\n".join(
+        f"host-{index}.example\tslot1@host-{index}.example\tUnclaimed\tIdle"
+        f"\tbench-{index:08x}\t0.125\t{'undefined' if index % 10 else '0.5'}"
+        for index in range(rows)
+    )
+
+
+def sinfo_output(rows: int) -> str:
+    """Output of ``sinfo --Format=... -e --noheader -r`` for ``rows`` nodes"""
+    return "\n".join(
+        f"mixed      3/1/0/4   17803   22011   bench-{index:08x}   host-{index}  "
+        for index in range(rows)
+    )
+
+
+@benchmark("csv_parser.condor_status")
+def bench_condor_status():
+    output = condor_status_output(ROWS)
+    return measure(
+        "csv_parser.condor_status",
+        lambda: list(
+            csv_parser(
+                input_csv=output,
+                fieldnames=CONDOR_STATUS_FIELDS,
+                delimiter="\t",
+                replacements=dict(undefined=None),
+            )
+        ),
+        iterations=1,
+        items=ROWS,
+    )
+
+
+@benchmark("csv_parser.sinfo")
+def bench_sinfo():
+    output = sinfo_output(ROWS)
+    return measure(
+        "csv_parser.sinfo",
+        lambda: list(
+            csv_parser(
+                input_csv=output,
+                fieldnames=SINFO_FIELDS,
+                delimiter=" ",
+                replacements=dict(undefined=None),
+                skipinitialspace=True,
+                skiptrailingspace=True,
+            )
+        ),
+        iterations=1,
+        items=ROWS,
+    )
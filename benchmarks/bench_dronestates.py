@@ -0,0 +1,119 @@
+"""Per-heartbeat CPU cost of the drone state machine"""
+
+from tardis.interfaces.batchsystemadapter import MachineSnapshot
+from tardis.interfaces.batchsystemadapter import MachineStatus
+from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.resources.drone import Drone
+from tardis.resources.dronestates import (
+    AvailableState,
+    BootingState,
+    DrainingState,
+    IntegratingState,
+)
+from tardis.utilities.attributedict import AttributeDict
+
+from .utilities import benchmark, measure_async
+
+import logging
+
+ITERATIONS = 20_000
+
+
+class StubSiteAgent(object):
+    """Site agent answering instantly with a fixed resource status"""
+
+    site_name = "BenchSite"
+    machine_type = "bench.large"
+    machine_meta_data = AttributeDict(Cores=8, Memory=32, Disk=100)
+    drone_minimum_lifetime = None
+    drone_heartbeat_interval = 60
+    drone_heartbeat_jitter = 0
+    drone_heartbeat_backoff = 1
+    drone_heartbeat_max_interval = 600
+    drone_state_heartbeat_intervals = {}
+
+    def __init__(self, resource_status: ResourceStatus):
+        self._status = AttributeDict(resource_status=resource_status)
+
+    @staticmethod
+    def drone_uuid(uuid: str) -> str:
+        return f"benchsite-{uuid}"
+
+    async def resource_status(self, resource_attributes):
+        return self._status
+
+
+class StubBatchSystemAgent(object):
+    """Batch system agent answering instantly with a fixed machine status"""
+
+    machine_meta_data_translation_mapping = AttributeDict(
+        Cores=1, Memory=1024, Disk=1024 * 1024
+    )
+
+    def __init__(self, machine_status: MachineStatus):
+        self._machine_status = machine_status
+
+    async def get_machine_status(self, drone_uuid):
+        return self._machine_status
+
+    async def get_allocation(self, drone_uuid):
+        return 0.5
+
+    async def get_utilisation(self, drone_uuid):
+        return 0.5
+
+    async def get_machine_snapshot(self, drone_uuid):
+        return MachineSnapshot(self._machine_status, 0.5, 0.5)
+
+
+def heartbeat_benchmark(state, resource_status, machine_status):
+    """Measure a heartbeat of a drone that remains in ``state``"""
+    drone = Drone(
+        site_agent=StubSiteAgent(resource_status),
+        batch_system_agent=StubBatchSystemAgent(machine_status),
+        remote_resource_uuid="bench-1",
+    )
+    drone.resource_attributes.update(resource_status=resource_status)
+
+    async def setup():
+        await drone.set_state(state())
+
+    async def heartbeat():
+        await drone.state.run(drone)
+
+    # keep the INFO logs of the states from dominating the measurement
+    logging.getLogger("cobald.runtime.tardis").setLevel(logging.WARNING)
+    return measure_async(
+        f"dronestates.heartbeat.{state.__name__}",
+        heartbeat,
+        iterations=ITERATIONS,
+        setup=setup,
+    )
+
+
+@benchmark("dronestates.heartbeat.BootingState")
+def bench_booting():
+    return heartbeat_benchmark(
+        BootingState, ResourceStatus.Booting, MachineStatus.NotAvailable
+    )
+
+
+@benchmark("dronestates.heartbeat.IntegratingState")
+def bench_integrating():
+    return heartbeat_benchmark(
+        IntegratingState, ResourceStatus.Running, MachineStatus.NotAvailable
+    )
+
+
+@benchmark("dronestates.heartbeat.AvailableState")
+def bench_available():
+    return heartbeat_benchmark(
+        AvailableState, ResourceStatus.Running, MachineStatus.Available
+    )
+
+
+@benchmark("dronestates.heartbeat.DrainingState")
+def bench_draining():
+    return heartbeat_benchmark(
+        DrainingState, ResourceStatus.Running, MachineStatus.Draining
+    )
@@ -0,0 +1,46 @@
+"""Start-up time of TARDIS restoring checkpointed drones"""
+
+from tardis.plugins.sqliteregistry import SqliteRegistry
+from tardis.resources.poolfactory import create_composite_pool
+
+from .bench_sqliteregistry import (
+    MACHINE_TYPE,
+    SITE_NAME,
+    configure_registry,
+    resource_attributes,
+)
+from .utilities import benchmark, measure
+
+from tempfile import TemporaryDirectory
+import os
+
+DRONES = 10_000
+
+
+@benchmark("poolfactory.create_composite_pool")
+def bench_create_composite_pool():
+    with TemporaryDirectory() as tmp_dir:
+        configure_registry(os.path.join(tmp_dir, "registry.db"))
+        registry = SqliteRegistry()
+        with registry.connect() as connection:
+            connection.executemany(
+                """
+                INSERT INTO Resources(remote_resource_uuid, drone_uuid, state_id,
+                site_id, machine_type_id, created, updated)
+                SELECT :remote_resource_uuid, :drone_uuid, RS.state_id, S.site_id,
+                MT.machine_type_id, :created, :updated
+                FROM ResourceStates RS
+                JOIN Sites S ON S.site_name = :site_name
+                JOIN MachineTypes MT ON MT.machine_type = :machine_type
+                AND MT.site_id = S.site_id
+                WHERE RS.state = 'AvailableState'""",
+                (dict(resource_attributes(index)) for index in range(DRONES)),
+            )
+        assert len(registry.get_resources(SITE_NAME, MACHINE_TYPE)) == DRONES
+        return measure(
+            "poolfactory.create_composite_pool",
+            create_composite_pool,
+            iterations=1,
+            repeat=3,
+            items=DRONES,
+        )
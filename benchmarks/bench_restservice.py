@@ -0,0 +1,94 @@
+"""Responsiveness of the event loop shared with the drones during REST logins"""
+
+from tardis.configuration.configuration import Configuration
+from tardis.rest.app.security import hash_password
+from tardis.rest.service import RestService
+
+from .utilities import BenchmarkResult, benchmark
+
+from httpx import ASGITransport, AsyncClient
+
+import asyncio
+import statistics
+import time
+
+LOGINS = 10
+REPEAT = 3
+#: interval of the probe measuring the lag of the event loop in seconds
+PROBE_INTERVAL = 0.001
+
+
+def configure_rest_service() -> None:
+    """Configure a REST service with a single user ``bench``"""
+    Configuration().update_config(
+        {
+            "Services": {
+                "restapi": RestService(
+                    users=[
+                        {
+                            "user_name": "bench",
+                            "hashed_password": hash_password("bench").decode(),
+                            "scopes": ["resources:get"],
+                        }
+                    ],
+                    host="127.0.0.1",
+                    port=0,
+                )
+            }
+        }
+    )
+
+
+async def probe_lag(lags: list) -> None:
+    """Record how much later than scheduled the event loop wakes up the probe"""
+    while True:
+        scheduled = time.perf_counter() + PROBE_INTERVAL
+        try:
+            await asyncio.sleep(PROBE_INTERVAL)
+        finally:
+            # the probe may still be waiting for its turn when it is cancelled
+            lags.append(max(time.perf_counter() - scheduled, 0.0))
+
+
+@benchmark("restservice.login_storm.loop_lag")
+def bench_login_storm() -> BenchmarkResult:
+    """
+    Measure the worst lag of the event loop during ``LOGINS`` concurrent logins
+
+    The drones share the event loop with the REST service, so the lag is the
+    time by which their state changes are delayed while users log in. The best
+    and median are taken over the maximum lag of ``REPEAT`` login storms.
+    """
+    configure_rest_service()
+    from tardis.rest.app.main import app
+
+    async def login_storms():
+        max_lags = []
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for _ in range(REPEAT):
+                lags = []
+                probe = asyncio.ensure_future(probe_lag(lags))
+                responses = await asyncio.gather(
+                    *(
+                        client.post(
+                            "/user/login",
+                            json={"user_name": "bench", "password": "bench"},
+                        )
+                        for _ in range(LOGINS)
+                    )
+                )
+                probe.cancel()
+                await asyncio.gather(probe, return_exceptions=True)
+                assert all(response.status_code == 200 for response in responses)
+                max_lags.append(max(lags, default=0.0))
+        return max_lags
+
+    max_lags = asyncio.run(login_storms())
+    return BenchmarkResult(
+        "restservice.login_storm.loop_lag",
+        REPEAT,
+        min(max_lags),
+        statistics.median(max_lags),
+    )
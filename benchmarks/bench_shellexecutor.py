@@ -0,0 +1,61 @@
+"""Running short batch system commands via the shell executors"""
+
+from tardis.utilities.executors.shellexecutor import (
+    PersistentShellExecutor,
+    ShellExecutor,
+)
+
+from .utilities import BenchmarkResult, benchmark, measure_async
+
+import asyncio
+import os
+import tempfile
+
+INVOCATIONS = 1000
+#: number of commands running concurrently
+CONCURRENT = 4
+
+CONDOR_Q = """#!/bin/sh
+# stand-in for condor_q printing the status of a few jobs
+printf '%s\\t%s\\n' 1.0 2 2.0 1 3.0 2
+"""
+
+
+def condor_q_benchmark(name: str, executor) -> BenchmarkResult:
+    """
+    Measure ``INVOCATIONS`` runs of a short ``condor_q`` stand-in script
+
+    The script is executed by both executors, so the difference shows the cost
+    of starting a new shell per command.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        condor_q = os.path.join(directory, "condor_q")
+        with open(condor_q, "w") as script:
+            script.write(CONDOR_Q)
+        os.chmod(condor_q, 0o755)
+
+        async def run_commands(count: int):
+            for _ in range(count):
+                await executor.run_command(f"{condor_q} -af ClusterId JobStatus")
+
+        async def execute_commands():
+            await asyncio.gather(
+                *(run_commands(INVOCATIONS // CONCURRENT) for _ in range(CONCURRENT))
+            )
+
+        return measure_async(
+            name, execute_commands, iterations=1, repeat=3, items=INVOCATIONS
+        )
+
+
+@benchmark("shellexecutor.condor_q")
+def bench_shell_executor():
+    return condor_q_benchmark("shellexecutor.condor_q", ShellExecutor())
+
+
+@benchmark("persistentshellexecutor.condor_q")
+def bench_persistent_shell_executor():
+    return condor_q_benchmark(
+        "persistentshellexecutor.condor_q",
+        PersistentShellExecutor(workers=CONCURRENT),
+    )
@@ -0,0 +1,42 @@
+"""Translation of the responses of resource providers"""
+
+from tardis.interfaces.siteadapter import SiteAdapter, ResourceStatus
+
+from .utilities import benchmark, measure
+
+from datetime import datetime
+
+ITERATIONS = 100_000
+
+RESPONSE = {
+    "JobId": "1351043",
+    "Host": "host-10-18-1-1",
+    "JobState": "RUNNING",
+    "SubmitTime": "2026-10-18T08:15:00",
+    "Partition": "normal",
+    "NumCPUs": "8",
+}
+
+KEY_TRANSLATOR = {
+    "remote_resource_uuid": "JobId",
+    "resource_status": "JobState",
+    "created": "SubmitTime",
+    "updated": "SubmitTime",
+}
+
+TRANSLATOR_FUNCTIONS = {
+    "JobId": int,
+    "JobState": lambda state: {"RUNNING": ResourceStatus.Running}[state],
+    "SubmitTime": datetime.fromisoformat,
+}
+
+
+@benchmark("siteadapter.handle_response")
+def bench_handle_response():
+    return measure(
+        "siteadapter.handle_response",
+        lambda: SiteAdapter.handle_response(
+            RESPONSE, KEY_TRANSLATOR, TRANSLATOR_FUNCTIONS, drone_uuid="bench-1"
+        ),
+        iterations=ITERATIONS,
+    )
@@ -0,0 +1,177 @@
+"""Rate of drone state changes persisted by the SqliteRegistry"""
+
+from tardis.configuration.configuration import Configuration
+from tardis.plugins.sqliteregistry import SqliteRegistry
+from tardis.resources.dronestates import (
+    AvailableState,
+    BootingState,
+    DownState,
+    IntegrateState,
+    RequestState,
+)
+from tardis.utilities.attributedict import AttributeDict
+
+from .utilities import benchmark, measure_async
+
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+import itertools
+import os
+
+ITERATIONS = 2_000
+DRONES = 10_000
+
+SITE_NAME = "BenchSite"
+MACHINE_TYPE = "bench.large"
+
+
+def configure_registry(db_file: str, write_behind=None, history=None) -> None:
+    """Configure a fake batch system and site using a registry in ``db_file``"""
+    registry_configuration = {"db_file": db_file}
+    if write_behind is not None:
+        registry_configuration["write_behind"] = write_behind
+    if history is not None:
+        registry_configuration["history"] = history
+    Configuration().update_config(
+        {
+            "Plugins": {"SqliteRegistry": registry_configuration},
+            "BatchSystem": {
+                "adapter": "FakeBatchSystem",
+                "allocation": 1.0,
+                "utilisation": 1.0,
+                "machine_status": "Available",
+            },
+            "Sites": [{"name": SITE_NAME, "adapter": "FakeSite", "quota": -1}],
+            SITE_NAME: {
+                "api_response_delay": 0,
+                "resource_boot_time": 0,
+                "MachineTypes": [MACHINE_TYPE],
+                "MachineTypeConfiguration": {MACHINE_TYPE: {}},
+                "MachineMetaData": {
+                    MACHINE_TYPE: {"Cores": 8, "Memory": 32, "Disk": 100}
+                },
+            },
+        }
+    )
+
+
+def resource_attributes(index: int) -> AttributeDict:
+    now = datetime.now()
+    return AttributeDict(
+        site_name=SITE_NAME,
+        machine_type=MACHINE_TYPE,
+        remote_resource_uuid=f"remote-{index}",
+        drone_uuid=f"benchsite-{index:08x}",
+        created=now,
+        updated=now,
+    )
+
+
+def notify_benchmark(name: str, state, prefill: int):
+    """Measure notifying the registry about ``state`` of successive drones"""
+    with TemporaryDirectory() as tmp_dir:
+        configure_registry(os.path.join(tmp_dir, "registry.db"))
+        registry = SqliteRegistry()
+        counter = itertools.count()
+
+        async def setup():
+            for index in range(prefill):
+                await registry.notify(RequestState(), resource_attributes(index))
+
+        async def notify():
+            index = next(counter) % prefill if prefill else next(counter)
+            await registry.notify(state, resource_attributes(index))
+
+        try:
+            return measure_async(name, notify, iterations=ITERATIONS, setup=setup)
+        finally:
+            registry.close()
+
+
+@benchmark("sqliteregistry.notify.insert")
+def bench_insert():
+    return notify_benchmark("sqliteregistry.notify.insert", RequestState(), prefill=0)
+
+
+@benchmark("sqliteregistry.notify.update")
+def bench_update():
+    return notify_benchmark(
+        "sqliteregistry.notify.update", BootingState(), prefill=ITERATIONS
+    )
+
+
+@benchmark("sqliteregistry.notify.write_behind")
+def bench_write_behind():
+    """Measure a burst of updates of all drones, written behind in bulk"""
+    with TemporaryDirectory() as tmp_dir:
+        configure_registry(
+            os.path.join(tmp_dir, "registry.db"),
+            write_behind={"flush_interval": 1.0, "flush_size": 1000},
+        )
+        registry = SqliteRegistry()
+
+        async def setup():
+            for index in range(ITERATIONS):
+                await registry.notify(RequestState(), resource_attributes(index))
+            await registry.flush()
+
+        async def burst():
+            for index in range(ITERATIONS):
+                await registry.notify(BootingState(), resource_attributes(index))
+            await registry.flush()
+
+        try:
+            return measure_async(
+                "sqliteregistry.notify.write_behind",
+                burst,
+                iterations=1,
+                setup=setup,
+                items=ITERATIONS,
+            )
+        finally:
+            registry.close()
+
+
+@benchmark("sqliteregistry.compact_history")
+def bench_compact_history():
+    """Measure rolling up the complete life cycles of DRONES drones"""
+    life_cycle = (
+        RequestState(),
+        BootingState(),
+        IntegrateState(),
+        AvailableState(),
+        DownState(),
+    )
+    with TemporaryDirectory() as tmp_dir:
+        configure_registry(
+            os.path.join(tmp_dir, "registry.db"),
+            write_behind={"flush_interval": 1.0, "flush_size": 10_000},
+            history={"retention": 0},
+        )
+        registry = SqliteRegistry()
+        start = datetime.now() - timedelta(days=1)
+
+        async def setup():
+            for index in range(DRONES):
+                attributes = resource_attributes(index)
+                for step, state in enumerate(life_cycle):
+                    attributes.updated = start + timedelta(minutes=index + step)
+                    await registry.notify(state, attributes)
+                if index % 1000 == 999:
+                    await registry.flush()
+            await registry.flush()
+
+        async def compact():
+            await registry.compact_history()
+
+        try:
+            return measure_async(
+                "sqliteregistry.compact_history",
+                compact,
+                iterations=1,
+                repeat=1,
+                setup=setup,
+                items=DRONES * len(life_cycle),
+            )
+        finally:
+            registry.close()
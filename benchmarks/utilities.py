@@ -0,0 +1,95 @@
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import asyncio
+import statistics
+import time
+
+#: all benchmarks by their name
+BENCHMARKS: Dict[str, Callable[[], "BenchmarkResult"]] = {}
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    Timing of a benchmark, times are given in seconds per iteration
+
+    Each iteration may process several ``items``, e.g. rows of a batch system
+    status, in which case the throughput in items per second is reported too.
+    """
+
+    name: str
+    iterations: int
+    best: float
+    median: float
+    items: int = 1
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second, based on the ``median``"""
+        return self.items / self.median
+
+    def __str__(self):
+        summary = (
+            f"{self.name:<40} {self.best * 1e6:>12.2f} us {self.median * 1e6:>12.2f} us"
+            f" ({self.iterations} iterations)"
+        )
+        if self.items > 1:
+            summary += f" {self.throughput:>12.0f} items/s"
+        return summary
+
+
+def benchmark(name: str):
+    """Register the decorated callable as benchmark ``name``"""
+
+    def register(func: Callable[[], BenchmarkResult]):
+        if name in BENCHMARKS:
+            raise ValueError(f"benchmark {name!r} is already registered")
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    iterations: int,
+    repeat: int = 5,
+    items: int = 1,
+) -> BenchmarkResult:
+    """Measure the time per call of the synchronous ``func``"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start) / iterations)
+    return BenchmarkResult(
+        name, iterations, min(timings), statistics.median(timings), items
+    )
+
+
+def measure_async(
+    name: str,
+    func: Callable[[], Awaitable],
+    iterations: int,
+    repeat: int = 5,
+    setup: Optional[Callable[[], Awaitable]] = None,
+    items: int = 1,
+) -> BenchmarkResult:
+    """Measure the time per call of the coroutine function ``func``"""
+
+    async def run_repeats() -> List[float]:
+        if setup is not None:
+            await setup()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await func()
+            timings.append((time.perf_counter() - start) / iterations)
+        return timings
+
+    timings = asyncio.run(run_repeats())
+    return BenchmarkResult(
+        name, iterations, min(timings), statistics.median(timings), items
+    )
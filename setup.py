@@ -61,14 +61,19 @@ setup(
         "console_scripts": [
             "generate_token = tardis.rest.token_generator.__main__:generate_token_cli",
             "hash_credentials = tardis.rest.hash_credentials.__main__:hash_credentials_cli",  # noqa: B950
+            "tardis_simulation = tardis.simulation.__main__:simulate_cli",
         ],
         "cobald.config.yaml_constructors": [
             "TardisPoolFactory = tardis.resources.poolfactory:create_composite_pool",
             "TardisPeriodicValue = tardis.utilities.simulators.periodicvalue:PeriodicValue",  # noqa: B950
             "TardisRandomGauss = tardis.utilities.simulators.randomgauss:RandomGauss",
             "TardisRestApi = tardis.rest.service:RestService",
+            "TardisDedupingExecutor = tardis.utilities.executors.dedupingexecutor:DedupingExecutor",  # noqa: B950
+            "TardisInstrumentedExecutor = tardis.utilities.executors.instrumentedexecutor:InstrumentedExecutor",  # noqa: B950
             "TardisDupingSSHExecutor = tardis.utilities.executors.sshexecutor:DupingSSHExecutor",  # noqa: B950
             "TardisSSHExecutor = tardis.utilities.executors.sshexecutor:SSHExecutor",
+            "TardisPersistentShellExecutor = tardis.utilities.executors.shellexecutor:PersistentShellExecutor",  # noqa: B950
+            "TardisPrometheusMetricsSink = tardis.utilities.executors.instrumentedexecutor:PrometheusMetricsSink",  # noqa: B950
             "TardisShellExecutor = tardis.utilities.executors.shellexecutor:ShellExecutor",  # noqa: B950
         ],
         "cobald.config.sections": [
@@ -76,7 +81,7 @@ setup(
         ],
     },
     keywords=package_about["__keywords__"],
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     python_requires=">=3.10",
     install_requires=[
         "aiohttp",
@@ -1,6 +1,10 @@
 from ...configuration.configuration import Configuration
-from ...exceptions.executorexceptions import CommandExecutionFailure
+from ...exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+)
 from ...interfaces.batchsystemadapter import BatchSystemAdapter
+from ...interfaces.batchsystemadapter import MachineSnapshot
 from ...interfaces.batchsystemadapter import MachineStatus
 from ...interfaces.executor import Executor
 from ...utilities.executors.shellexecutor import ShellExecutor
@@ -16,7 +20,7 @@ from datetime import datetime, timedelta
 from functools import partial
 from shlex import quote
 from types import MappingProxyType
-from typing import Iterable
+from typing import Callable, Dict, Iterable, List, Set
 import logging
 
 logger = logging.getLogger("cobald.runtime.tardis.adapters.batchsystem.htcondor")
@@ -199,6 +203,15 @@ class HTCondorAdapter(BatchSystemAdapter):
     with the HTCondor Batch System.
     """
 
+    status_mapping = MappingProxyType(
+        {
+            ("Unclaimed", "Idle"): MachineStatus.Available,
+            ("Drained", "Retiring"): MachineStatus.Draining,
+            ("Drained", "Idle"): MachineStatus.Drained,
+            ("Owner", "Idle"): MachineStatus.NotAvailable,
+        }
+    )
+
     def __init__(self):
         config = Configuration()
         self.ratios = config.BatchSystem.ratios
@@ -228,7 +241,12 @@ class HTCondorAdapter(BatchSystemAdapter):
             ),
             max_age=config.BatchSystem.max_age * 60,
             provide_cache=True,
+            # changes of the ratios alone do not change the state of a drone
+            change_fields=("State", "Activity"),
         )
+        # snapshots of all machines, derived once per update of the status cache
+        self._machine_snapshots: Dict[str, MachineSnapshot] = {}
+        self._machine_snapshots_update = None
 
     async def disintegrate_machine(self, drone_uuid: str) -> None:
         """
@@ -273,6 +291,9 @@ class HTCondorAdapter(BatchSystemAdapter):
                 return
             logger.critical(f"Draining failed with: {str(cef)}.")
             raise cef
+        except CommandExecutionTimeout as cet:
+            # the drone is drained again as long as it is available
+            logger.warning(f"Draining of drone {drone_uuid} timed out: {str(cet)}.")
 
     async def integrate_machine(self, drone_uuid: str) -> None:
         """
@@ -295,13 +316,18 @@ class HTCondorAdapter(BatchSystemAdapter):
         """
         await self._htcondor_status.update_status()
         try:
-            htcondor_status = self._htcondor_status[drone_uuid]
+            return self._resource_ratios(self._htcondor_status[drone_uuid])
+        except KeyError:
+            return []
+
+    def _resource_ratios(self, htcondor_status: dict) -> List[float]:
+        try:
             return [
                 float(value)
                 for key, value in htcondor_status.items()
                 if key in self.ratios.keys()
             ]
-        except (KeyError, ValueError, TypeError):
+        except (ValueError, TypeError):
             return []
 
     async def get_allocation(self, drone_uuid: str) -> float:
@@ -325,24 +351,52 @@ class HTCondorAdapter(BatchSystemAdapter):
         :return: The machine status in HTCondor (Available, Draining, Drained,
             NotAvailable)
         """
-        status_mapping = {
-            ("Unclaimed", "Idle"): MachineStatus.Available,
-            ("Drained", "Retiring"): MachineStatus.Draining,
-            ("Drained", "Idle"): MachineStatus.Drained,
-            ("Owner", "Idle"): MachineStatus.NotAvailable,
-        }
-
         await self._htcondor_status.update_status()
         try:
             machine_status = self._htcondor_status[drone_uuid]
         except KeyError:
             return MachineStatus.NotAvailable
         else:
-            return status_mapping.get(
+            return self.status_mapping.get(
                 (machine_status["State"], machine_status["Activity"]),
                 MachineStatus.NotAvailable,
             )
 
+    async def get_machine_snapshot(self, drone_uuid: str) -> MachineSnapshot:
+        """
+        Get the status, allocation and utilisation of a worker node in HTCondor
+        at once. The snapshots of all worker nodes are derived only once per
+        update of the cached ``condor_status`` output.
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :return: Snapshot of the worker node, see
+            :py:meth:`~.get_machine_status`, :py:meth:`~.get_allocation` and
+            :py:meth:`~.get_utilisation`
+        """
+        await self._htcondor_status.update_status()
+        if self._machine_snapshots_update != self._htcondor_status.last_update:
+            self._machine_snapshots = {
+                uuid: self._machine_snapshot(htcondor_status)
+                for uuid, htcondor_status in self._htcondor_status.items()
+            }
+            self._machine_snapshots_update = self._htcondor_status.last_update
+        try:
+            return self._machine_snapshots[drone_uuid]
+        except KeyError:
+            return MachineSnapshot(MachineStatus.NotAvailable, 0.0, 0.0)
+
+    def _machine_snapshot(self, htcondor_status: dict) -> MachineSnapshot:
+        ratios = self._resource_ratios(htcondor_status)
+        return MachineSnapshot(
+            status=self.status_mapping.get(
+                (htcondor_status["State"], htcondor_status["Activity"]),
+                MachineStatus.NotAvailable,
+            ),
+            allocation=max(ratios, default=0.0),
+            utilisation=min(ratios, default=0.0),
+        )
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
         Get the utilisation of a worker node in HTCondor, which is defined as
@@ -355,6 +409,15 @@ class HTCondorAdapter(BatchSystemAdapter):
         """
         return min(await self.get_resource_ratios(drone_uuid), default=0.0)
 
+    def subscribe_status_changes(self, callback: Callable[[Set[str]], None]) -> None:
+        """
+        Register a callback to be notified about drones whose ``State`` or
+        ``Activity`` in HTCondor has changed after a refresh of the cached status.
+
+        :param callback: Callable taking the set of changed drone uuids
+        """
+        self._htcondor_status.subscribe(callback)
+
     @property
     def machine_meta_data_translation_mapping(self) -> AttributeDict:
         """
@@ -3,12 +3,17 @@
 import logging
 
 from functools import partial
+from types import MappingProxyType
 
-from typing import Iterable
+from typing import Callable, Dict, Iterable, Set
 
 from ...configuration.configuration import Configuration
-from ...exceptions.executorexceptions import CommandExecutionFailure
+from ...exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+)
 from ...interfaces.batchsystemadapter import BatchSystemAdapter
+from ...interfaces.batchsystemadapter import MachineSnapshot
 from ...interfaces.batchsystemadapter import MachineStatus
 from ...interfaces.executor import Executor
 from ...utilities.utils import submit_cmd_option_formatter
@@ -75,6 +80,34 @@ class SlurmAdapter(BatchSystemAdapter):
     with the SLURM Batch System.
     """
 
+    # '*' means the machine didn't respond for a while
+    # 'allocated+' means that node is allocated to one or more active jobs plus one
+    # or more jobs in COMPLETING
+    status_mapping = MappingProxyType(
+        {
+            "allocated": MachineStatus.Available,
+            "allocated+": MachineStatus.Available,
+            "mixed": MachineStatus.Available,
+            "idle": MachineStatus.Available,
+            "completing": MachineStatus.Available,
+            "draining": MachineStatus.Draining,
+            "down": MachineStatus.NotAvailable,
+            "down*": MachineStatus.Drained,
+            "drained": MachineStatus.NotAvailable,
+            "drained*": MachineStatus.Drained,
+            "fail": MachineStatus.Drained,
+            "failing": MachineStatus.Drained,
+            "future": MachineStatus.Drained,
+            "maint": MachineStatus.Drained,
+            "reboot": MachineStatus.Drained,
+            "power_down": MachineStatus.Drained,
+            "powering_down": MachineStatus.Drained,
+            "reserved": MachineStatus.NotAvailable,
+            "unknown": MachineStatus.Drained,
+            "power_up": MachineStatus.NotAvailable,
+        }
+    )
+
     def __init__(self):
         config = Configuration()
         self._executor = getattr(config.BatchSystem, "executor", ShellExecutor())
@@ -98,7 +131,12 @@ class SlurmAdapter(BatchSystemAdapter):
                 slurm_status_updater, self.slurm_options, attributes, self._executor
             ),
             max_age=config.BatchSystem.max_age * 60,
+            # changes of the resource usage alone do not change the state of a drone
+            change_fields=("State",),
         )
+        # snapshots of all machines, derived once per update of the status cache
+        self._machine_snapshots: Dict[str, MachineSnapshot] = {}
+        self._machine_snapshots_update = None
 
     async def disintegrate_machine(self, drone_uuid: str) -> None:
         """
@@ -126,7 +164,11 @@ class SlurmAdapter(BatchSystemAdapter):
 
         cmd = f"scontrol update NodeName={machine} State=DRAIN Reason='COBalD/TARDIS'"
 
-        await self._executor.run_command(cmd)
+        try:
+            await self._executor.run_command(cmd)
+        except CommandExecutionTimeout as cet:
+            # the drone is drained again as long as it is available
+            logging.warning(f"Draining of drone {drone_uuid} timed out: {str(cet)}.")
 
     async def integrate_machine(self, drone_uuid: str) -> None:
         """
@@ -155,12 +197,19 @@ class SlurmAdapter(BatchSystemAdapter):
         except KeyError:
             return {}
         else:
-            return (
-                (slurm_status["CPUs"][3] - slurm_status["CPUs"][1])
-                / slurm_status["CPUs"][3],
-                (slurm_status["TotalMem"] - slurm_status["FreeMem"])
-                / slurm_status["TotalMem"],
+            return self._resource_ratios(slurm_status)
+
+    @staticmethod
+    def _resource_ratios(slurm_status: dict) -> Iterable[float]:
+        # resources a node does not report any capacity of have no ratio
+        return tuple(
+            (total - free) / total
+            for total, free in (
+                (slurm_status["CPUs"][3], slurm_status["CPUs"][1]),
+                (slurm_status["TotalMem"], slurm_status["FreeMem"]),
             )
+            if total
+        )
 
     async def get_allocation(self, drone_uuid: str) -> float:
         """
@@ -184,43 +233,50 @@ class SlurmAdapter(BatchSystemAdapter):
         :return: The machine status in SLURM (Available, Draining, Drained,
             NotAvailable)
         """
-
-        # '*' means the machine didn't respond for a while
-        # 'allocated+' means that node is allocated to one or more active jobs plus one
-        # or more jobs in COMPLETING
-        status_mapping = {
-            "allocated": MachineStatus.Available,
-            "allocated+": MachineStatus.Available,
-            "mixed": MachineStatus.Available,
-            "idle": MachineStatus.Available,
-            "completing": MachineStatus.Available,
-            "draining": MachineStatus.Draining,
-            "down": MachineStatus.NotAvailable,
-            "down*": MachineStatus.Drained,
-            "drained": MachineStatus.NotAvailable,
-            "drained*": MachineStatus.Drained,
-            "fail": MachineStatus.Drained,
-            "failing": MachineStatus.Drained,
-            "future": MachineStatus.Drained,
-            "maint": MachineStatus.Drained,
-            "reboot": MachineStatus.Drained,
-            "power_down": MachineStatus.Drained,
-            "powering_down": MachineStatus.Drained,
-            "reserved": MachineStatus.NotAvailable,
-            "unknown": MachineStatus.Drained,
-            "power_up": MachineStatus.NotAvailable,
-        }
-
         await self._slurm_status.update_status()
         try:
             machine_status = self._slurm_status[drone_uuid]
         except KeyError:
             return MachineStatus.NotAvailable
         else:
-            return status_mapping.get(
+            return self.status_mapping.get(
                 machine_status["State"], MachineStatus.NotAvailable
             )
 
+    async def get_machine_snapshot(self, drone_uuid: str) -> MachineSnapshot:
+        """
+        Get the status, allocation and utilisation of a worker node in SLURM at
+        once. The snapshots of all worker nodes are derived only once per update
+        of the cached ``sinfo`` output.
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :return: Snapshot of the worker node, see
+            :py:meth:`~.get_machine_status`, :py:meth:`~.get_allocation` and
+            :py:meth:`~.get_utilisation`
+        """
+        await self._slurm_status.update_status()
+        if self._machine_snapshots_update != self._slurm_status.last_update:
+            self._machine_snapshots = {
+                uuid: self._machine_snapshot(slurm_status)
+                for uuid, slurm_status in self._slurm_status.items()
+            }
+            self._machine_snapshots_update = self._slurm_status.last_update
+        try:
+            return self._machine_snapshots[drone_uuid]
+        except KeyError:
+            return MachineSnapshot(MachineStatus.NotAvailable, 0.0, 0.0)
+
+    def _machine_snapshot(self, slurm_status: dict) -> MachineSnapshot:
+        ratios = self._resource_ratios(slurm_status)
+        return MachineSnapshot(
+            status=self.status_mapping.get(
+                slurm_status["State"], MachineStatus.NotAvailable
+            ),
+            allocation=max(ratios, default=0.0),
+            utilisation=min(ratios, default=0.0),
+        )
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
         Get the utilization of a worker node in Slurm, which is defined as
@@ -233,6 +289,15 @@ class SlurmAdapter(BatchSystemAdapter):
         """
         return min(await self.get_resource_ratios(drone_uuid), default=0.0)
 
+    def subscribe_status_changes(self, callback: Callable[[Set[str]], None]) -> None:
+        """
+        Register a callback to be notified about drones whose ``State`` in SLURM
+        has changed after a refresh of the cached status.
+
+        :param callback: Callable taking the set of changed drone uuids
+        """
+        self._slurm_status.subscribe(callback)
+
     @property
     def machine_meta_data_translation_mapping(self) -> AttributeDict:
         """
@@ -1,6 +1,6 @@
 from typing import Iterable, Tuple, Awaitable, Mapping
 from ...exceptions.executorexceptions import CommandExecutionFailure
-from ...exceptions.tardisexceptions import TardisError
+from ...exceptions.tardisexceptions import TardisError, TardisTimeout
 from ...exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from ...interfaces.siteadapter import SiteAdapter
 from ...interfaces.siteadapter import ResourceStatus
@@ -327,5 +327,7 @@ class HTCondorAdapter(SiteAdapter):
             yield
         except TardisResourceStatusUpdateFailed:
             raise
+        except TimeoutError as te:
+            raise TardisTimeout from te
         except Exception as ex:
             raise TardisError from ex
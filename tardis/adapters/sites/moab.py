@@ -15,11 +15,11 @@ from ...utilities.utils import (
     submit_cmd_option_formatter,
 )
 
-from asyncio import TimeoutError
 from contextlib import contextmanager
 from functools import partial
 from typing import Iterable, Mapping, Tuple
 
+import asyncio
 import asyncssh
 import logging
 import warnings
@@ -219,7 +219,9 @@ class MoabAdapter(SiteAdapter):
     def handle_exceptions(self):
         try:
             yield
-        except TimeoutError as te:
+        except (asyncio.TimeoutError, TimeoutError) as te:
+            # asyncio.TimeoutError is no builtin TimeoutError before Python 3.11,
+            # while a CommandExecutionTimeout is
             raise TardisTimeout from te
         except asyncssh.Error as exc:
             logger.warning("SSH connection failed: " + str(exc))
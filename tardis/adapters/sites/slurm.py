@@ -16,11 +16,11 @@ from ...utilities.utils import (
     submit_cmd_option_formatter,
 )
 
-from asyncio import TimeoutError
 from contextlib import contextmanager
 from functools import partial
 from typing import Iterable, Mapping, Tuple
 
+import asyncio
 import logging
 import re
 import warnings
@@ -236,7 +236,9 @@ class SlurmAdapter(SiteAdapter):
             raise TardisResourceStatusUpdateFailed from ex
         except TardisResourceStatusUpdateFailed:
             raise
-        except TimeoutError as te:
+        except (asyncio.TimeoutError, TimeoutError) as te:
+            # asyncio.TimeoutError is no builtin TimeoutError before Python 3.11,
+            # while a CommandExecutionTimeout is
             raise TardisTimeout from te
         except Exception as ex:
             raise TardisError from ex
@@ -1,7 +1,10 @@
 from ..interfaces.batchsystemadapter import BatchSystemAdapter
+from ..interfaces.batchsystemadapter import MachineSnapshot
 from ..interfaces.batchsystemadapter import MachineStatus
 from ..utilities.attributedict import AttributeDict
 
+from typing import Callable, Set
+
 
 class BatchSystemAgent(BatchSystemAdapter):
     def __init__(self, batch_system_adapter: BatchSystemAdapter):
@@ -22,9 +25,15 @@ class BatchSystemAgent(BatchSystemAdapter):
     async def get_machine_status(self, drone_uuid: str) -> MachineStatus:
         return await self._batch_system_adapter.get_machine_status(drone_uuid)
 
+    async def get_machine_snapshot(self, drone_uuid: str) -> MachineSnapshot:
+        return await self._batch_system_adapter.get_machine_snapshot(drone_uuid)
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         return await self._batch_system_adapter.get_utilisation(drone_uuid)
 
+    def subscribe_status_changes(self, callback: Callable[[Set[str]], None]) -> None:
+        return self._batch_system_adapter.subscribe_status_changes(callback)
+
     @property
     def machine_meta_data_translation_mapping(self) -> AttributeDict:
         return self._batch_system_adapter.machine_meta_data_translation_mapping
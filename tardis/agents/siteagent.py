@@ -2,6 +2,8 @@ from ..interfaces.siteadapter import SiteAdapter
 from ..utilities.attributedict import AttributeDict
 from ..utilities.attributedict import convert_to_attribute_dict
 
+from typing import Mapping
+
 
 class SiteAgent(SiteAdapter):
     def __init__(self, site_adapter: SiteAdapter):
@@ -35,6 +37,22 @@ class SiteAgent(SiteAdapter):
     def drone_heartbeat_interval(self) -> int:
         return self._site_adapter.drone_heartbeat_interval
 
+    @property
+    def drone_heartbeat_backoff(self) -> float:
+        return self._site_adapter.drone_heartbeat_backoff
+
+    @property
+    def drone_heartbeat_jitter(self) -> float:
+        return self._site_adapter.drone_heartbeat_jitter
+
+    @property
+    def drone_heartbeat_max_interval(self) -> int:
+        return self._site_adapter.drone_heartbeat_max_interval
+
+    @property
+    def drone_state_heartbeat_intervals(self) -> Mapping[str, int]:
+        return self._site_adapter.drone_state_heartbeat_intervals
+
     @property
     def drone_minimum_lifetime(self) -> int:
         return self._site_adapter.drone_minimum_lifetime
@@ -34,3 +34,21 @@ class ExecutorFailure(Exception):
         super().__init__(description, executor)
         self.description = description
         self.executor = executor
+
+
+class CommandExecutionTimeout(TimeoutError):
+    """A command run by an executor did not finish in time and has been killed"""
+
+    def __init__(
+        self,
+        message: str,
+        timeout: float,
+        stdin: "str | None" = None,
+    ):
+        super().__init__(message, timeout, stdin)
+        self.message = message
+        self.timeout = timeout
+        self.stdin = stdin
+
+    def __str__(self):
+        return f"(message={self.message}, timeout={self.timeout}, stdin={self.stdin})"
@@ -3,6 +3,7 @@ from ..utilities.attributedict import AttributeDict
 from abc import ABCMeta
 from abc import abstractmethod
 from enum import Enum
+from typing import Callable, NamedTuple, Set
 
 
 class MachineStatus(Enum):
@@ -12,6 +13,16 @@ class MachineStatus(Enum):
     NotAvailable = 4
 
 
+class MachineSnapshot(NamedTuple):
+    """
+    Status, allocation and utilisation of a worker node in the overlay batch system
+    """
+
+    status: MachineStatus
+    allocation: float
+    utilisation: float
+
+
 class BatchSystemAdapter(metaclass=ABCMeta):
     """
     Abstract base class defining the interface for BatchSystemAdapters which handles
@@ -75,6 +86,25 @@ class BatchSystemAdapter(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    async def get_machine_snapshot(self, drone_uuid: str) -> MachineSnapshot:
+        """
+        Get the status, allocation and utilisation of a worker node in the
+        overlay batch system at once.
+
+        Adapters able to provide all values in a single lookup should override
+        this method, by default it combines :py:meth:`~.get_machine_status`,
+        :py:meth:`~.get_allocation` and :py:meth:`~.get_utilisation`.
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :return: Snapshot of the worker node as described above.
+        """
+        return MachineSnapshot(
+            status=await self.get_machine_status(drone_uuid),
+            allocation=await self.get_allocation(drone_uuid),
+            utilisation=await self.get_utilisation(drone_uuid),
+        )
+
     @abstractmethod
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
@@ -88,6 +118,19 @@ class BatchSystemAdapter(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def subscribe_status_changes(self, callback: Callable[[Set[str]], None]) -> None:
+        """
+        Register a callback to be notified about changes in the overlay batch
+        system. The callback is called with the set of drone uuids whose status
+        has changed, once such a change is noticed by the adapter.
+
+        Adapters that are not able to detect changes may ignore the callback,
+        which is the default behaviour.
+
+        :param callback: Callable taking the set of changed drone uuids
+        """
+        return None
+
     @property
     @abstractmethod
     def machine_meta_data_translation_mapping(self) -> AttributeDict:
@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from typing_extensions import Protocol
 from abc import ABCMeta, abstractmethod
 
+if TYPE_CHECKING:
+    from ..utilities.executors.instrumentedexecutor import ExecutorMetrics
+
 
 class CommandResult(Protocol):
     stdout: str
@@ -10,11 +13,21 @@ class CommandResult(Protocol):
 
 
 class Executor(metaclass=ABCMeta):
+    #: metrics to report details of running commands to, if instrumented
+    metrics: "Optional[ExecutorMetrics]" = None
+
     @abstractmethod
     async def run_command(
-        self, command: str, stdin_input: Optional[str] = None
+        self,
+        command: str,
+        stdin_input: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> CommandResult:
         """
         Run ``command`` in a shell and provide the result
+
+        A ``command`` running longer than ``timeout`` seconds, by default the
+        timeout of the executor, is killed and raises
+        :py:class:`~tardis.exceptions.executorexceptions.CommandExecutionTimeout`.
         """
         return NotImplemented
@@ -0,0 +1,27 @@
+from abc import ABCMeta, abstractmethod
+from typing import Dict
+
+
+class MetricsSink(metaclass=ABCMeta):
+    """
+    Destination of metrics, e.g. of the
+    :py:class:`~tardis.utilities.executors.instrumentedexecutor.InstrumentedExecutor`
+
+    Each ``metric`` is identified by its name and ``labels``, a sink may
+    aggregate the values reported for the same metric and labels.
+    """
+
+    @abstractmethod
+    def observe(self, metric: str, labels: Dict[str, str], value: float) -> None:
+        """Record a sample ``value`` of a distribution, e.g. of a latency"""
+        return NotImplemented
+
+    @abstractmethod
+    def increase(self, metric: str, labels: Dict[str, str], value: float = 1) -> None:
+        """Increase a counter, e.g. of failures, by ``value``"""
+        return NotImplemented
+
+    @abstractmethod
+    def adjust(self, metric: str, labels: Dict[str, str], value: float) -> None:
+        """Change a level that goes up and down, e.g. of ongoing commands"""
+        return NotImplemented
@@ -5,9 +5,10 @@ from ..utilities.utils import machine_meta_data_translation
 from abc import ABCMeta, abstractmethod
 from cobald.utility.primitives import infinity as inf
 from enum import Enum
-from functools import lru_cache
-from pydantic import BaseModel, conint, validator
-from typing import Optional
+from functools import cached_property, lru_cache
+from pydantic import BaseModel, confloat, conint, parse_obj_as, validator
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
 import logging
 
@@ -24,6 +25,10 @@ class SiteConfigurationModel(BaseModel):
     quota: Optional[int] = inf
     drone_minimum_lifetime: Optional[conint(gt=0)] = None
     drone_heartbeat_interval: Optional[conint(ge=0)] = 60
+    drone_heartbeat_jitter: Optional[confloat(ge=0)] = 0
+    drone_state_heartbeat_intervals: Optional[Dict[str, conint(ge=0)]] = {}
+    drone_heartbeat_backoff: Optional[confloat(ge=1)] = 1
+    drone_heartbeat_max_interval: Optional[conint(ge=0)] = 600
 
     class Config:
         extra = "forbid"
@@ -103,6 +108,36 @@ class SiteAdapter(metaclass=ABCMeta):
         """
         return self.site_configuration.drone_heartbeat_interval
 
+    @property
+    def drone_heartbeat_backoff(self) -> float:
+        """
+        Property that returns the configuration parameter drone_heartbeat_backoff.
+        It describes the factor by which the heartbeat interval grows after each
+        heartbeat that did not change the state of the drone.
+        :return: The heartbeat backoff factor of the drone
+        """
+        return self.site_configuration.drone_heartbeat_backoff
+
+    @property
+    def drone_heartbeat_max_interval(self) -> int:
+        """
+        Property that returns the configuration parameter
+        drone_heartbeat_max_interval. It describes the upper bound of the
+        heartbeat interval reached by the backoff.
+        :return: The maximum heartbeat interval of the drone
+        """
+        return self.site_configuration.drone_heartbeat_max_interval
+
+    @property
+    def drone_heartbeat_jitter(self) -> float:
+        """
+        Property that returns the configuration parameter drone_heartbeat_jitter.
+        It describes the upper bound of a random delay added to the heartbeat
+        interval to spread the status updates of drones over time.
+        :return: The heartbeat jitter of the drone
+        """
+        return self.site_configuration.drone_heartbeat_jitter
+
     @property
     def drone_minimum_lifetime(self) -> [int, None]:
         """
@@ -113,6 +148,30 @@ class SiteAdapter(metaclass=ABCMeta):
         """
         return self.site_configuration.drone_minimum_lifetime
 
+    @cached_property
+    def drone_state_heartbeat_intervals(self) -> Mapping[str, int]:
+        """
+        Property that returns the heartbeat intervals per drone state. The site
+        wide configuration parameter drone_state_heartbeat_intervals is updated
+        by the machine type specific intervals given in the optional
+        MachineTypeHeartbeatIntervals MappingNode of the site configuration.
+        The intervals are validated once per site adapter, since they are
+        looked up on every heartbeat of a drone.
+        :return: Read-only mapping of drone state names to heartbeat intervals
+        """
+        heartbeat_intervals = dict(
+            self.site_configuration.drone_state_heartbeat_intervals
+        )
+        heartbeat_intervals.update(
+            parse_obj_as(
+                Dict[str, conint(ge=0)],
+                self.configuration.get("MachineTypeHeartbeatIntervals", {}).get(
+                    self.machine_type, {}
+                ),
+            )
+        )
+        return MappingProxyType(heartbeat_intervals)
+
     def drone_uuid(self, uuid: str) -> str:
         """
         Returns the drone uuid consisting of the lower case site name and the
@@ -1,6 +1,7 @@
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Mapping, TYPE_CHECKING, Type, Union
 
 from abc import ABCMeta, abstractmethod
+from types import MappingProxyType
 
 from ..utilities.pipeline import PipelineProcessor
 
@@ -9,9 +10,33 @@ if TYPE_CHECKING:
 
 
 class State(metaclass=ABCMeta):
+    """
+    Base class of the states of a :py:class:`~tardis.resources.drone.Drone`
+
+    States do not carry any data, hence each state class has exactly one
+    instance, which is returned on every instantiation.
+
+    The ``transition`` table of a state maps the status of a resource to the
+    name of the next state. Alternatively, it maps to another table mapping
+    the status of the machine in the overlay batch system to the name of the
+    next state. Once all states are defined, :py:meth:`~.compile_transitions`
+    resolves these names to the state instances, which are then used by the
+    ``processing_pipeline``.
+    """
+
     transition = {}
     processing_pipeline = []
 
+    _instances: Dict[Type["State"], "State"] = {}
+    _transition_table: Mapping = MappingProxyType({})
+    _pipeline_processor = PipelineProcessor()
+
+    def __new__(cls):
+        try:
+            return State._instances[cls]
+        except KeyError:
+            return State._instances.setdefault(cls, super().__new__(cls))
+
     def __str__(self):
         return self.__class__.__name__
 
@@ -22,6 +47,27 @@ class State(metaclass=ABCMeta):
     def get_all_states(cls) -> List[str]:
         return [subclass.__name__ for subclass in cls.__subclasses__()]
 
+    @classmethod
+    def compile_transitions(cls) -> None:
+        """
+        Resolve the state names in the ``transition`` tables of all states to
+        the corresponding state instances and prepare their processing pipelines
+        """
+        states = {subclass.__name__: subclass for subclass in cls.__subclasses__()}
+
+        def resolve(target: Union[str, dict]) -> Union["State", Mapping]:
+            if isinstance(target, str):
+                return states[target]()
+            return MappingProxyType(
+                {key: resolve(name) for key, name in target.items()}
+            )
+
+        for state in states.values():
+            state._transition_table = MappingProxyType(
+                {key: resolve(target) for key, target in state.transition.items()}
+            )
+            state._pipeline_processor = PipelineProcessor(state.processing_pipeline)
+
     @classmethod
     @abstractmethod
     async def run(cls, drone: "Drone"):
@@ -29,7 +75,6 @@ class State(metaclass=ABCMeta):
 
     @classmethod
     async def run_processing_pipeline(cls, drone: "Drone"):
-        pipeline_processor = PipelineProcessor(cls.processing_pipeline)
-        return await pipeline_processor.run_pipeline(
-            pipeline_input=cls.transition, drone=drone, current_state=cls
+        return await cls._pipeline_processor.run_pipeline(
+            cls._transition_table, drone=drone, current_state=cls
         )
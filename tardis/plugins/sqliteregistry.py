@@ -1,18 +1,35 @@
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.dronestatistics import DroneStatistics
+from tardis.utilities.eventbroadcast import EventBroadcast
 from ..configuration.configuration import Configuration
 from ..interfaces.plugin import Plugin
 from ..interfaces.state import State
 
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime
-from typing import List, Dict, Generator
+from datetime import datetime, timedelta
+from typing import (
+    Callable,
+    ClassVar,
+    List,
+    Dict,
+    Generator,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 import asyncio
+import atexit
 import logging
 import sqlite3
+import time
 
 logger = logging.getLogger("cobald.runtime.tardis.plugins.sqliteregistry")
 
+T = TypeVar("T")
+
 
 # The sqlite3 module is moving away from automatically converting datetime objects
 # in versions 3.12 and beyond. So we need to explicitly register how to convert
@@ -35,8 +52,52 @@ sqlite3.register_adapter(datetime, adapt_datetime)  # pragma: no cover
 sqlite3.register_converter("timestamp", convert_datetime)  # pragma: no cover
 
 
+def dict_factory(cursor: sqlite3.Cursor, row: tuple) -> Dict:
+    """Row factory returning each row as dictionary of column names and values"""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
 class SqliteRegistry(Plugin):
     thread_pool_executor = ThreadPoolExecutor(max_workers=1)
+    # drones requested to drain via the REST API, shared by all instances, as
+    # drone_uuid -> time.monotonic() from which on the request is in effect
+    _drain_requests: ClassVar[Dict[str, float]] = {}
+    # delayed drain requests, which are stored in the DrainRequests table as well
+    _stored_drain_requests: ClassVar[Set[str]] = set()
+    # versions of the resources and of the sites and machine types, shared by all
+    # instances and increased whenever they have been changed
+    _resources_version: ClassVar[int] = 0
+    _types_version: ClassVar[int] = 0
+    # the first registry created and not yet closed, usually the one of the
+    # daemon, see shared()
+    _shared: ClassVar[Optional["SqliteRegistry"]] = None
+    #: state changes of all drones, e.g. for the event stream of the REST API
+    state_changes: ClassVar[EventBroadcast] = EventBroadcast()
+    _event_fields = (
+        "remote_resource_uuid",
+        "state",
+        "drone_uuid",
+        "site_name",
+        "machine_type",
+        "created",
+        "updated",
+    )
+
+    # the ids of states, sites and machine types are bound directly, see _bind_ids
+    _insert_resource_query = """
+        INSERT OR ROLLBACK INTO
+        Resources(remote_resource_uuid, drone_uuid, state_id, site_id, machine_type_id,
+        created, updated)
+        VALUES (:remote_resource_uuid, :drone_uuid, :state_id, :site_id,
+        :machine_type_id, :created, :updated)"""
+    _update_resource_query = """UPDATE Resources SET updated = :updated,
+        remote_resource_uuid = :remote_resource_uuid, state_id = :state_id
+        WHERE drone_uuid = :drone_uuid AND site_id = :site_id"""
+    _delete_resource_query = """DELETE FROM Resources
+        WHERE drone_uuid = :drone_uuid AND site_id = :site_id"""
+    _insert_history_query = """INSERT INTO StateHistory(drone_uuid, site_id,
+        machine_type_id, state_id, entered)
+        VALUES (:drone_uuid, :site_id, :machine_type_id, :state_id, :updated)"""
 
     def __init__(self):
         """
@@ -44,10 +105,53 @@ class SqliteRegistry(Plugin):
         a persistent storage of all Drone states in a SQLite database. The usage
         of this module is recommended in order to recover the last state of
         TARDIS in case the service has to be restarted.
+
+        Optionally, state changes are written behind: they are coalesced per
+        drone and written in a single transaction every ``flush_interval``
+        seconds or as soon as ``flush_size`` drones have changed. The
+        ``flush_interval`` hence bounds the state changes lost in case of a
+        crash, pending changes are written when TARDIS shuts down.
+
+        Optionally, all state changes are appended to a history as well. State
+        changes older than the ``retention`` time in seconds are rolled up into
+        hourly aggregates per site, machine type and state every
+        ``compaction_interval`` seconds, so that the history stays small.
         """
         configuration = Configuration()
-        self._db_file = configuration.Plugins.SqliteRegistry.db_file
+        registry_configuration = configuration.Plugins.SqliteRegistry
+        self._db_file = registry_configuration.db_file
+        # long-lived connection, owned by the thread of the thread_pool_executor
+        self._connection: Optional[sqlite3.Connection] = None
+
+        write_behind = getattr(registry_configuration, "write_behind", None)
+        self._write_behind = write_behind is not None
+        if self._write_behind:
+            self._flush_interval = write_behind.get("flush_interval", 1.0)
+            self._flush_size = write_behind.get("flush_size", 1000)
+            self._verify_write_behind_settings()
+            atexit.register(self._flush_at_exit)
+        # state changes waiting to be written as drone_uuid -> (query, parameters)
+        self._pending: Dict[str, Tuple[str, Dict]] = {}
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        history = getattr(registry_configuration, "history", None)
+        self._history = history is not None
+        if self._history:
+            self._retention = history.get("retention", 86400)
+            self._compaction_interval = history.get("compaction_interval", 3600)
+            self._verify_history_settings()
+        # state changes waiting to be appended to the history
+        self._pending_history: List[Tuple[str, Dict]] = []
+        self._next_compaction: Optional[float] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+        # ids of the rows in the small and rarely changing tables
+        self._state_ids: Dict[str, int] = {}
+        self._site_ids: Dict[str, int] = {}
+        self._machine_type_ids: Dict[Tuple[str, str], int] = {}
+
         self._deploy_db_schema()
+        self._load_ids()
+        self._load_drain_requests()
         self._dispatch_on_state = dict(
             RequestState=self.insert_resource, DownState=self.delete_resource
         )
@@ -56,6 +160,45 @@ class SqliteRegistry(Plugin):
             self.add_site(site.name)
             for machine_type in getattr(configuration, site.name).MachineTypes:
                 self.add_machine_types(site.name, machine_type)
+        self._drone_statistics = DroneStatistics()
+        for resource in self.get_all_resources():
+            self._drone_statistics.restored(
+                resource["drone_uuid"],
+                resource["site_name"],
+                resource["machine_type"],
+                resource["state"],
+            )
+        if SqliteRegistry._shared is None:
+            SqliteRegistry._shared = self
+
+    @staticmethod
+    def shared() -> Optional["SqliteRegistry"]:
+        """
+        The registry used by the TARDIS daemon, e.g. to share it with the REST
+        API, which is the first registry created and not yet closed, if any
+        """
+        return SqliteRegistry._shared
+
+    def _verify_write_behind_settings(self):
+        if self._flush_interval <= 0:
+            raise ValueError(
+                f"expected 'flush_interval' > 0, got {self._flush_interval!r} instead"
+            )
+        if not isinstance(self._flush_size, int) or self._flush_size <= 0:
+            raise ValueError(
+                f"expected 'flush_size' > 0, got {self._flush_size!r} instead"
+            )
+
+    def _verify_history_settings(self):
+        if self._retention < 0:
+            raise ValueError(
+                f"expected 'retention' >= 0, got {self._retention!r} instead"
+            )
+        if self._compaction_interval <= 0:
+            raise ValueError(
+                "expected 'compaction_interval' > 0"
+                f", got {self._compaction_interval!r} instead"
+            )
 
     def add_machine_types(self, site_name: str, machine_type: str) -> None:
         if self._get_machine_type(site_name, machine_type):
@@ -68,6 +211,8 @@ class SqliteRegistry(Plugin):
         SELECT :machine_type, Sites.site_id FROM Sites
         WHERE Sites.site_name = :site_name"""
         self.execute(sql_query, {"site_name": site_name, "machine_type": machine_type})
+        self._load_ids()
+        self.types_changed()
 
     def _get_machine_type(self, site_name: str, machine_type: str) -> List[Dict]:
         sql_query = """
@@ -86,17 +231,106 @@ class SqliteRegistry(Plugin):
             return
         sql_query = "INSERT OR ROLLBACK INTO Sites(site_name) VALUES (:site_name)"
         self.execute(sql_query, {"site_name": site_name})
+        self._load_ids()
+        self.types_changed()
 
     def _get_site(self, site_name: str) -> List[Dict]:
         sql_query = "SELECT * FROM Sites WHERE site_name = :site_name"
         return self.execute(sql_query, {"site_name": site_name})
 
+    def _load_ids(self) -> None:
+        """Load the ids of all states, sites and machine types into memory"""
+        self._state_ids = {
+            row["state"]: row["state_id"]
+            for row in self.execute("SELECT state, state_id FROM ResourceStates", {})
+        }
+        self._site_ids = {
+            row["site_name"]: row["site_id"]
+            for row in self.execute("SELECT site_name, site_id FROM Sites", {})
+        }
+        sql_query = """
+        SELECT S.site_name, MT.machine_type, MT.machine_type_id
+        FROM MachineTypes MT
+        JOIN Sites S ON MT.site_id = S.site_id"""
+        self._machine_type_ids = {
+            (row["site_name"], row["machine_type"]): row["machine_type_id"]
+            for row in self.execute(sql_query, {})
+        }
+
+    def _bind_ids(self, bind_parameters: Dict) -> Optional[Dict]:
+        """
+        Add the ids of the state, site and machine type of a drone to its
+        ``bind_parameters``, :py:data:`None` if any of them is unknown
+        """
+        site_name = bind_parameters["site_name"]
+        try:
+            bind_parameters.update(
+                state_id=self._state_ids[bind_parameters["state"]],
+                site_id=self._site_ids[site_name],
+                machine_type_id=self._machine_type_ids[
+                    site_name, bind_parameters["machine_type"]
+                ],
+            )
+        except KeyError as err:
+            logger.warning(
+                f"Unknown {err} of drone {bind_parameters['drone_uuid']}, skipping"
+                " its state change!"
+            )
+            return None
+        return bind_parameters
+
     async def async_execute(self, sql_query: str, bind_parameters: Dict) -> List[Dict]:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
-            self.thread_pool_executor, self.execute, sql_query, bind_parameters
+            self.thread_pool_executor, self._execute, sql_query, bind_parameters
+        )
+
+    async def async_execute_transaction(
+        self, transaction: Callable[[sqlite3.Connection], T]
+    ) -> T:
+        """
+        Run ``transaction`` with a connection to the database, all statements
+        executed by ``transaction`` are committed at once or not at all
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.thread_pool_executor, self._execute_transaction, transaction
         )
 
+    def _execute_transaction(self, transaction: Callable[[sqlite3.Connection], T]) -> T:
+        connection = self._persistent_connection
+        with connection:
+            # lock the database already for reading, so that the data read by
+            # the transaction cannot change before it is written
+            connection.execute("BEGIN IMMEDIATE")
+            return transaction(connection)
+
+    def close(self) -> None:
+        """Close the long-lived connection to the database, if any"""
+        if SqliteRegistry._shared is self:
+            SqliteRegistry._shared = None
+        self.thread_pool_executor.submit(self._close).result()
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @property
+    def _persistent_connection(self) -> sqlite3.Connection:
+        # Must only be used by the thread of the thread_pool_executor, since
+        # sqlite3 connections must not be shared between threads.
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self._db_file,
+                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            )
+            connection.row_factory = dict_factory
+            # in WAL mode, syncing at checkpoints is sufficient for consistency
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection = connection
+        return self._connection
+
     @contextmanager
     def connect(self) -> Generator[sqlite3.Connection, None, None]:
         con = sqlite3.connect(
@@ -139,12 +373,35 @@ class SqliteRegistry(Plugin):
                 "site_id INTEGER PRIMARY KEY AUTOINCREMENT",
                 "site_name VARCHAR(255) UNIQUE",
             ],
+            "DrainRequests": [
+                "drone_uuid VARCHAR(255) PRIMARY KEY",
+                "effective TIMESTAMP",
+            ],
         }
+        if self._history:
+            tables["StateHistory"] = [
+                "id INTEGER PRIMARY KEY AUTOINCREMENT",
+                "drone_uuid VARCHAR(255)",
+                "site_id INTEGER",
+                "machine_type_id INTEGER",
+                "state_id INTEGER",
+                "entered TIMESTAMP",
+            ]
+            tables["StateHistoryHourly"] = [
+                "hour TIMESTAMP",
+                "site_id INTEGER",
+                "machine_type_id INTEGER",
+                "state_id INTEGER",
+                "entries INTEGER",
+                "stays INTEGER",
+                "total_duration REAL",
+                "max_duration REAL",
+                "PRIMARY KEY (hour, site_id, machine_type_id, state_id)",
+            ]
 
         with self.connect() as connection:
             cursor = connection.cursor()
             cursor.execute("PRAGMA foreign_keys = ON")
-            cursor.execute("PRAGMA locking_mode = EXCLUSIVE")
             cursor.execute("PRAGMA journal_mode = WAL")
             for table_name, columns in tables.items():
                 cursor.execute(
@@ -160,20 +417,164 @@ class SqliteRegistry(Plugin):
             cursor.execute(
                 "CREATE UNIQUE INDEX IF NOT EXISTS idx_drone_uuid ON Resources (drone_uuid);"  # noqa B950
             )
+            # indexes matching the filters of the REST API, see crud.get_resources
+            for index, columns in (
+                ("idx_site_machine_type", "site_id, machine_type_id"),
+                ("idx_state", "state_id"),
+                ("idx_updated", "updated"),
+            ):
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index} ON Resources ({columns})"
+                )
+            if self._history:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_history_site_machine_type_entered"
+                    " ON StateHistory (site_id, machine_type_id, entered)"
+                )
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_history_drone_uuid"
+                    " ON StateHistory (drone_uuid, entered)"
+                )
+
+    def add_drain_request(self, drone_uuid: str, delay: float = 0.0) -> None:
+        """
+        Record that draining of a drone has been requested externally, e.g. via
+        the REST API. The request is withdrawn once the drone has changed to
+        ``DrainState`` or ``DownState``.
+
+        Delayed requests have to be stored in the ``DrainRequests`` table as
+        well, see :py:meth:`~.store_drain_requests`, to survive a restart.
+
+        :param drone_uuid: the drone to drain
+        :param delay: time in seconds until the request takes effect
+        """
+        self._drain_requests[drone_uuid] = time.monotonic() + delay
+        if delay > 0:
+            self._stored_drain_requests.add(drone_uuid)
+
+    @staticmethod
+    def store_drain_requests(
+        connection: sqlite3.Connection, delays: Dict[str, float]
+    ) -> None:
+        """
+        Store drain requests taking effect after ``delays`` in seconds per
+        drone_uuid, e.g. as part of :py:meth:`~.async_execute_transaction`
+        """
+        now = datetime.now()
+        connection.executemany(
+            "INSERT OR REPLACE INTO DrainRequests(drone_uuid, effective)"
+            " VALUES (:drone_uuid, :effective)",
+            [
+                {"drone_uuid": drone_uuid, "effective": now + timedelta(seconds=delay)}
+                for drone_uuid, delay in delays.items()
+            ],
+        )
+
+    def _load_drain_requests(self) -> None:
+        """Restore the delayed drain requests stored before a restart"""
+        now = datetime.now()
+        for row in self.execute("SELECT drone_uuid, effective FROM DrainRequests", {}):
+            delay = max((row["effective"] - now).total_seconds(), 0.0)
+            self._drain_requests[row["drone_uuid"]] = time.monotonic() + delay
+            self._stored_drain_requests.add(row["drone_uuid"])
+
+    async def _withdraw_drain_request(self, drone_uuid: str) -> None:
+        self._drain_requests.pop(drone_uuid, None)
+        if drone_uuid in self._stored_drain_requests:
+            self._stored_drain_requests.discard(drone_uuid)
+            await self.async_execute(
+                "DELETE FROM DrainRequests WHERE drone_uuid = :drone_uuid",
+                {"drone_uuid": drone_uuid},
+            )
+
+    def drain_requested(self, drone_uuid: str) -> bool:
+        try:
+            return self._drain_requests[drone_uuid] <= time.monotonic()
+        except KeyError:
+            return False
+
+    def report_usage(
+        self, drone_uuid: str, supply: float, allocation: float, utilisation: float
+    ) -> None:
+        """Record the current usage of a drone in the :py:meth:`~.statistics`"""
+        self._drone_statistics.usage_changed(
+            drone_uuid, supply, allocation, utilisation
+        )
+
+    def statistics(self, dwell_times: bool = False) -> AttributeDict:
+        """
+        Statistics of the drones known to this registry, see
+        :py:meth:`~tardis.utilities.dronestatistics.DroneStatistics.summary`
+        """
+        return self._drone_statistics.summary(dwell_times=dwell_times)
+
+    @property
+    def resources_version(self) -> int:
+        """
+        Version of the resources, increased on every insert, update and delete
+        written by any registry of this process
+        """
+        return SqliteRegistry._resources_version
+
+    @property
+    def types_version(self) -> int:
+        """Version of the sites and machine types, increased whenever one is added"""
+        return SqliteRegistry._types_version
+
+    @staticmethod
+    def resources_changed() -> None:
+        """Increase the :py:attr:`~.resources_version`"""
+        SqliteRegistry._resources_version += 1
+
+    @staticmethod
+    def types_changed() -> None:
+        """Increase the :py:attr:`~.types_version`"""
+        SqliteRegistry._types_version += 1
 
     async def delete_resource(self, bind_parameters: dict):
-        sql_query = """DELETE FROM Resources
-        WHERE drone_uuid = :drone_uuid
-        AND site_id = (SELECT site_id from Sites WHERE site_name = :site_name)"""
-        await self.async_execute(sql_query, bind_parameters)
+        await self._execute_change(self._delete_resource_query, bind_parameters)
+
+    async def _execute_change(self, sql_query: str, bind_parameters: Dict) -> None:
+        bind_parameters = self._bind_ids(bind_parameters)
+        if bind_parameters is None:
+            return
+        if not self._history:
+            await self.async_execute(sql_query, bind_parameters)
+            self.resources_changed()
+            return
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            self.thread_pool_executor,
+            self._execute_with_history,
+            sql_query,
+            bind_parameters,
+        )
+        self.resources_changed()
+        self._schedule_compaction()
+
+    def _execute_with_history(self, sql_query: str, bind_parameters: Dict) -> None:
+        """Execute a change of a resource and append it to the history at once"""
+        connection = self._persistent_connection
+        with connection:
+            connection.execute(sql_query, bind_parameters)
+            connection.execute(self._insert_history_query, bind_parameters)
 
     def execute(self, sql_query: str, bind_parameters: Dict) -> List[Dict]:
+        # Synchronous queries are rare, e.g. during setup, and use a short-lived
+        # connection of their own. Waiting for the thread_pool_executor instead
+        # would queue them behind flushes and compactions and deadlock if called
+        # from its thread.
         with self.connect() as connection:
-            connection.row_factory = lambda cur, row: {
-                col[0]: row[idx] for idx, col in enumerate(cur.description)
-            }
-            cursor = connection.cursor()
-            cursor.execute(sql_query, bind_parameters)
+            connection.row_factory = dict_factory
+            cursor = connection.execute(sql_query, bind_parameters)
+            logger.debug(f"{sql_query},{bind_parameters} executed")
+            return cursor.fetchall()
+
+    def _execute(self, sql_query: str, bind_parameters: Dict) -> List[Dict]:
+        connection = self._persistent_connection
+        with connection:  # context manager to commit or rollback transactions
+            # statements are prepared once and cached by the connection
+            cursor = connection.execute(sql_query, bind_parameters)
             logger.debug(f"{sql_query},{bind_parameters} executed")
             return cursor.fetchall()
 
@@ -198,31 +599,251 @@ class SqliteRegistry(Plugin):
             sql_query, {"site_name": site_name, "machine_type": machine_type}
         )
 
-    async def insert_resource(self, bind_parameters: Dict) -> None:
+    def get_all_resources(self) -> List[Dict]:
+        """All resources including the name of their site and machine type"""
         sql_query = """
-        INSERT OR ROLLBACK INTO
-        Resources(remote_resource_uuid, drone_uuid, state_id, site_id, machine_type_id,
-        created, updated)
-        SELECT :remote_resource_uuid, :drone_uuid, RS.state_id, S.site_id,
-        MT.machine_type_id, :created, :updated
-        FROM ResourceStates RS
-        JOIN Sites S ON S.site_name = :site_name
-        JOIN MachineTypes MT ON MT.machine_type = :machine_type AND MT.site_id =
-        S.site_id
-        WHERE RS.state = :state"""
-        await self.async_execute(sql_query, bind_parameters)
+        SELECT R.remote_resource_uuid, R.drone_uuid, RS.state, R.created, R.updated,
+        S.site_name, MT.machine_type
+        FROM Resources R
+        JOIN ResourceStates RS ON R.state_id = RS.state_id
+        JOIN Sites S ON R.site_id = S.site_id
+        JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id"""
+        return self.execute(sql_query, {})
+
+    async def insert_resource(self, bind_parameters: Dict) -> None:
+        await self._execute_change(self._insert_resource_query, bind_parameters)
 
     async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
         state = str(state)
         logger.debug(f"Drone: {str(resource_attributes)} has changed state to {state}")
         bind_parameters = {"state": state}
         bind_parameters.update(resource_attributes)
-        await self._dispatch_on_state.get(state, self.update_resource)(bind_parameters)
+        self._drone_statistics.state_changed(
+            bind_parameters["drone_uuid"],
+            bind_parameters["site_name"],
+            bind_parameters["machine_type"],
+            state,
+        )
+        if self._write_behind:
+            self._queue_change(state, bind_parameters)
+        else:
+            await self._dispatch_on_state.get(state, self.update_resource)(
+                bind_parameters
+            )
+        if state in ("DrainState", "DownState"):
+            await self._withdraw_drain_request(bind_parameters["drone_uuid"])
+        self.state_changes.publish(
+            AttributeDict(
+                (field, bind_parameters[field]) for field in self._event_fields
+            )
+        )
 
     async def update_resource(self, bind_parameters: Dict) -> None:
-        sql_query = """UPDATE Resources SET updated = :updated,
-        remote_resource_uuid = :remote_resource_uuid,
-        state_id = (SELECT state_id FROM ResourceStates WHERE state = :state)
-        WHERE drone_uuid = :drone_uuid
-        AND site_id = (SELECT site_id FROM Sites WHERE site_name = :site_name)"""
-        await self.async_execute(sql_query, bind_parameters)
+        await self._execute_change(self._update_resource_query, bind_parameters)
+
+    @property
+    def _async_flush_event(self) -> asyncio.Event:
+        # Create event once tardis event loop is running.
+        if self._flush_event is None:
+            self._flush_event = asyncio.Event()
+        return self._flush_event
+
+    def _queue_change(self, state: str, bind_parameters: Dict) -> None:
+        """Coalesce the state change with pending changes of the same drone"""
+        bind_parameters = self._bind_ids(bind_parameters)
+        if bind_parameters is None:
+            return
+        query = {
+            "RequestState": self._insert_resource_query,
+            "DownState": self._delete_resource_query,
+        }.get(state, self._update_resource_query)
+        drone_uuid = bind_parameters["drone_uuid"]
+        pending_query, _ = self._pending.pop(drone_uuid, (None, None))
+        if pending_query == self._insert_resource_query:
+            if query == self._delete_resource_query:
+                # the drone has never been written, so there is nothing to do
+                return
+            # insert the drone right away in its latest state
+            query = self._insert_resource_query
+        self._pending[drone_uuid] = (query, bind_parameters)
+        if self._history:
+            # the history keeps all state changes, they are not coalesced
+            self._pending_history.append((self._insert_history_query, bind_parameters))
+            self._schedule_compaction()
+        if len(self._pending) >= self._flush_size:
+            self._async_flush_event.set()
+        # ensure there is a worker to write the pending changes
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._write_behind_changes())
+
+    async def _write_behind_changes(self) -> None:
+        """Flush pending changes every flush_interval or once flush_size is reached"""
+        try:
+            while self._pending:
+                try:
+                    await asyncio.wait_for(
+                        self._async_flush_event.wait(), self._flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._async_flush_event.clear()
+                await self.flush()
+        finally:
+            self._flush_task = None
+
+    async def flush(self) -> None:
+        """Write all pending state changes to the database"""
+        changes = [*self._pending.values(), *self._pending_history]
+        self._pending, self._pending_history = {}, []
+        if changes:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                self.thread_pool_executor,
+                lambda: self._write_changes(self._persistent_connection, changes),
+            )
+            self.resources_changed()
+
+    def _flush_at_exit(self) -> None:
+        # The thread_pool_executor is already shut down at exit.
+        changes = [*self._pending.values(), *self._pending_history]
+        self._pending, self._pending_history = {}, []
+        if changes:
+            with self.connect() as connection:
+                self._write_changes(connection, changes)
+
+    @staticmethod
+    def _write_changes(
+        connection: sqlite3.Connection, changes: Iterable[Tuple[str, Dict]]
+    ) -> None:
+        """Write state changes with one executemany per query in a transaction"""
+        grouped_changes: Dict[str, List[Dict]] = {}
+        count = 0
+        for count, (query, bind_parameters) in enumerate(changes, start=1):
+            grouped_changes.setdefault(query, []).append(bind_parameters)
+        try:
+            with connection:
+                for query, all_bind_parameters in grouped_changes.items():
+                    connection.executemany(query, all_bind_parameters)
+        except sqlite3.Error as err:
+            # keep as many changes as possible, if some of them are rejected
+            logger.warning(
+                f"Writing {count} state changes failed due to {err!r},"
+                " writing them one by one"
+            )
+            for query, all_bind_parameters in grouped_changes.items():
+                for bind_parameters in all_bind_parameters:
+                    try:
+                        with connection:
+                            connection.execute(query, bind_parameters)
+                    except sqlite3.Error as err:
+                        logger.error(
+                            f"Writing state change of drone"
+                            f" {bind_parameters['drone_uuid']} failed due to {err!r}"
+                        )
+        else:
+            logger.debug(f"{count} state changes written")
+
+    def _schedule_compaction(self) -> None:
+        """Compact the history in the background every compaction_interval"""
+        now = asyncio.get_running_loop().time()
+        if self._next_compaction is None:
+            self._next_compaction = now + self._compaction_interval
+        elif now >= self._next_compaction and self._compaction_task is None:
+            self._next_compaction = now + self._compaction_interval
+            self._compaction_task = asyncio.ensure_future(self._compact_history())
+
+    async def _compact_history(self) -> None:
+        try:
+            await self.compact_history()
+        except sqlite3.Error as err:
+            logger.warning(f"Compaction of the state history failed due to {err!r}")
+        finally:
+            self._compaction_task = None
+
+    async def compact_history(self) -> None:
+        """
+        Roll up state changes older than the retention time into hourly aggregates
+
+        Each state change counts as entry into the state in the hour it
+        happened. Once the next state change of the drone is known, the time
+        spent in the state counts as a completed stay. State changes whose stay
+        is not yet completed are kept, unless the drone is down.
+        """
+        bind_parameters = {
+            "cutoff": datetime.now() - timedelta(seconds=self._retention),
+            "down_state_id": self._state_ids["DownState"],
+        }
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            self.thread_pool_executor, self._compact_history_rows, bind_parameters
+        )
+
+    def _compact_history_rows(self, bind_parameters: Dict) -> None:
+        connection = self._persistent_connection
+        with connection:
+            connection.execute("DROP TABLE IF EXISTS temp.CompactedStays")
+            # stays of drones with state changes before the cutoff
+            connection.execute(
+                """
+                CREATE TEMP TABLE CompactedStays AS
+                SELECT * FROM (
+                    SELECT id, site_id, machine_type_id, state_id, entered,
+                    ROUND((julianday(LEAD(entered) OVER (
+                        PARTITION BY drone_uuid ORDER BY entered, id
+                    )) - julianday(entered)) * 86400, 3) AS duration
+                    FROM StateHistory
+                    WHERE drone_uuid IN (
+                        SELECT drone_uuid FROM StateHistory WHERE entered < :cutoff
+                    )
+                )
+                WHERE entered < :cutoff
+                AND (duration IS NOT NULL OR state_id = :down_state_id)""",
+                bind_parameters,
+            )
+            connection.execute("""
+                INSERT INTO StateHistoryHourly(hour, site_id, machine_type_id,
+                state_id, entries, stays, total_duration, max_duration)
+                SELECT strftime('%Y-%m-%d %H:00:00', entered) AS hour, site_id,
+                machine_type_id, state_id, COUNT(*), COUNT(duration),
+                TOTAL(duration), MAX(duration)
+                FROM CompactedStays
+                WHERE true
+                GROUP BY hour, site_id, machine_type_id, state_id
+                ON CONFLICT(hour, site_id, machine_type_id, state_id) DO UPDATE SET
+                entries = entries + excluded.entries,
+                stays = stays + excluded.stays,
+                total_duration = total_duration + excluded.total_duration,
+                max_duration = MAX(
+                    COALESCE(max_duration, excluded.max_duration),
+                    COALESCE(excluded.max_duration, max_duration)
+                )""")
+            compacted = connection.execute(
+                "DELETE FROM StateHistory WHERE id IN (SELECT id FROM CompactedStays)"
+            ).rowcount
+            connection.execute("DROP TABLE temp.CompactedStays")
+        logger.debug(f"{compacted} state changes rolled up into hourly aggregates")
+
+    async def get_history(self, drone_uuid: str) -> List[Dict]:
+        """All state changes of a drone not yet rolled up, oldest first"""
+        sql_query = """
+        SELECT RS.state, SH.entered
+        FROM StateHistory SH
+        JOIN ResourceStates RS ON SH.state_id = RS.state_id
+        WHERE SH.drone_uuid = :drone_uuid
+        ORDER BY SH.entered, SH.id"""
+        return await self.async_execute(sql_query, {"drone_uuid": drone_uuid})
+
+    async def get_hourly_history(self) -> List[Dict]:
+        """
+        Hourly aggregates of the state changes rolled up so far per site,
+        machine type and state, oldest first
+        """
+        sql_query = """
+        SELECT SHH.hour, S.site_name, MT.machine_type, RS.state, SHH.entries,
+        SHH.stays, SHH.total_duration, SHH.max_duration
+        FROM StateHistoryHourly SHH
+        JOIN ResourceStates RS ON SHH.state_id = RS.state_id
+        JOIN Sites S ON SHH.site_id = S.site_id
+        JOIN MachineTypes MT ON SHH.machine_type_id = MT.machine_type_id
+        ORDER BY SHH.hour, S.site_name, MT.machine_type, RS.state"""
+        return await self.async_execute(sql_query, {})
@@ -8,6 +8,8 @@ from tardis.interfaces.state import State
 from .dronestates import DownState, RequestState
 from ..plugins.sqliteregistry import SqliteRegistry
 from ..utilities.attributedict import AttributeDict
+from ..utilities.heartbeatscheduler import HeartbeatScheduler
+from ..utilities.restoreschedule import RestoreSchedule
 from ..utilities.utils import load_states
 from cobald.daemon import service
 from cobald.interfaces import Pool
@@ -34,11 +36,17 @@ class Drone(Pool):
         state: Optional[State] = None,
         created: Optional[float] = None,
         updated: Optional[float] = None,
+        heartbeat_scheduler: Optional[HeartbeatScheduler] = None,
+        restore_schedule: Optional[RestoreSchedule] = None,
     ):
         self._site_agent = site_agent
         self._batch_system_agent = batch_system_agent
-        self._plugins = plugins or []
+        self._plugins = list(plugins or [])
         self._state = state
+        self._heartbeat_scheduler = heartbeat_scheduler or HeartbeatScheduler()
+        # restored drones start delayed, see RestoreSchedule
+        self._restore_schedule = restore_schedule
+        self._start_delay = restore_schedule.start_delay() if restore_schedule else 0
 
         self.resource_attributes = AttributeDict(
             site_name=self._site_agent.site_name,
@@ -54,6 +62,7 @@ class Drone(Pool):
         self._demand = self.maximum_demand
         self._utilisation = 0.0
         self._supply = 0.0
+        self._heartbeat_backoff = 1.0
 
     @property
     def allocation(self) -> float:
@@ -79,6 +88,14 @@ class Drone(Pool):
         except (IndexError, AttributeError):
             return None
 
+    @property
+    def drain_requested(self) -> bool:
+        """Whether draining of the drone has been requested via the REST API"""
+        try:
+            return self._database.drain_requested(self.resource_attributes.drone_uuid)
+        except AttributeError:
+            return False
+
     @property
     def demand(self) -> float:
         return self._demand
@@ -88,8 +105,27 @@ class Drone(Pool):
         self._demand = value
 
     @property
-    def heartbeat_interval(self) -> int:
-        return self.site_agent.drone_heartbeat_interval
+    def heartbeat_interval(self) -> float:
+        base_interval = self.site_agent.drone_state_heartbeat_intervals.get(
+            self.state.__class__.__name__, self.site_agent.drone_heartbeat_interval
+        )
+        maximum_interval = max(
+            base_interval, self.site_agent.drone_heartbeat_max_interval
+        )
+        return min(base_interval * self._heartbeat_backoff, maximum_interval)
+
+    def _back_off_heartbeat(self) -> None:
+        """Stretch the heartbeat interval while the state does not change"""
+        if 0 < self.heartbeat_interval < self.site_agent.drone_heartbeat_max_interval:
+            self._heartbeat_backoff *= self.site_agent.drone_heartbeat_backoff
+
+    @property
+    def heartbeat_jitter(self) -> float:
+        return self.site_agent.drone_heartbeat_jitter
+
+    @property
+    def heartbeat_scheduler(self) -> HeartbeatScheduler:
+        return self._heartbeat_scheduler
 
     @property
     def minimum_lifetime(self) -> [int, None]:
@@ -124,16 +160,34 @@ class Drone(Pool):
             # newly created drones by default.
             self.resource_attributes.resource_status = ResourceStatus.Booting
             await self.set_state(RequestState())
+        delay = self._start_delay
         while True:
-            current_state = self.state
-            await current_state.run(self)
+            async with self.heartbeat_scheduler.heartbeat(
+                delay,
+                jitter=self.heartbeat_jitter,
+                wake_keys=(self.resource_attributes.drone_uuid,),
+            ):
+                current_state = self.state
+                await current_state.run(self)
+            if self._database is not None:
+                self._database.report_usage(
+                    self.resource_attributes.drone_uuid,
+                    self.supply,
+                    self.allocation,
+                    self.utilisation,
+                )
+            if self._restore_schedule is not None:
+                self._restore_schedule.restored()
+                self._restore_schedule = None
             if isinstance(current_state, DownState):
                 logger.debug(
                     f"Garbage Collect Drone: {self.resource_attributes.drone_uuid}"
                 )
                 self._demand = 0
                 return
-            await asyncio.sleep(self.heartbeat_interval)
+            if self.state.__class__ is current_state.__class__:
+                self._back_off_heartbeat()
+            delay = self.heartbeat_interval
 
     def register_plugins(self, observer: Union[List[Plugin], Plugin]) -> None:
         self._plugins.append(observer)
@@ -146,6 +200,7 @@ class Drone(Pool):
         if state.__class__ != self.state.__class__:
             self.resource_attributes.updated = datetime.now()
             self._state = state
+            self._heartbeat_backoff = 1.0
             await self.notify_plugins()
         else:
             self._state = state
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from datetime import datetime
 import asyncio
 import logging
@@ -25,19 +24,37 @@ logger = logging.getLogger("cobald.runtime.tardis.resources.dronestates")
 async def batchsystem_machine_status(
     state_transition, drone: "Drone", current_state: Type[State]
 ):
+    if isinstance(state_transition, State):
+        # next state does not depend on the machine status
+        return state_transition
     machine_status = await drone.batch_system_agent.get_machine_status(
         drone_uuid=drone.resource_attributes["drone_uuid"]
     )
-    return state_transition[machine_status]()
+    return state_transition[machine_status]
 
 
-async def check_remote_draining(
+async def batchsystem_machine_snapshot(
     state_transition, drone: "Drone", current_state: Type[State]
 ):
-    database_state = await drone.database_state()
+    if isinstance(state_transition, State):
+        # next state does not depend on the machine status
+        return state_transition
+    snapshot = await drone.batch_system_agent.get_machine_snapshot(
+        drone_uuid=drone.resource_attributes["drone_uuid"]
+    )
+    new_state = state_transition[snapshot.status]
+    if new_state is current_state():
+        # allocation and utilisation are only updated if the drone stays in place
+        drone._allocation = snapshot.allocation
+        drone._utilisation = snapshot.utilisation
+    return new_state
 
-    if database_state is DrainState and database_state is not current_state:
-        raise StopProcessing(last_result=database_state())
+
+async def check_remote_draining(
+    state_transition, drone: "Drone", current_state: Type[State]
+):
+    if drone.drain_requested and current_state is not DrainState:
+        raise StopProcessing(last_result=DrainState())
     return state_transition
 
 
@@ -68,7 +85,7 @@ async def resource_status(state_transition, drone: "Drone", current_state: Type[
         drone.resource_attributes.update(
             await drone.site_agent.resource_status(drone.resource_attributes)
         )
-        logger.debug(f"Resource attributes: {drone.resource_attributes}")
+        logger.debug("Resource attributes: %s", drone.resource_attributes)
     except (TardisAuthError, TardisTimeout, TardisResourceStatusUpdateFailed) as err:
         #  Retry to get current state of the resource
         raise StopProcessing(last_result=current_state()) from err
@@ -76,13 +93,13 @@ async def resource_status(state_transition, drone: "Drone", current_state: Type[
         #  Try to cleanup crashed resources
         raise StopProcessing(last_result=CleanupState()) from tdc
     else:
-        return state_transition[drone.resource_attributes.resource_status]()
+        return state_transition[drone.resource_attributes.resource_status]
 
 
 class RequestState(State):
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in RequestState")
+        logger.info("Drone %s in RequestState", drone.resource_attributes)
         try:
             drone.resource_attributes.update(
                 await drone.site_agent.deploy_resource(drone.resource_attributes)
@@ -102,25 +119,25 @@ class RequestState(State):
 
 class BootingState(State):
     transition = {
-        ResourceStatus.Booting: lambda: BootingState(),
-        ResourceStatus.Running: lambda: IntegrateState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Error: lambda: CleanupState(),
+        ResourceStatus.Booting: "BootingState",
+        ResourceStatus.Running: "IntegrateState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Error: "CleanupState",
     }
 
     processing_pipeline = [check_demand, resource_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in BootingState")
+        logger.info("Drone %s in BootingState", drone.resource_attributes)
         await drone.set_state(await cls.run_processing_pipeline(drone))
 
 
 class IntegrateState(State):
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in IntegrateState")
+        logger.info("Drone %s in IntegrateState", drone.resource_attributes)
         await drone.batch_system_agent.integrate_machine(
             drone_uuid=drone.resource_attributes["drone_uuid"]
         )
@@ -129,38 +146,38 @@ class IntegrateState(State):
 
 class IntegratingState(State):
     transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.NotAvailable: lambda: IntegratingState(),
-            MachineStatus.Available: lambda: AvailableState(),
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
+        ResourceStatus.Running: {
+            MachineStatus.NotAvailable: "IntegratingState",
+            MachineStatus.Available: "AvailableState",
+            MachineStatus.Draining: "DrainingState",
+            MachineStatus.Drained: "DisintegrateState",
         },
-        ResourceStatus.Booting: lambda: defaultdict(lambda: BootingState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
+        ResourceStatus.Booting: "BootingState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Error: "CleanupState",
     }
 
     processing_pipeline = [resource_status, batchsystem_machine_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in IntegratingState")
+        logger.info("Drone %s in IntegratingState", drone.resource_attributes)
         await drone.set_state(await cls.run_processing_pipeline(drone))
 
 
 class AvailableState(State):
     transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.Available: lambda: AvailableState(),
-            MachineStatus.NotAvailable: lambda: ShutDownState(),
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
+        ResourceStatus.Running: {
+            MachineStatus.Available: "AvailableState",
+            MachineStatus.NotAvailable: "ShutDownState",
+            MachineStatus.Draining: "DrainingState",
+            MachineStatus.Drained: "DisintegrateState",
         },
-        ResourceStatus.Booting: lambda: defaultdict(lambda: BootingState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
+        ResourceStatus.Booting: "BootingState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Error: "CleanupState",
     }
 
     processing_pipeline = [
@@ -168,22 +185,16 @@ class AvailableState(State):
         check_demand,
         check_minimum_lifetime,
         resource_status,
-        batchsystem_machine_status,
+        batchsystem_machine_snapshot,
     ]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in AvailableState")
+        logger.info("Drone %s in AvailableState", drone.resource_attributes)
 
         new_state = await cls.run_processing_pipeline(drone)
 
         if isinstance(new_state, AvailableState):
-            drone._allocation = await drone.batch_system_agent.get_allocation(
-                drone_uuid=drone.resource_attributes["drone_uuid"]
-            )
-            drone._utilisation = await drone.batch_system_agent.get_utilisation(
-                drone_uuid=drone.resource_attributes["drone_uuid"]
-            )
             drone._supply = drone.maximum_demand
 
         await drone.set_state(new_state)
@@ -192,7 +203,7 @@ class AvailableState(State):
 class DrainState(State):
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in DrainState")
+        logger.info("Drone %s in DrainState", drone.resource_attributes)
         await drone.batch_system_agent.drain_machine(
             drone_uuid=drone.resource_attributes["drone_uuid"]
         )
@@ -202,31 +213,31 @@ class DrainState(State):
 
 class DrainingState(State):
     transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Available: lambda: DrainState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
-            MachineStatus.NotAvailable: lambda: ShutDownState(),
+        ResourceStatus.Running: {
+            MachineStatus.Draining: "DrainingState",
+            MachineStatus.Available: "DrainState",
+            MachineStatus.Drained: "DisintegrateState",
+            MachineStatus.NotAvailable: "ShutDownState",
         },
         # In case the job is retried by HTCondor, resources can transition to
         # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
+        ResourceStatus.Booting: "CleanupState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Error: "CleanupState",
     }
     processing_pipeline = [resource_status, batchsystem_machine_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in DrainingState")
+        logger.info("Drone %s in DrainingState", drone.resource_attributes)
         await drone.set_state(await cls.run_processing_pipeline(drone))
 
 
 class DisintegrateState(State):
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in DisintegrateState")
+        logger.info("Drone %s in DisintegrateState", drone.resource_attributes)
         await drone.batch_system_agent.disintegrate_machine(
             drone_uuid=drone.resource_attributes["drone_uuid"]
         )
@@ -237,20 +248,20 @@ class ShutDownState(State):
     transition = {
         # In case the job is retried by HTCondor, resources can transition to
         # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: ShuttingDownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
+        ResourceStatus.Booting: "CleanupState",
+        ResourceStatus.Running: "ShuttingDownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Error: "CleanupState",
     }
 
     processing_pipeline = [resource_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in ShutDownState")
+        logger.info("Drone %s in ShutDownState", drone.resource_attributes)
         logger.debug(
-            f"Stopping VM with ID {drone.resource_attributes.remote_resource_uuid}"
+            "Stopping VM with ID %s", drone.resource_attributes.remote_resource_uuid
         )
 
         new_state = await cls.run_processing_pipeline(drone)
@@ -270,45 +281,45 @@ class ShuttingDownState(State):
     transition = {
         # In case the job is retried by HTCondor, resources can transition to
         # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: ShuttingDownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
+        ResourceStatus.Booting: "CleanupState",
+        ResourceStatus.Running: "ShuttingDownState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Error: "CleanupState",
     }
     processing_pipeline = [resource_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in ShuttingDownState")
+        logger.info("Drone %s in ShuttingDownState", drone.resource_attributes)
         logger.debug(
-            f"Checking Status of drone with ID "
-            f"{drone.resource_attributes.remote_resource_uuid}"
+            "Checking Status of drone with ID %s",
+            drone.resource_attributes.remote_resource_uuid,
         )
         await drone.set_state(await cls.run_processing_pipeline(drone))
 
 
 class CleanupState(State):
     transition = {
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: DrainState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
+        ResourceStatus.Booting: "CleanupState",
+        ResourceStatus.Running: "DrainState",
+        ResourceStatus.Stopped: "CleanupState",
+        ResourceStatus.Deleted: "DownState",
+        ResourceStatus.Error: "CleanupState",
     }
     processing_pipeline = [resource_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in CleanupState")
+        logger.info("Drone %s in CleanupState", drone.resource_attributes)
 
         new_state = await cls.run_processing_pipeline(drone)
 
         if isinstance(new_state, CleanupState):
             try:
                 logger.debug(
-                    f"Destroying VM with ID "
-                    f"{drone.resource_attributes.remote_resource_uuid}"
+                    "Destroying VM with ID %s",
+                    drone.resource_attributes.remote_resource_uuid,
                 )
                 await drone.site_agent.terminate_resource(drone.resource_attributes)
             except TardisDroneCrashed:
@@ -329,5 +340,8 @@ class CleanupState(State):
 class DownState(State):
     @classmethod
     async def run(cls, drone: "Drone"):
-        logger.info(f"Drone {drone.resource_attributes} in DownState")
+        logger.info("Drone %s in DownState", drone.resource_attributes)
         drone.demand = 0
+
+
+State.compile_transitions()
@@ -1,4 +1,4 @@
-from typing import Iterable, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from tardis.interfaces.plugin import Plugin
 from tardis.interfaces.state import State
@@ -6,6 +6,9 @@ from ..agents.batchsystemagent import BatchSystemAgent
 from ..agents.siteagent import SiteAgent
 from ..configuration.configuration import Configuration
 from ..resources.drone import Drone
+from ..utilities.heartbeatscheduler import HeartbeatScheduler
+from ..utilities.plugindispatcher import PluginDispatcher
+from ..utilities.restoreschedule import RestoreSchedule
 from ..utilities.utils import load_states
 
 from cobald.composite.weighted import WeightedComposite
@@ -14,6 +17,7 @@ from cobald.decorator.standardiser import Standardiser
 from cobald.decorator.logger import Logger
 from cobald.utility.primitives import infinity as inf
 
+from collections import defaultdict
 from functools import partial
 from importlib import import_module
 
@@ -33,6 +37,11 @@ def create_composite_pool(configuration: str = None) -> WeightedComposite:
     batch_system_agent = BatchSystemAgent(batch_system_adapter=batch_system_adapter())
 
     plugins = load_plugins()
+    heartbeat_scheduler = create_heartbeat_scheduler()
+    # wake up drones as soon as their status in the batch system changes
+    batch_system_agent.subscribe_status_changes(heartbeat_scheduler.wake)
+    restore_schedule = create_restore_schedule()
+    drones_to_restore = get_drones_to_restore(plugins)
 
     for site in configuration.Sites:
         site_composites = []
@@ -45,12 +54,16 @@ def create_composite_pool(configuration: str = None) -> WeightedComposite:
                 site_adapter(machine_type=machine_type, site_name=site.name)
             )
 
-            check_pointed_resources = get_drones_to_restore(plugins, site, machine_type)
+            check_pointed_resources = drones_to_restore.get(
+                (site.name, machine_type), []
+            )
             check_pointed_drones = [
                 create_drone(
                     site_agent=site_agent,
                     batch_system_agent=batch_system_agent,
                     plugins=plugins.values(),
+                    heartbeat_scheduler=heartbeat_scheduler,
+                    restore_schedule=restore_schedule,
                     **resource_attributes,
                 )
                 for resource_attributes in check_pointed_resources
@@ -62,6 +75,7 @@ def create_composite_pool(configuration: str = None) -> WeightedComposite:
                 site_agent=site_agent,
                 batch_system_agent=batch_system_agent,
                 plugins=plugins.values(),
+                heartbeat_scheduler=heartbeat_scheduler,
             )
 
             site_composites.append(
@@ -89,6 +103,8 @@ def create_drone(
     state: Optional[State] = None,
     created: float = None,
     updated: float = None,
+    heartbeat_scheduler: Optional[HeartbeatScheduler] = None,
+    restore_schedule: Optional[RestoreSchedule] = None,
 ):
     return Drone(
         site_agent=site_agent,
@@ -99,19 +115,47 @@ def create_drone(
         state=state,
         created=created,
         updated=updated,
+        heartbeat_scheduler=heartbeat_scheduler,
+        restore_schedule=restore_schedule,
     )
 
 
-def get_drones_to_restore(plugins: dict, site, machine_type: str):
-    """Restore check_pointed resources from previously running tardis instance"""
+def create_heartbeat_scheduler() -> HeartbeatScheduler:
+    """Create the heartbeat scheduler shared by all drones"""
+    try:
+        scheduler_configuration = Configuration().HeartbeatScheduler
+    except AttributeError:
+        return HeartbeatScheduler()
+    else:
+        return HeartbeatScheduler(**scheduler_configuration)
+
+
+def create_restore_schedule() -> RestoreSchedule:
+    """Create the schedule to start restored drones in waves"""
+    try:
+        schedule_configuration = Configuration().RestoreSchedule
+    except AttributeError:
+        return RestoreSchedule()
+    else:
+        return RestoreSchedule(**schedule_configuration)
+
+
+def get_drones_to_restore(plugins: dict) -> Dict[Tuple[str, str], List[dict]]:
+    """
+    Restore check_pointed resources from previously running tardis instance,
+    grouped by site name and machine type
+    """
+    drones_to_restore = defaultdict(list)
     try:
         sql_registry = plugins["SqliteRegistry"]
     except KeyError:
-        return []
-    else:
-        return load_states(
-            sql_registry.get_resources(site_name=site.name, machine_type=machine_type)
+        return drones_to_restore
+    for resource in load_states(sql_registry.get_all_resources()):
+        site_name, machine_type = resource.pop("site_name"), resource.pop(
+            "machine_type"
         )
+        drones_to_restore[site_name, machine_type].append(resource)
+    return drones_to_restore
 
 
 def load_plugins():
@@ -123,9 +167,19 @@ def load_plugins():
     else:
 
         def create_instance(plugin):
-            return getattr(
+            instance = getattr(
                 import_module(name=f"tardis.plugins.{plugin.lower()}"), f"{plugin}"
             )()
+            # the registry is used to restore and drain drones, so it must be
+            # up-to-date when the drone continues
+            if plugin == "SqliteRegistry":
+                return instance
+            dispatch_configuration = getattr(
+                plugin_configuration[plugin] or {}, "dispatch", {}
+            )
+            # the dispatcher is a service of cobald, which delivers the pending
+            # notifications once the pool shuts down
+            return PluginDispatcher(instance, **dispatch_configuration)
 
         return {
             plugin: create_instance(plugin) for plugin in plugin_configuration.keys()
@@ -1,3 +1,7 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
 async def get_resource_state(sql_registry, drone_uuid: str):
     sql_query = """
     SELECT R.drone_uuid, RS.state
@@ -7,15 +11,69 @@ async def get_resource_state(sql_registry, drone_uuid: str):
     return await sql_registry.async_execute(sql_query, dict(drone_uuid=drone_uuid))
 
 
-async def get_resources(sql_registry):
-    sql_query = """
-    SELECT R.remote_resource_uuid , RS.state, R.drone_uuid, S.site_name,
-    MT.machine_type, R.created, R.updated
+#: fields of a resource that can be selected and the corresponding columns
+resource_fields = {
+    "remote_resource_uuid": "R.remote_resource_uuid",
+    "state": "RS.state",
+    "drone_uuid": "R.drone_uuid",
+    "site_name": "S.site_name",
+    "machine_type": "MT.machine_type",
+    "created": "R.created",
+    "updated": "R.updated",
+}
+
+
+async def get_resources(
+    sql_registry,
+    site_name: Optional[str] = None,
+    machine_type: Optional[str] = None,
+    state: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[Iterable[str]] = None,
+):
+    """
+    Resources matching all given filters ordered by their ``drone_uuid``
+
+    Pages of ``limit`` resources are selected via keyset pagination, i.e. by
+    passing the ``drone_uuid`` of the last resource of a page as ``after``. The
+    ``drone_uuid`` is always part of the selected ``fields``.
+    """
+    if fields is None:
+        fields = resource_fields
+    elif "drone_uuid" not in fields:
+        fields = ["drone_uuid", *fields]
+    conditions, bind_parameters = [], {}
+    for column, name, value in (
+        ("S.site_name", "site_name", site_name),
+        ("MT.machine_type", "machine_type", machine_type),
+        ("RS.state", "state", state),
+    ):
+        if value is not None:
+            conditions.append(f"{column} = :{name}")
+            bind_parameters[name] = value
+    if updated_since is not None:
+        conditions.append("R.updated >= :updated_since")
+        bind_parameters["updated_since"] = updated_since
+    if after is not None:
+        conditions.append("R.drone_uuid > :after")
+        bind_parameters["after"] = after
+    sql_query = f"""
+    SELECT {", ".join(resource_fields[field] for field in fields)}
     FROM Resources R
     JOIN ResourceStates RS ON R.state_id = RS.state_id
     JOIN Sites S ON R.site_id = S.site_id
     JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id"""
-    return await sql_registry.async_execute(sql_query, {})
+    if conditions:
+        sql_query += f"""
+    WHERE {" AND ".join(conditions)}"""
+    sql_query += """
+    ORDER BY R.drone_uuid"""
+    if limit is not None:
+        sql_query += " LIMIT :limit"
+        bind_parameters["limit"] = limit
+    return await sql_registry.async_execute(sql_query, bind_parameters)
 
 
 async def get_available_states(sql_registry):
@@ -33,9 +91,120 @@ async def get_available_machine_types(sql_registry):
     return await sql_registry.async_execute(sql_query, {})
 
 
-async def set_state_to_draining(sql_registry, drone_uuid: str):
+async def set_state_to_draining(sql_registry, drone_uuid: str) -> bool:
+    """
+    Drain the resource ``drone_uuid``
+
+    :return: whether the resource exists and has been drained
+    """
     sql_query = """
     UPDATE Resources
     SET state_id = (SELECT state_id FROM ResourceStates WHERE state = 'DrainState')
     WHERE drone_uuid = :drone_uuid"""
-    return await sql_registry.async_execute(sql_query, dict(drone_uuid=drone_uuid))
+
+    def drain(connection) -> bool:
+        return connection.execute(sql_query, dict(drone_uuid=drone_uuid)).rowcount > 0
+
+    drained = await sql_registry.async_execute_transaction(drain)
+    # requests for unknown drones would never be withdrawn
+    if drained:
+        sql_registry.add_drain_request(drone_uuid)
+        sql_registry.resources_changed()
+    return drained
+
+
+async def set_states_to_draining(
+    sql_registry,
+    drone_uuids: Optional[List[str]] = None,
+    site_name: Optional[str] = None,
+    machine_type: Optional[str] = None,
+    state: Optional[str] = None,
+    created_before: Optional[datetime] = None,
+    rate: Optional[float] = None,
+) -> List[Dict]:
+    """
+    Drain all resources matching the given ``drone_uuids`` and selectors at once
+
+    The matching resources are selected and drained in a single transaction.
+    If a ``rate`` is given, the drones are requested to drain one after another
+    at ``rate`` drones per second. Drones draining later on keep their state
+    until they act on the request, their requests are stored so that they
+    neither get lost nor take effect all at once in case of a restart.
+
+    :return: the ``result`` per drone, ``"draining"`` along with the ``delay``
+        of its drain request or ``"not found"`` for unknown ``drone_uuids``
+    """
+    conditions, bind_parameters = [], {}
+    if drone_uuids is not None:
+        # stored in a temporary table to stay clear of the limit of parameters
+        conditions.append(
+            "R.drone_uuid IN (SELECT drone_uuid FROM temp.DrainSelection)"
+        )
+    for column, name, value in (
+        ("S.site_name", "site_name", site_name),
+        ("MT.machine_type", "machine_type", machine_type),
+        ("RS.state", "state", state),
+    ):
+        if value is not None:
+            conditions.append(f"{column} = :{name}")
+            bind_parameters[name] = value
+    if created_before is not None:
+        conditions.append("R.created < :created_before")
+        bind_parameters["created_before"] = created_before
+    select_query = f"""
+    SELECT R.drone_uuid
+    FROM Resources R
+    JOIN ResourceStates RS ON R.state_id = RS.state_id
+    JOIN Sites S ON R.site_id = S.site_id
+    JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id
+    WHERE {" AND ".join(conditions)}
+    ORDER BY R.drone_uuid"""
+    update_query = """
+    UPDATE Resources
+    SET state_id = (SELECT state_id FROM ResourceStates WHERE state = 'DrainState')
+    WHERE drone_uuid = :drone_uuid"""
+
+    def drain(connection) -> Dict[str, float]:
+        if drone_uuids is not None:
+            connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS DrainSelection"
+                " (drone_uuid VARCHAR(255))"
+            )
+            connection.execute("DELETE FROM temp.DrainSelection")
+            connection.executemany(
+                "INSERT INTO temp.DrainSelection(drone_uuid) VALUES (?)",
+                [(drone_uuid,) for drone_uuid in drone_uuids],
+            )
+        delays = {
+            row["drone_uuid"]: 0.0 if rate is None else position / rate
+            for position, row in enumerate(
+                connection.execute(select_query, bind_parameters).fetchall()
+            )
+        }
+        connection.executemany(
+            update_query,
+            [
+                {"drone_uuid": drone_uuid}
+                for drone_uuid, delay in delays.items()
+                if delay == 0
+            ],
+        )
+        sql_registry.store_drain_requests(
+            connection,
+            {drone_uuid: delay for drone_uuid, delay in delays.items() if delay > 0},
+        )
+        return delays
+
+    delays = await sql_registry.async_execute_transaction(drain)
+    results = []
+    for drone_uuid, delay in delays.items():
+        sql_registry.add_drain_request(drone_uuid, delay=delay)
+        results.append(dict(drone_uuid=drone_uuid, result="draining", delay=delay))
+    if delays:
+        sql_registry.resources_changed()
+    results.extend(
+        dict(drone_uuid=drone_uuid, result="not found")
+        for drone_uuid in drone_uuids or ()
+        if drone_uuid not in delays
+    )
+    return results
@@ -1,6 +1,38 @@
 from ...plugins.sqliteregistry import SqliteRegistry
 
+from fastapi import FastAPI, Request
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import asyncio
+
+
+@asynccontextmanager
+async def sql_registry_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Provide the registry to the REST API while the app is running
+
+    The REST API shares the registry of the TARDIS daemon if there is one.
+    Otherwise, a registry is created for the lifetime of the app. Since that
+    deploys the database schema, it is created in an executor to keep the event
+    loop shared with the drones responsive.
+    """
+    loop = asyncio.get_running_loop()
+    sql_registry = SqliteRegistry.shared()
+    owned = sql_registry is None
+    if owned:
+        sql_registry = await loop.run_in_executor(None, SqliteRegistry)
+    app.state.sql_registry = sql_registry
+    try:
+        yield
+    finally:
+        del app.state.sql_registry
+        if owned:
+            await loop.run_in_executor(None, sql_registry.close)
+
 
 def get_sql_registry():
-    sql_registry = SqliteRegistry()
-    return lambda: sql_registry
+    async def sql_registry(request: Request) -> SqliteRegistry:
+        return request.app.state.sql_registry
+
+    return sql_registry
@@ -0,0 +1,28 @@
+from fastapi import Request, Response, status
+
+from typing import Optional
+from uuid import uuid4
+
+# distinguishes the versions of this process from those of a previous run
+_epoch = uuid4().hex[:8]
+
+
+def entity_tag(version: int) -> str:
+    """Entity tag of the ``version`` of a resource in the registry"""
+    return f'"{_epoch}-{version}"'
+
+
+def not_modified(request: Request, tag: str) -> Optional[Response]:
+    """
+    Response ``304 Not Modified`` if the client has the current version of the
+    requested resource already, i.e. ``tag`` matches its ``If-None-Match`` header
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    tags = {
+        candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")
+    }
+    if "*" in tags or tag in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+    return None
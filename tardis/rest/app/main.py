@@ -1,5 +1,6 @@
 from ...__about__ import __version__
-from .routers import resources, user, types
+from .database import sql_registry_lifespan
+from .routers import resources, user, types, stats
 from fastapi_jwt_auth.exceptions import AuthJWTException
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -10,6 +11,7 @@ app = FastAPI(
     title="TARDIS REST API",
     version=__version__,
     description="",
+    lifespan=sql_registry_lifespan,
     contact={
         "name": "Matterminers",
         "url": "https://matterminers.github.io/",
@@ -47,3 +49,4 @@ def authjwt_exception_handler(request: Request, exc: AuthJWTException):
 app.include_router(resources.router)
 app.include_router(user.router)
 app.include_router(types.router)
+app.include_router(stats.router)
@@ -1,18 +1,45 @@
 from .. import security, crud, database
+from ..etag import entity_tag, not_modified
 from ....plugins.sqliteregistry import SqliteRegistry
-from fastapi import APIRouter, Depends, HTTPException, Path, Security, status
+from ....utilities.attributedict import AttributeDict
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from ..scopes import Resources
 from fastapi_jwt_auth import AuthJWT
+from pydantic import BaseModel, Field
+
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
+import json
 
 router = APIRouter(prefix="/resources", tags=["resources"])
 
 
 @router.get("/{drone_uuid}/state", description="Get current state of a resource")
 async def get_resource_state(
+    request: Request,
+    response: Response,
     drone_uuid: str = Path(..., pattern=r"^\S+-[A-Fa-f0-9]{10}$"),
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
 ):
+    tag = entity_tag(sql_registry.resources_version)
+    if (unchanged := not_modified(request, tag)) is not None:
+        return unchanged
+    response.headers["ETag"] = tag
     query_result = await crud.get_resource_state(sql_registry, drone_uuid)
     try:
         query_result = query_result[0]
@@ -23,13 +50,226 @@ async def get_resource_state(
     return query_result
 
 
-@router.get("/", description="Get list of managed resources")
+class ResourceField(str, Enum):
+    remote_resource_uuid = "remote_resource_uuid"
+    state = "state"
+    drone_uuid = "drone_uuid"
+    site_name = "site_name"
+    machine_type = "machine_type"
+    created = "created"
+    updated = "updated"
+
+
+#: number of resources fetched from the registry per query while streaming
+page_size = 1000
+
+
+async def iter_resources(
+    sql_registry: SqliteRegistry,
+    limit: Optional[int],
+    after: Optional[str] = None,
+    **filters,
+) -> AsyncIterator[Dict]:
+    """
+    Iterate over the resources matching ``filters`` page by page
+
+    Each page is a separate query, so that other queries of the registry are
+    not blocked until all resources are sent.
+    """
+    while limit is None or limit > 0:
+        page_limit = page_size if limit is None else min(page_size, limit)
+        page = await crud.get_resources(
+            sql_registry, after=after, limit=page_limit, **filters
+        )
+        for resource in page:
+            yield resource
+        if len(page) < page_limit:
+            break
+        after = page[-1]["drone_uuid"]
+        if limit is not None:
+            limit -= len(page)
+
+
+async def json_array(resources: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    separator = "["
+    async for resource in resources:
+        yield separator + json.dumps(jsonable_encoder(resource))
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+async def json_lines(resources: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    async for resource in resources:
+        yield json.dumps(jsonable_encoder(resource)) + "\n"
+
+
+@router.get(
+    "/",
+    description="Get list of managed resources, ordered by their drone_uuid. The "
+    "result is streamed as JSON array or, if requested via the Accept header, as "
+    "newline delimited JSON (application/x-ndjson). To fetch the next page of "
+    "`limit` resources, pass the drone_uuid of the last resource as `after`.",
+)
 async def get_resources(
+    request: Request,
+    site_name: Optional[str] = Query(None, description="Filter by site"),
+    machine_type: Optional[str] = Query(None, description="Filter by machine type"),
+    state: Optional[str] = Query(None, description="Filter by state"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Only resources updated at or after the given time"
+    ),
+    after: Optional[str] = Query(
+        None, description="Only resources with a drone_uuid after the given one"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of resources to return"
+    ),
+    fields: Optional[List[ResourceField]] = Query(
+        None, description="Fields to return, the drone_uuid is always included"
+    ),
+    accept: str = Header("application/json"),
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
 ):
-    query_result = await crud.get_resources(sql_registry)
-    return query_result
+    tag = entity_tag(sql_registry.resources_version)
+    if (unchanged := not_modified(request, tag)) is not None:
+        return unchanged
+    headers = {"ETag": tag, "Vary": "Accept"}
+    resources = iter_resources(
+        sql_registry,
+        limit,
+        site_name=site_name,
+        machine_type=machine_type,
+        state=state,
+        updated_since=updated_since,
+        after=after,
+        fields=None if fields is None else [field.value for field in fields],
+    )
+    if "application/x-ndjson" in accept:
+        return StreamingResponse(
+            json_lines(resources), media_type="application/x-ndjson", headers=headers
+        )
+    return StreamingResponse(
+        json_array(resources), media_type="application/json", headers=headers
+    )
+
+
+#: state changes buffered per client of the event stream before it is evicted
+event_buffer_size = 1000
+#: time in seconds without state changes after which a keep-alive is sent
+keep_alive_interval = 15
+
+
+def server_sent_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(
+    sql_registry: SqliteRegistry,
+    snapshot: bool,
+    site_name: Optional[str],
+    machine_type: Optional[str],
+) -> AsyncIterator[str]:
+    """
+    Stream the state changes of drones as server-sent events
+
+    The subscription starts before the snapshot is taken, so no state change
+    is missed in between. State changes during the snapshot may hence be sent
+    again afterwards.
+    """
+
+    def matches(event: AttributeDict) -> bool:
+        return (site_name is None or event.site_name == site_name) and (
+            machine_type is None or event.machine_type == machine_type
+        )
+
+    subscription = sql_registry.state_changes.subscribe(matches, event_buffer_size)
+    try:
+        if snapshot:
+            resources = 0
+            async for resource in iter_resources(
+                sql_registry,
+                None,
+                site_name=site_name,
+                machine_type=machine_type,
+            ):
+                resources += 1
+                yield server_sent_event("snapshot", resource)
+            yield server_sent_event("snapshot_end", {"resources": resources})
+        while True:
+            item = await subscription.get(timeout=keep_alive_interval)
+            if item is not None:
+                sequence, state_change = item
+                yield server_sent_event("state_change", state_change, sequence)
+            elif subscription.evicted:
+                yield server_sent_event(
+                    "evicted", {"detail": "Client did not keep up with the events"}
+                )
+                return
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        subscription.close()
+
+
+@router.get(
+    "/events",
+    description="Stream state changes of managed resources as server-sent events. "
+    "Unless `snapshot` is false, all current resources are sent as `snapshot` events "
+    "followed by a `snapshot_end` event first. Each `state_change` event carries a "
+    "sequence number as id. Clients not keeping up with the state changes receive "
+    "an `evicted` event and should reconnect.",
+)
+async def stream_events(
+    site_name: Optional[str] = Query(None, description="Filter by site"),
+    machine_type: Optional[str] = Query(None, description="Filter by machine type"),
+    snapshot: bool = Query(True, description="Start with all current resources"),
+    sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
+    _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
+):
+    return StreamingResponse(
+        event_stream(sql_registry, snapshot, site_name, machine_type),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class DrainSelection(BaseModel):
+    drone_uuids: Optional[List[str]] = None
+    site_name: Optional[str] = None
+    machine_type: Optional[str] = None
+    state: Optional[str] = None
+    created_before: Optional[datetime] = None
+    rate: Optional[float] = Field(
+        None, gt=0, description="Drones per second acting on the drain request"
+    )
+
+
+@router.patch(
+    "/drain",
+    description="Gently shut down all drones matching the given drone_uuids and "
+    "selectors in a single transaction. With a `rate`, the drones act on the drain "
+    "request one after another at `rate` drones per second.",
+)
+async def drain_drones(
+    selection: DrainSelection,
+    sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
+    _: AuthJWT = Security(security.check_authorization, scopes=[Resources.patch]),
+):
+    selectors = selection.dict(exclude={"rate"}, exclude_none=True)
+    if not selectors:
+        raise HTTPException(
+            status_code=422,
+            detail="At least one of drone_uuids, site_name, machine_type, state or"
+            " created_before is required",
+        )
+    return await crud.set_states_to_draining(
+        sql_registry, rate=selection.rate, **selectors
+    )
 
 
 @router.patch("/{drone_uuid}/drain", description="Gently shut shown drone")
@@ -38,5 +278,8 @@ async def drain_drone(
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.patch]),
 ):
-    await crud.set_state_to_draining(sql_registry, drone_uuid)
+    if not await crud.set_state_to_draining(sql_registry, drone_uuid):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Drone not found"
+        )
     return {"msg": "Drone set to DrainState"}
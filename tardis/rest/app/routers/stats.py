@@ -0,0 +1,21 @@
+from .. import security
+from .. import database
+from ....plugins.sqliteregistry import SqliteRegistry
+from fastapi import APIRouter, Depends, Security
+from ..scopes import Resources
+from fastapi_jwt_auth import AuthJWT
+
+router = APIRouter(prefix="/stats", tags=["stats", "resources"])
+
+
+@router.get(
+    "/",
+    description="Get the number of drones per state, site and machine type as well"
+    " as their total supply, allocation and utilisation",
+)
+async def get_statistics(
+    dwell_times: bool = False,
+    sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
+    _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
+):
+    return sql_registry.statistics(dwell_times=dwell_times)
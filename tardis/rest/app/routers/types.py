@@ -1,14 +1,18 @@
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
 from tardis.exceptions.tardisexceptions import TardisError
 from .. import security
 from .. import crud, database
+from ..etag import entity_tag, not_modified
 from ....plugins.sqliteregistry import SqliteRegistry
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Request, Response, Security
 from ..scopes import Resources
 from fastapi_jwt_auth import AuthJWT
 
 router = APIRouter(prefix="/types", tags=["types", "resources"])
 
+# name of the type -> (types_version of the registry, available types)
+types_cache: Dict[str, Tuple[int, List[str]]] = {}
+
 
 def sql_to_list(query_result: List[Dict]) -> List[str]:
     try:
@@ -19,28 +23,69 @@ def sql_to_list(query_result: List[Dict]) -> List[str]:
         ) from e
 
 
+async def cached_types(
+    name: str,
+    query: Callable[[SqliteRegistry], Awaitable[List[Dict]]],
+    sql_registry: SqliteRegistry,
+    request: Request,
+    response: Response,
+) -> Union[List[str], Response]:
+    """
+    Available types of the given ``name``, which are queried only if sites or
+    machine types have been added since the last query
+    """
+    version = sql_registry.types_version
+    tag = entity_tag(version)
+    if (unchanged := not_modified(request, tag)) is not None:
+        return unchanged
+    response.headers["ETag"] = tag
+    try:
+        cached_version, available_types = types_cache[name]
+    except KeyError:
+        pass
+    else:
+        if cached_version == version:
+            return available_types
+    available_types = sql_to_list(await query(sql_registry))
+    types_cache[name] = (version, available_types)
+    return available_types
+
+
 @router.get("/states", description="Get all available states")
 async def get_resource_state(
+    request: Request,
+    response: Response,
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
 ):
-    query_result = await crud.get_available_states(sql_registry)
-    return sql_to_list(query_result)
+    return await cached_types(
+        "states", crud.get_available_states, sql_registry, request, response
+    )
 
 
 @router.get("/sites", description="Get all available sites")
 async def get_resource_sites(
+    request: Request,
+    response: Response,
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
 ):
-    query_result = await crud.get_available_sites(sql_registry)
-    return sql_to_list(query_result)
+    return await cached_types(
+        "sites", crud.get_available_sites, sql_registry, request, response
+    )
 
 
 @router.get("/machine_types", description="Get all available machine types")
 async def get_resource_types(
+    request: Request,
+    response: Response,
     sql_registry: SqliteRegistry = Depends(database.get_sql_registry()),
     _: AuthJWT = Security(security.check_authorization, scopes=[Resources.get]),
 ):
-    query_result = await crud.get_available_machine_types(sql_registry)
-    return sql_to_list(query_result)
+    return await cached_types(
+        "machine_types",
+        crud.get_available_machine_types,
+        sql_registry,
+        request,
+        response,
+    )
@@ -16,7 +16,7 @@ async def login(
     expires_delta: Optional[int] = None,
     Authorize: AuthJWT = Depends(),
 ):
-    user = security.check_authentication(login_user.user_name, login_user.password)
+    user = await security.authenticate(login_user.user_name, login_user.password)
 
     # set and check the scopes that are applied to the returned token
     if login_user.scopes is None:
@@ -10,8 +10,14 @@ from fastapi.security import SecurityScopes
 from pydantic import BaseModel
 from fastapi_jwt_auth import AuthJWT
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from typing import List, Optional
+import asyncio
+
+# bcrypt is slow by design, so passwords are checked outside the event loop shared
+# with the drones by a few threads, which bounds the CPU used by a burst of logins
+password_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bcrypt")
 
 
 class Settings(BaseModel):
@@ -93,6 +99,14 @@ def check_authentication(user_name: str, password: str) -> DatabaseUser:
         )
 
 
+async def authenticate(user_name: str, password: str) -> DatabaseUser:
+    """Asynchronous :py:func:`check_authentication` in the ``password_executor``"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, check_authentication, user_name, password
+    )
+
+
 def get_token_scopes(Authorize: AuthJWT) -> List[str]:
     try:
         token_scopes: List[str] = Authorize.get_raw_jwt()["scopes"]
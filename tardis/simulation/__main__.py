@@ -0,0 +1,10 @@
+from .simulate import simulate
+import typer
+
+
+def simulate_cli():
+    typer.run(simulate)
+
+
+if __name__ == "__main__":
+    simulate_cli()
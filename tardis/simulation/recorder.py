@@ -0,0 +1,71 @@
+from ..interfaces.plugin import Plugin
+from ..interfaces.state import State
+from ..resources.dronestates import DownState
+from ..utilities.attributedict import AttributeDict
+
+from collections import Counter
+from typing import Dict, Tuple
+import asyncio
+
+
+class StateRecorder(Plugin):
+    """
+    Record the state changes of drones in (virtual) time of the event loop
+
+    The :py:class:`~.StateRecorder` counts the created and completed drones as
+    well as the number of state changes and keeps track of how long drones
+    dwell in each state.
+    """
+
+    def __init__(self):
+        # drone_uuid -> (name of the current state, time of the state change)
+        self._current: Dict[str, Tuple[str, float]] = {}
+        # name of state -> [number of stays, total duration, longest duration]
+        self._dwell: Dict[str, list] = {}
+        self.created = 0
+        self.completed = 0
+        self.state_changes = 0
+
+    async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
+        """
+        Record a state change of a drone
+
+        :param state: New state of the Drone
+        :param resource_attributes: Contains all meta-data of the Drone (created and
+            updated timestamps, dns name, unique id, site_name, machine_type, etc.)
+        """
+        now = asyncio.get_running_loop().time()
+        drone_uuid = resource_attributes.drone_uuid
+        self.state_changes += 1
+        try:
+            previous_state, since = self._current.pop(drone_uuid)
+        except KeyError:
+            self.created += 1
+        else:
+            duration = now - since
+            dwell = self._dwell.setdefault(previous_state, [0, 0.0, 0.0])
+            dwell[0] += 1
+            dwell[1] += duration
+            dwell[2] = max(dwell[2], duration)
+        if isinstance(state, DownState):
+            self.completed += 1
+        else:
+            self._current[drone_uuid] = (str(state), now)
+
+    @property
+    def dwell_times(self) -> Dict[str, AttributeDict]:
+        """
+        Number of completed stays (``count``) per state as well as their
+        ``mean`` and ``max`` duration in seconds
+        """
+        return {
+            state: AttributeDict(count=count, mean=total / count, max=longest)
+            for state, (count, total, longest) in sorted(self._dwell.items())
+        }
+
+    @property
+    def occupancy(self) -> Dict[str, int]:
+        """Number of drones currently in each state"""
+        return dict(
+            sorted(Counter(state for state, _ in self._current.values()).items())
+        )
@@ -0,0 +1,208 @@
+from ..resources.drone import Drone
+from ..resources.poolfactory import create_composite_pool
+from ..utilities.attributedict import AttributeDict
+from ..utilities.heartbeatscheduler import HeartbeatScheduler
+from .recorder import StateRecorder
+from .virtualtime import VirtualTimeEventLoop, virtual_datetime
+
+from cobald.composite.factory import FactoryPool
+from cobald.controller.linear import LinearController
+from cobald.interfaces import CompositePool, Pool, PoolDecorator
+
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("cobald.runtime.tardis.simulation.runner")
+
+
+def factory_pools(pool: Pool) -> Iterator[FactoryPool]:
+    """Find all :py:class:`~cobald.composite.factory.FactoryPool` in ``pool``"""
+    if isinstance(pool, FactoryPool):
+        yield pool
+    elif isinstance(pool, CompositePool):
+        for child in pool.children:
+            yield from factory_pools(child)
+    elif isinstance(pool, PoolDecorator):
+        yield from factory_pools(pool.target)
+
+
+def adjust_factory_pool(factory: FactoryPool) -> None:
+    """
+    Spawn or release children of ``factory`` to meet its current demand
+
+    This is a single iteration of ``FactoryPool.run`` of ``cobald`` 0.14, which
+    is only available for ``trio``. As ``cobald`` provides no public API for a
+    single iteration, its private ``_shrink`` and ``_grow`` are used here and
+    must be kept in sync with ``FactoryPool.run``.
+    """
+    # freeze target demand in case another thread updates us
+    supply, demand = factory.supply, factory.demand
+    if supply > demand:
+        factory._shrink(target=demand)
+    else:
+        factory._grow(target=demand)
+
+
+class Simulation(object):
+    """
+    Simulate ``COBalD``/``TARDIS`` on a virtual clock
+
+    The pool of drones is created from the ``TARDIS`` ``configuration`` via
+    :py:func:`~tardis.resources.poolfactory.create_composite_pool` and
+    regulated by a :py:class:`~cobald.controller.linear.LinearController`.
+    Everything runs on a :py:class:`~.VirtualTimeEventLoop`, so that the
+    simulated ``duration`` passes as fast as the drones can be processed. The
+    configuration is expected to use the
+    :py:class:`~tardis.adapters.sites.fakesite.FakeSiteAdapter` and the
+    :py:class:`~tardis.adapters.batchsystems.fakebatchsystem.FakeBatchSystemAdapter`.
+
+    :param configuration: path to the ``TARDIS`` configuration
+    :param duration: simulated time in seconds
+    :param low_utilisation: utilisation below which the controller reduces demand
+    :param high_allocation: allocation above which the controller increases demand
+    :param rate: maximum change of demand in resources per second
+    :param controller_interval: interval of the controller in seconds
+    :param sample_interval: interval between samples of the pool in seconds
+    """
+
+    def __init__(
+        self,
+        configuration: str,
+        duration: float,
+        low_utilisation: float = 0.5,
+        high_allocation: float = 0.5,
+        rate: float = 1,
+        controller_interval: float = 1,
+        sample_interval: float = 60,
+    ):
+        self._configuration = configuration
+        self._duration = duration
+        self._controller_parameters = dict(
+            low_utilisation=low_utilisation,
+            high_allocation=high_allocation,
+            rate=rate,
+            interval=controller_interval,
+        )
+        self._sample_interval = sample_interval
+        self._recorder = StateRecorder()
+        self._drones: Dict[Drone, asyncio.Task] = {}
+        self._samples: List[AttributeDict] = []
+        self._heartbeat_scheduler: Optional[HeartbeatScheduler] = None
+        self._failures = 0
+
+    def run(self) -> AttributeDict:
+        """Run the simulation and report its results, see :py:meth:`~.report`"""
+        loop = VirtualTimeEventLoop()
+        started = time.perf_counter()
+        try:
+            with virtual_datetime(loop):
+                loop.run_until_complete(self._simulate())
+        finally:
+            loop.close()
+        return self.report(wall_time=time.perf_counter() - started)
+
+    async def _simulate(self) -> None:
+        pool = create_composite_pool(self._configuration)
+        controller = LinearController(pool, **self._controller_parameters)
+        factories = list(factory_pools(pool))
+        self._adopt_drones(factories)
+        services = [
+            asyncio.ensure_future(service)
+            for service in (
+                self._regulate(controller),
+                self._sample(pool),
+                *(self._manage(factory) for factory in factories),
+            )
+        ]
+        try:
+            await asyncio.sleep(self._duration)
+        finally:
+            for task in (*services, *self._drones.values()):
+                task.cancel()
+            await asyncio.gather(
+                *services, *self._drones.values(), return_exceptions=True
+            )
+
+    async def _regulate(self, controller: LinearController) -> None:
+        while True:
+            controller.regulate(controller.interval)
+            await asyncio.sleep(controller.interval)
+
+    async def _sample(self, pool: Pool) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._samples.append(
+                AttributeDict(
+                    time=loop.time(),
+                    demand=pool.demand,
+                    supply=pool.supply,
+                    allocation=pool.allocation,
+                    utilisation=pool.utilisation,
+                    drones=len(self._drones),
+                )
+            )
+            await asyncio.sleep(self._sample_interval)
+
+    async def _manage(self, factory: FactoryPool) -> None:
+        # Asyncio counterpart of ``FactoryPool.run``, which requires trio
+        while True:
+            await asyncio.sleep(factory.interval)
+            adjust_factory_pool(factory)
+            self._adopt_drones((factory,))
+
+    def _adopt_drones(self, factories) -> None:
+        """Start all drones spawned by the ``factories`` in the meantime"""
+        for factory in factories:
+            for drone in factory.children:
+                if drone in self._drones:
+                    continue
+                drone.register_plugins(self._recorder)
+                self._heartbeat_scheduler = drone.heartbeat_scheduler
+                task = asyncio.ensure_future(drone.run())
+                task.add_done_callback(
+                    lambda task, drone=drone: self._release_drone(drone, task)
+                )
+                self._drones[drone] = task
+
+    def _release_drone(self, drone: Drone, task: asyncio.Task) -> None:
+        del self._drones[drone]
+        if not task.cancelled() and task.exception() is not None:
+            self._failures += 1
+            logger.error(
+                f"Drone {drone.resource_attributes.drone_uuid} failed: "
+                f"{task.exception()!r}"
+            )
+
+    def report(self, wall_time: float) -> AttributeDict:
+        """
+        Results of the simulation
+
+        The report contains the simulated ``duration`` and the ``wall_time`` it
+        took in seconds, the number of drones ``created``, ``completed``
+        (reached ``DownState``) and ``failed`` as well as the number of
+        ``state_changes``. The ``dwell_times`` and the ``occupancy`` at the end
+        are given per state, see :py:class:`~.StateRecorder`. The ``samples``
+        of the demand, supply, allocation and utilisation of the pool taken
+        every ``sample_interval`` show the behaviour of the controller, the
+        ``heartbeats`` contain the statistics of the
+        :py:class:`~tardis.utilities.heartbeatscheduler.HeartbeatScheduler`.
+        """
+        return AttributeDict(
+            duration=self._duration,
+            wall_time=wall_time,
+            created=self._recorder.created,
+            completed=self._recorder.completed,
+            failed=self._failures,
+            state_changes=self._recorder.state_changes,
+            state_changes_per_second=self._recorder.state_changes / wall_time,
+            dwell_times=self._recorder.dwell_times,
+            occupancy=self._recorder.occupancy,
+            samples=self._samples,
+            heartbeats=(
+                self._heartbeat_scheduler.statistics
+                if self._heartbeat_scheduler is not None
+                else AttributeDict()
+            ),
+        )
@@ -0,0 +1,77 @@
+from .runner import Simulation
+
+from pathlib import Path
+from typing import Optional
+import csv
+import logging
+import typer
+
+
+def simulate(
+    configuration: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="TARDIS configuration to simulate"
+    ),
+    duration: float = typer.Option(86400, help="Simulated time in seconds"),
+    low_utilisation: float = typer.Option(
+        0.5, help="Utilisation below which the controller reduces demand"
+    ),
+    high_allocation: float = typer.Option(
+        0.5, help="Allocation above which the controller increases demand"
+    ),
+    rate: float = typer.Option(1, help="Maximum change of demand per second"),
+    controller_interval: float = typer.Option(
+        1, help="Interval of the controller in seconds"
+    ),
+    sample_interval: float = typer.Option(
+        60, help="Interval between samples of the pool in seconds"
+    ),
+    samples: Optional[Path] = typer.Option(
+        None, dir_okay=False, help="CSV file to write the samples of the pool to"
+    ),
+    log_level: str = typer.Option("WARNING", help="Log level of TARDIS"),
+):
+    logging.basicConfig()
+    logging.getLogger("cobald.runtime").setLevel(log_level.upper())
+
+    report = Simulation(
+        configuration=str(configuration),
+        duration=duration,
+        low_utilisation=low_utilisation,
+        high_allocation=high_allocation,
+        rate=rate,
+        controller_interval=controller_interval,
+        sample_interval=sample_interval,
+    ).run()
+
+    typer.echo(
+        f"Simulated {report.duration:.0f}s in {report.wall_time:.2f}s wall time"
+        f" ({report.duration / report.wall_time:.0f}x)"
+    )
+    typer.echo(
+        f"Drones: {report.created} created, {report.completed} completed,"
+        f" {report.failed} failed"
+    )
+    typer.echo(
+        f"State changes: {report.state_changes}"
+        f" ({report.state_changes_per_second:.0f}/s wall time)"
+    )
+    typer.echo("Dwell times [s]:")
+    for state, dwell in report.dwell_times.items():
+        typer.echo(
+            f"  {state:<20} {dwell.count:>8} stays"
+            f"  mean {dwell.mean:>10.1f}  max {dwell.max:>10.1f}"
+        )
+    typer.echo("Drones per state at the end:")
+    for state, count in report.occupancy.items():
+        typer.echo(f"  {state:<20} {count:>8}")
+    if report.heartbeats:
+        typer.echo(
+            f"Heartbeat lag [s]: mean {report.heartbeats.lag_mean:.3f}"
+            f"  max {report.heartbeats.lag_max:.3f}"
+        )
+
+    if samples is not None:
+        with open(samples, "w", newline="") as samples_file:
+            writer = csv.DictWriter(samples_file, fieldnames=report.samples[0].keys())
+            writer.writeheader()
+            writer.writerows(report.samples)
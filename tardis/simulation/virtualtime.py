@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from datetime import datetime
+from importlib import import_module
+from typing import Iterable, Iterator
+
+import asyncio
+import selectors
+
+#: modules whose notion of the current time follows the virtual clock
+VIRTUAL_TIME_MODULES = (
+    "tardis.adapters.sites.fakesite",
+    "tardis.resources.drone",
+    "tardis.resources.dronestates",
+    "tardis.utilities.asynccachemap",
+    "tardis.utilities.simulators.periodicvalue",
+)
+
+
+class _VirtualTimeSelector(object):
+    """
+    Selector advancing the virtual clock instead of waiting for a timeout
+
+    Pending I/O, e.g. results of threads via ``call_soon_threadsafe``, is
+    processed first. Only if there is nothing to do, the clock jumps ahead to
+    the next scheduled callback.
+    """
+
+    def __init__(self, selector: selectors.BaseSelector, loop: "VirtualTimeEventLoop"):
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # nothing is scheduled, only I/O can continue the simulation
+            return self._selector.select(timeout)
+        events = self._selector.select(0)
+        if not events:
+            self._loop.advance(timeout)
+        return events
+
+    def __getattr__(self, item):
+        return getattr(self._selector, item)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop running on a virtual clock
+
+    Instead of waiting for timers, e.g. of :py:func:`asyncio.sleep`, the loop
+    advances its clock to the next scheduled callback as soon as there is
+    nothing else to do. Hence, hours of heartbeats and API delays pass in the
+    time it takes to run the callbacks.
+
+    :param start: the virtual time in seconds since the epoch the loop starts at
+    """
+
+    def __init__(self, start: float = None):
+        super().__init__()
+        self._epoch = datetime.now().timestamp() if start is None else start
+        self._virtual_time = 0.0
+        self._selector = _VirtualTimeSelector(self._selector, self)
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float) -> None:
+        """Advance the virtual clock by ``seconds``"""
+        self._virtual_time += seconds
+
+    def now(self) -> datetime:
+        """The current virtual date and time"""
+        return datetime.fromtimestamp(self._epoch + self._virtual_time)
+
+
+@contextmanager
+def virtual_datetime(
+    loop: VirtualTimeEventLoop, modules: Iterable[str] = VIRTUAL_TIME_MODULES
+) -> Iterator[None]:
+    """
+    Let :py:meth:`datetime.now` follow the clock of ``loop`` in ``modules``
+
+    The ``datetime`` class of each module is replaced for the duration of the
+    context, so that timestamps of drones, boot times of the
+    :py:class:`~tardis.adapters.sites.fakesite.FakeSiteAdapter` and
+    simulators advance with the virtual clock.
+    """
+
+    class VirtualDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return loop.now() if tz is None else loop.now().astimezone(tz)
+
+    patched = []
+    try:
+        for name in modules:
+            module = import_module(name)
+            patched.append((module, module.datetime))
+            module.datetime = VirtualDatetime
+        yield
+    finally:
+        for module, original in reversed(patched):
+            module.datetime = original
@@ -2,7 +2,6 @@ from functools import cached_property
 from typing import TypeVar, Generic, Iterable, List, Tuple, Optional, Set
 from typing_extensions import Protocol
 import asyncio
-import time
 import sys
 
 T = TypeVar("T")
@@ -131,17 +130,16 @@ class AsyncBulkCall(Generic[T, R]):
     async def _get_bulk(self) -> "List[Tuple[T, asyncio.Future[R]]]":
         """Fetch the next bulk from the internal queue"""
         max_items, queue = self._size, self._queue
+        loop = asyncio.get_running_loop()
         # always pull in at least one item asynchronously
         # this avoids stalling for very low delays and efficiently waits for items
         results = [await queue.get()]
         queue.task_done()
-        deadline = time.monotonic() + self._delay
-        while len(results) < max_items and time.monotonic() < deadline:
+        deadline = loop.time() + self._delay
+        while len(results) < max_items and loop.time() < deadline:
             try:
                 if queue.empty():
-                    item = await asyncio.wait_for(
-                        queue.get(), deadline - time.monotonic()
-                    )
+                    item = await asyncio.wait_for(queue.get(), deadline - loop.time())
                 else:
                     item = queue.get_nowait()
             except asyncio.TimeoutError:
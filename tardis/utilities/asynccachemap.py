@@ -1,9 +1,13 @@
-from ..exceptions.executorexceptions import CommandExecutionFailure
+from ..exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+)
 from collections.abc import Mapping
 from datetime import datetime
 from datetime import timedelta
 from functools import partial
 from types import MappingProxyType
+from typing import Callable, Hashable, Iterable, List, Optional, Set
 
 import asyncio
 import logging
@@ -18,13 +22,18 @@ class AsyncCacheMap(Mapping):
         update_coroutine,
         max_age: int = 60 * 15,
         provide_cache: bool = False,
+        change_fields: Optional[Iterable[Hashable]] = None,
     ):
         self._update_coroutine = update_coroutine
+        self._change_fields = (
+            tuple(change_fields) if change_fields is not None else None
+        )
         self._max_age = max_age
         self._last_update = datetime.fromtimestamp(0)
         self._provide_cache = provide_cache
         self._data = {}
         self._lock = None
+        self._subscribers: List[Callable[[Set[Hashable]], None]] = []
 
     @property
     def _async_lock(self):
@@ -42,6 +51,39 @@ class AsyncCacheMap(Mapping):
     def last_update(self) -> datetime:
         return self._last_update
 
+    def subscribe(self, callback: Callable[[Set[Hashable]], None]) -> None:
+        """
+        Register a ``callback`` to be notified about changed entries
+
+        After each update of the cache, the ``callback`` is called with the set
+        of keys whose entries have been added, modified or removed. If
+        ``change_fields`` are given, entries are only considered modified if
+        any of these fields has changed. The ``callback`` is not called if no
+        entry has changed.
+        """
+        self._subscribers.append(callback)
+
+    def _entry_changed(self, old_entry, new_entry) -> bool:
+        if self._change_fields is None or old_entry is None or new_entry is None:
+            return old_entry != new_entry
+        return any(
+            old_entry.get(field) != new_entry.get(field)
+            for field in self._change_fields
+        )
+
+    def _publish_changes(self, old_data: dict) -> None:
+        if not self._subscribers:
+            return
+        new_data = self._data
+        changed_keys = {
+            key
+            for key in old_data.keys() | new_data.keys()
+            if self._entry_changed(old_data.get(key), new_data.get(key))
+        }
+        if changed_keys:
+            for callback in self._subscribers:
+                callback(changed_keys)
+
     @property
     def update_coroutine(self):
         if self._provide_cache:
@@ -59,11 +101,12 @@ class AsyncCacheMap(Mapping):
                     logger.warning(
                         f"AsyncMap update_status failed: Could not decode json {je}"
                     )
-                except CommandExecutionFailure as cf:
+                except (CommandExecutionFailure, CommandExecutionTimeout) as cf:
                     logger.warning(f"AsyncMap update_status failed: {cf}")
                 else:
-                    self._data = data
+                    old_data, self._data = self._data, data
                     self._last_update = current_time
+                    self._publish_changes(old_data)
 
     def __iter__(self):
         return iter(self._data)
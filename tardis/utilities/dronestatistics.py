@@ -0,0 +1,147 @@
+from .attributedict import AttributeDict
+
+from collections import Counter, defaultdict, deque
+from functools import partial
+from typing import Deque, Dict, Optional, Tuple
+import time
+
+
+class DroneStatistics(object):
+    """
+    Statistics of all drones, maintained incrementally on every change
+
+    :param dwell_time_samples: number of recent stays per state kept to
+        estimate the percentiles of the dwell times
+
+    The :py:class:`~.DroneStatistics` keep the number of drones per site,
+    machine type and state as well as the total supply, allocation and
+    utilisation of all drones up to date with each state change and usage
+    report of a drone. Hence, a :py:meth:`~.summary` costs time proportional
+    to the number of groups rather than to the number of drones.
+    """
+
+    def __init__(self, dwell_time_samples: int = 1000):
+        self._dwell_time_samples = dwell_time_samples
+        # drone_uuid -> ((site_name, machine_type, state), time of the state change)
+        self._drones: Dict[str, Tuple[Tuple[str, str, str], Optional[float]]] = {}
+        # drone_uuid -> (supply, allocation, utilisation)
+        self._usage: Dict[str, Tuple[float, float, float]] = {}
+        self._groups: Counter = Counter()
+        self._supply = 0.0
+        self._allocation = 0.0
+        self._utilisation = 0.0
+        # the deque of a state is only created on its first dwell time
+        self._dwell_times: Dict[str, Deque[float]] = defaultdict(
+            partial(deque, maxlen=dwell_time_samples)
+        )
+
+    def state_changed(
+        self, drone_uuid: str, site_name: str, machine_type: str, state: str
+    ) -> None:
+        """Record that a drone changed to ``state``"""
+        now = time.monotonic()
+        try:
+            group, entered = self._drones.pop(drone_uuid)
+        except KeyError:
+            pass
+        else:
+            self._remove_from_group(group)
+            if entered is not None:
+                self._dwell_times[group[2]].append(now - entered)
+        if state == "DownState":
+            # the drone is gone and so is its usage
+            supply, allocation, utilisation = self._usage.pop(
+                drone_uuid, (0.0, 0.0, 0.0)
+            )
+            self._supply -= supply
+            self._allocation -= allocation
+            self._utilisation -= utilisation
+            return
+        group = (site_name, machine_type, state)
+        self._groups[group] += 1
+        self._drones[drone_uuid] = (group, now)
+
+    def restored(
+        self, drone_uuid: str, site_name: str, machine_type: str, state: str
+    ) -> None:
+        """Record a drone restored in ``state``, its time in the state is unknown"""
+        self.state_changed(drone_uuid, site_name, machine_type, state)
+        group, _ = self._drones[drone_uuid]
+        self._drones[drone_uuid] = (group, None)
+
+    def _remove_from_group(self, group: Tuple[str, str, str]) -> None:
+        self._groups[group] -= 1
+        if not self._groups[group]:
+            del self._groups[group]
+
+    def usage_changed(
+        self, drone_uuid: str, supply: float, allocation: float, utilisation: float
+    ) -> None:
+        """Record the current ``supply``, ``allocation`` and ``utilisation`` of a drone"""
+        if drone_uuid not in self._drones:
+            # the drone is gone already
+            return
+        old_supply, old_allocation, old_utilisation = self._usage.get(
+            drone_uuid, (0.0, 0.0, 0.0)
+        )
+        self._supply += supply - old_supply
+        self._allocation += allocation - old_allocation
+        self._utilisation += utilisation - old_utilisation
+        self._usage[drone_uuid] = (supply, allocation, utilisation)
+
+    def summary(self, dwell_times: bool = False) -> AttributeDict:
+        """
+        Current statistics of all drones
+
+        Contains the total number of ``drones``, their total ``supply``,
+        ``allocation`` and ``utilisation``, the number of drones per
+        ``states``, ``sites`` and ``machine_types`` and per combination of
+        them (``groups``). Optionally, the ``dwell_times`` per state contain the
+        ``count`` of recent stays and the ``p50``, ``p90``, ``p99`` percentiles
+        as well as the ``max`` of their duration in seconds.
+        """
+        states, sites, machine_types = Counter(), Counter(), Counter()
+        groups = []
+        for (site_name, machine_type, state), drones in sorted(self._groups.items()):
+            states[state] += drones
+            sites[site_name] += drones
+            machine_types[machine_type] += drones
+            groups.append(
+                AttributeDict(
+                    site_name=site_name,
+                    machine_type=machine_type,
+                    state=state,
+                    drones=drones,
+                )
+            )
+        summary = AttributeDict(
+            drones=len(self._drones),
+            supply=self._supply,
+            allocation=self._allocation,
+            utilisation=self._utilisation,
+            states=dict(sorted(states.items())),
+            sites=dict(sorted(sites.items())),
+            machine_types=dict(sorted(machine_types.items())),
+            groups=groups,
+        )
+        if dwell_times:
+            summary.dwell_times = {
+                state: self._percentiles(samples)
+                for state, samples in sorted(self._dwell_times.items())
+            }
+        return summary
+
+    @staticmethod
+    def _percentiles(samples: Deque[float]) -> AttributeDict:
+        ordered = sorted(samples)
+
+        def percentile(fraction: float) -> float:
+            return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+        return AttributeDict(
+            count=len(ordered),
+            p50=percentile(0.5),
+            p90=percentile(0.9),
+            p99=percentile(0.99),
+            max=ordered[-1],
+        )
@@ -0,0 +1,172 @@
+from .attributedict import AttributeDict
+
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Optional, Set, Tuple
+import asyncio
+import itertools
+import logging
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.eventbroadcast")
+
+
+class EventSubscription(object):
+    """
+    Bounded buffer of the events of an :py:class:`~.EventBroadcast` for a
+    single subscriber, use :py:meth:`~.EventBroadcast.subscribe` to create one
+
+    Iterating over the subscription yields pairs of the sequence number and the
+    event. The iteration ends once the subscription has been evicted.
+    """
+
+    def __init__(
+        self,
+        broadcast: "EventBroadcast",
+        buffer_size: int,
+        predicate: Optional[Callable[[AttributeDict], bool]],
+    ):
+        self._broadcast = broadcast
+        self._buffer_size = buffer_size
+        self._predicate = predicate
+        self._buffer: Deque[Tuple[int, AttributeDict]] = deque()
+        self._loop = asyncio.get_running_loop()
+        self._available = asyncio.Event()
+        self.evicted = False
+
+    def put(self, sequence: int, event: AttributeDict) -> bool:
+        """
+        Buffer an ``event`` if it matches the subscription
+
+        :return: whether the event fitted into the buffer
+        """
+        if self._predicate is not None and not self._predicate(event):
+            return True
+        if len(self._buffer) >= self._buffer_size:
+            return False
+        self._buffer.append((sequence, event))
+        self._wake_up()
+        return True
+
+    def evict(self) -> None:
+        """Stop the subscription, already buffered events are still delivered"""
+        self.evicted = True
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._available.set()
+        else:
+            self._loop.call_soon_threadsafe(self._available.set)
+
+    async def get(
+        self, timeout: Optional[float] = None
+    ) -> Optional[Tuple[int, AttributeDict]]:
+        """
+        Next buffered event, waiting at most ``timeout`` seconds for it
+
+        :return: the sequence number and the event or :py:data:`None` if no event
+            has been published in time or the subscription has been evicted
+        """
+        if not self._buffer and not self.evicted:
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self._buffer:
+            return self._buffer.popleft()
+        return None
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[int, AttributeDict]]:
+        while (item := await self.get()) is not None:
+            yield item
+
+    def close(self) -> None:
+        """Stop receiving events of the broadcast"""
+        self._broadcast.unsubscribe(self)
+
+
+class EventBroadcast(object):
+    """
+    Publish events to any number of subscribers
+
+    :param buffer_size: default maximum number of events buffered per subscriber
+
+    Each subscriber has its own buffer of at most ``buffer_size`` events, so
+    that publishing never waits for subscribers. A subscriber which does not
+    keep up with the events and whose buffer is full is evicted, i.e. it is
+    unsubscribed and learns about it once it has consumed the buffered events.
+    Events carry a sequence number increasing with every published event, so
+    subscribers can tell whether they missed any.
+
+    The number of ``subscribers`` as well as the number of ``published`` events
+    and ``evicted`` subscribers are available via :py:attr:`~.statistics`.
+    """
+
+    def __init__(self, buffer_size: int = 1000):
+        self._buffer_size = buffer_size
+        self._verify_settings(buffer_size)
+        self._subscriptions: Set[EventSubscription] = set()
+        self._sequence = itertools.count(1)
+        self._published = 0
+        self._evicted = 0
+
+    @staticmethod
+    def _verify_settings(buffer_size):
+        if not isinstance(buffer_size, int) or buffer_size <= 0:
+            raise ValueError(f"expected 'buffer_size' > 0, got {buffer_size!r} instead")
+
+    def subscribe(
+        self,
+        predicate: Optional[Callable[[AttributeDict], bool]] = None,
+        buffer_size: Optional[int] = None,
+    ) -> EventSubscription:
+        """
+        Subscribe to all events published from now on
+
+        :param predicate: only events for which ``predicate`` is true are buffered
+        :param buffer_size: overrides the default ``buffer_size`` of the broadcast
+        """
+        if buffer_size is None:
+            buffer_size = self._buffer_size
+        self._verify_settings(buffer_size)
+        subscription = EventSubscription(self, buffer_size, predicate)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def publish(self, event: AttributeDict) -> None:
+        """Pass the ``event`` on to all subscribers"""
+        if not self._subscriptions:
+            return
+        sequence = next(self._sequence)
+        self._published += 1
+        for subscription in list(self._subscriptions):
+            if not subscription.put(sequence, event):
+                self._subscriptions.discard(subscription)
+                subscription.evict()
+                self._evicted += 1
+                logger.warning(
+                    "Evicted a subscriber not keeping up with the events, its"
+                    f" buffer of {subscription._buffer_size} events is full"
+                )
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """
+        Current state of the broadcast
+
+        Contains the number of current ``subscribers``, the number of events
+        ``published`` to at least one subscriber and the number of subscribers
+        ``evicted`` due to a full buffer.
+        """
+        return AttributeDict(
+            subscribers=len(self._subscriptions),
+            published=self._published,
+            evicted=self._evicted,
+        )
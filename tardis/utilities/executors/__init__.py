@@ -1,2 +1,7 @@
 # Need to import all pyyaml loadable classes at least once (bootstrapping problem)
-__all__ = ["shellexecutor", "sshexecutor"]
+__all__ = [
+    "dedupingexecutor",
+    "instrumentedexecutor",
+    "shellexecutor",
+    "sshexecutor",
+]
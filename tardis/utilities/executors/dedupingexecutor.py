@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, Optional, Tuple
+from ...configuration.utilities import enable_yaml_load
+from ...interfaces.executor import CommandResult, Executor
+from ..attributedict import AttributeDict
+from cobald.daemon.plugins import yaml_tag
+
+import asyncio
+import fnmatch
+import logging
+import time
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.executors.dedupingexecutor")
+
+
+@enable_yaml_load("!DedupingExecutor")
+@yaml_tag(eager=True)
+class DedupingExecutor(Executor):
+    """
+    Execute identical concurrent commands only once via another executor
+
+    Commands matching one of the shell-style ``commands`` patterns, e.g.
+    ``condor_status *``, are considered read-only and safe to deduplicate. While
+    such a command is running, further calls with the same command and
+    ``stdin_input`` wait for it and receive the same result or exception
+    instead of running it again. The ``timeout`` of the first call applies to
+    all of them. With a ``cache_ttl``, successful results are
+    even reused for that many seconds. All other commands are passed on to the
+    ``executor`` as they are.
+
+    The number of commands ``executed`` by the ``executor``, ``deduplicated``
+    while in flight and answered from the ``cache`` are available via
+    :py:attr:`~.statistics`.
+
+    :param executor: the executor actually running the commands
+    :param commands: patterns of the commands that are safe to deduplicate
+    :param cache_ttl: seconds to reuse the result of a command
+    """
+
+    def __init__(
+        self, executor: Executor, commands: Iterable[str] = (), cache_ttl: float = 0
+    ):
+        if cache_ttl < 0:
+            raise ValueError(f"expected 'cache_ttl' >= 0, got {cache_ttl!r} instead")
+        self._executor = executor
+        self._commands = tuple(commands)
+        self._cache_ttl = cache_ttl
+        # (command, stdin_input) -> running command
+        self._in_flight: Dict[Tuple[str, Optional[str]], asyncio.Future] = {}
+        # (command, stdin_input) -> (expiry, result), ordered by expiry
+        self._cache: Dict[Tuple[str, Optional[str]], Tuple[float, CommandResult]] = {}
+        self._executed = 0
+        self._deduplicated = 0
+        self._cached = 0
+
+    def deduplicates(self, command: str) -> bool:
+        """Whether ``command`` is safe to deduplicate"""
+        return any(fnmatch.fnmatchcase(command, pattern) for pattern in self._commands)
+
+    async def run_command(
+        self,
+        command: str,
+        stdin_input: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        if not self.deduplicates(command):
+            self._executed += 1
+            return await self._executor.run_command(
+                command, stdin_input=stdin_input, timeout=timeout
+            )
+        key = command, stdin_input
+        try:
+            expiry, result = self._cache[key]
+        except KeyError:
+            pass
+        else:
+            if expiry > time.monotonic():
+                self._cached += 1
+                return result
+            del self._cache[key]
+        try:
+            execution = self._in_flight[key]
+        except KeyError:
+            self._executed += 1
+            execution = self._in_flight[key] = asyncio.ensure_future(
+                self._executor.run_command(
+                    command, stdin_input=stdin_input, timeout=timeout
+                )
+            )
+            execution.add_done_callback(
+                lambda execution: self._completed(key, execution)
+            )
+        else:
+            self._deduplicated += 1
+            logger.debug(f"Waiting for result of in flight command {command}")
+        # callers may give up waiting without cancelling the command for the others
+        return await asyncio.shield(execution)
+
+    def _completed(
+        self, key: Tuple[str, Optional[str]], execution: asyncio.Future
+    ) -> None:
+        del self._in_flight[key]
+        if execution.cancelled() or execution.exception() is not None:
+            return
+        if self._cache_ttl:
+            now = time.monotonic()
+            # re-insert the entry at the end to keep the cache ordered by expiry
+            self._cache.pop(key, None)
+            self._cache[key] = now + self._cache_ttl, execution.result()
+            self._prune_cache(now)
+
+    def _prune_cache(self, now: float) -> None:
+        """Drop expired results, which otherwise stay until their command reruns"""
+        while self._cache:
+            key = next(iter(self._cache))
+            if self._cache[key][0] > now:
+                break
+            del self._cache[key]
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """Number of commands executed, deduplicated and answered from the cache"""
+        return AttributeDict(
+            executed=self._executed,
+            deduplicated=self._deduplicated,
+            cached=self._cached,
+        )
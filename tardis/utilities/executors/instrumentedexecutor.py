@@ -0,0 +1,193 @@
+from typing import ClassVar, Dict, Optional
+from ...configuration.utilities import enable_yaml_load
+from ...exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+    ExecutorFailure,
+)
+from ...interfaces.executor import Executor
+from ...interfaces.metricssink import MetricsSink
+from cobald.daemon.plugins import yaml_tag
+
+from aioprometheus import Counter, Gauge, Histogram
+from aioprometheus.collectors import Collector
+
+import time
+
+
+def command_name(command: str) -> str:
+    """Name of a shell ``command``, i.e. its first token"""
+    return command.split(maxsplit=1)[0] if command.strip() else ""
+
+
+class ExecutorMetrics(object):
+    """
+    Report the details of commands run by an ``executor`` on a ``host``
+
+    All metrics are labelled by ``executor``, ``host`` and the ``command`` name:
+
+    ``tardis_executor_command_duration_seconds``
+        distribution of the time to run a command
+    ``tardis_executor_commands_in_flight``
+        number of commands currently running or queued
+    ``tardis_executor_command_failures_total``
+        number of failed commands, by ``reason`` ``command``, ``timeout`` or
+        ``executor``
+    ``tardis_executor_command_stdout_bytes``
+        distribution of the size of the stdout of successful commands
+    ``tardis_executor_command_queued_seconds``
+        distribution of the time commands wait for a free connection
+    ``tardis_executor_command_retries_total``
+        number of commands retried due to lost connections
+    """
+
+    def __init__(self, sink: MetricsSink, executor: str, host: str):
+        self._sink = sink
+        self._executor = executor
+        self._host = host
+
+    def labels(self, command: str) -> Dict[str, str]:
+        return {
+            "executor": self._executor,
+            "host": self._host,
+            "command": command_name(command),
+        }
+
+    async def run_command(
+        self,
+        executor: Executor,
+        command: str,
+        stdin_input: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Run ``command`` via ``executor`` and report its metrics"""
+        labels = self.labels(command)
+        self._sink.adjust("tardis_executor_commands_in_flight", labels, 1)
+        started = time.monotonic()
+        try:
+            result = await executor.run_command(
+                command, stdin_input=stdin_input, timeout=timeout
+            )
+        except CommandExecutionFailure:
+            self._failed(labels, "command")
+            raise
+        except CommandExecutionTimeout:
+            self._failed(labels, "timeout")
+            raise
+        except ExecutorFailure:
+            self._failed(labels, "executor")
+            raise
+        finally:
+            self._sink.observe(
+                "tardis_executor_command_duration_seconds",
+                labels,
+                time.monotonic() - started,
+            )
+            self._sink.adjust("tardis_executor_commands_in_flight", labels, -1)
+        self._sink.observe(
+            "tardis_executor_command_stdout_bytes", labels, len(result.stdout.encode())
+        )
+        return result
+
+    def _failed(self, labels: Dict[str, str], reason: str) -> None:
+        self._sink.increase(
+            "tardis_executor_command_failures_total", {**labels, "reason": reason}
+        )
+
+    def queued(self, command: str, duration: float) -> None:
+        """Report that ``command`` waited ``duration`` seconds before running"""
+        self._sink.observe(
+            "tardis_executor_command_queued_seconds", self.labels(command), duration
+        )
+
+    def retried(self, command: str) -> None:
+        """Report that ``command`` is retried"""
+        self._sink.increase(
+            "tardis_executor_command_retries_total", self.labels(command)
+        )
+
+
+@enable_yaml_load("!InstrumentedExecutor")
+@yaml_tag(eager=True)
+class InstrumentedExecutor(Executor):
+    """
+    Report the details of all commands run via another executor
+
+    The metrics described in :py:class:`~.ExecutorMetrics` are reported to the
+    ``sink``. Executors supporting it, e.g. the
+    :py:class:`~tardis.utilities.executors.sshexecutor.SSHExecutor`, also report
+    the time commands are queued and how often they are retried.
+
+    :param executor: the executor actually running the commands
+    :param sink: the destination of the metrics
+    :param host: the ``host`` label, defaults to the host of the ``executor``
+        or ``localhost``
+    """
+
+    def __init__(
+        self, executor: Executor, sink: MetricsSink, host: Optional[str] = None
+    ):
+        if host is None:
+            host = getattr(executor, "host", None) or "localhost"
+        self._executor = executor
+        self.metrics = ExecutorMetrics(sink, type(executor).__name__, host)
+        executor.metrics = self.metrics
+
+    async def run_command(
+        self,
+        command: str,
+        stdin_input: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        return await self.metrics.run_command(
+            self._executor, command, stdin_input, timeout
+        )
+
+
+@enable_yaml_load("!PrometheusMetricsSink")
+class PrometheusMetricsSink(MetricsSink):
+    """
+    Provide metrics to Prometheus
+
+    The metrics are registered in the default registry of ``aioprometheus``,
+    which is served by the
+    :py:class:`~tardis.plugins.prometheusmonitoring.PrometheusMonitoring`
+    plugin. Samples are collected in histograms with the given ``buckets`` in
+    seconds, except for metrics of sizes in bytes, i.e. named ``*_bytes``,
+    which use the ``size_buckets``.
+    """
+
+    # metrics are registered once per process, independent of the sink
+    _metrics: ClassVar[Dict[str, Collector]] = {}
+
+    def __init__(
+        self,
+        buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, float("inf")),
+        size_buckets=(1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, float("inf")),
+    ):
+        self._buckets = tuple(buckets)
+        self._size_buckets = tuple(size_buckets)
+
+    def _metric(self, metric: str, metric_type: type) -> Collector:
+        try:
+            return self._metrics[metric]
+        except KeyError:
+            documentation = metric.replace("_", " ")
+            if metric_type is Histogram:
+                buckets = (
+                    self._size_buckets if metric.endswith("_bytes") else self._buckets
+                )
+                collector = Histogram(metric, documentation, buckets=buckets)
+            else:
+                collector = metric_type(metric, documentation)
+            self._metrics[metric] = collector
+            return collector
+
+    def observe(self, metric: str, labels: Dict[str, str], value: float) -> None:
+        self._metric(metric, Histogram).observe(labels, value)
+
+    def increase(self, metric: str, labels: Dict[str, str], value: float = 1) -> None:
+        self._metric(metric, Counter).add(labels, value)
+
+    def adjust(self, metric: str, labels: Dict[str, str], value: float) -> None:
+        self._metric(metric, Gauge).add(labels, value)
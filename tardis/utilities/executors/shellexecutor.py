@@ -1,44 +1,234 @@
+from typing import Optional, Tuple
 from ...configuration.utilities import enable_yaml_load
-from ...exceptions.executorexceptions import CommandExecutionFailure
+from ...exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+    ExecutorFailure,
+)
 from ...interfaces.executor import Executor
 from ..attributedict import AttributeDict
 
 import asyncio
+import os
+import shlex
+import signal
+import uuid
+
+
+def command_result(
+    executor: Executor,
+    command: str,
+    exit_code: int,
+    stdout: bytes,
+    stderr: bytes,
+    stdin_input: Optional[str] = None,
+) -> AttributeDict:
+    """Result of a ``command`` run in a shell or the failure it raises"""
+    # Potentially due to a Python bug, if waitpid(0) is called somewhere else,
+    # the message "WARNING:asyncio:Unknown child process pid 2960761,
+    # will report returncode 255 appears"
+    # However the command succeeded
+    if not exit_code or exit_code == 255:
+        return AttributeDict(
+            stdout=stdout.decode().strip(),
+            stderr=stderr.decode().strip(),
+            exit_code=exit_code,
+        )
+    else:
+        raise CommandExecutionFailure(
+            message=f"Run command {command} via {type(executor).__name__} failed",
+            exit_code=exit_code,
+            stdout=stdout.decode().strip(),
+            stderr=stderr.decode().strip(),
+            stdin=stdin_input,
+        )
+
+
+def verify_timeout(timeout: Optional[float]) -> None:
+    if timeout is not None and not timeout > 0:
+        raise ValueError(f"expected 'timeout' > 0, got {timeout!r} instead")
+
+
+def kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill a ``process`` started in a new session and all its children"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
 
 
 @enable_yaml_load("!ShellExecutor")
 class ShellExecutor(Executor):
-    def __init__(self, *args, **kwargs):
-        pass
+    """
+    Execute shell commands in a new shell each
+
+    :param timeout: seconds after which commands are killed, no limit by default
+    """
+
+    def __init__(self, *args, timeout: Optional[float] = None, **kwargs):
+        verify_timeout(timeout)
+        self.timeout = timeout
 
-    async def run_command(self, command, stdin_input=None):
+    async def run_command(self, command, stdin_input=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
         sub_process = await asyncio.create_subprocess_shell(
             command,
-            stdin=stdin_input and asyncio.subprocess.PIPE,
+            # commands must not read the stdin of TARDIS itself
+            stdin=(
+                asyncio.subprocess.PIPE if stdin_input else asyncio.subprocess.DEVNULL
+            ),
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            # allows to kill the shell and the commands it started at once
+            start_new_session=timeout is not None,
         )
 
-        stdout, stderr = await sub_process.communicate(
-            stdin_input and stdin_input.encode()
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                sub_process.communicate(stdin_input.encode() if stdin_input else None),
+                timeout,
+            )
+        except asyncio.TimeoutError as te:
+            kill_process_group(sub_process)
+            await sub_process.wait()
+            raise CommandExecutionTimeout(
+                message=f"Run command {command} via ShellExecutor timed out",
+                timeout=timeout,
+                stdin=stdin_input,
+            ) from te
+        return command_result(
+            self, command, sub_process.returncode, stdout, stderr, stdin_input
         )
-        exit_code = sub_process.returncode
 
-        # Potentially due to a Python bug, if waitpid(0) is called somewhere else,
-        # the message "WARNING:asyncio:Unknown child process pid 2960761,
-        # will report returncode 255 appears"
-        # However the command succeeded
-        if not exit_code or exit_code == 255:
-            return AttributeDict(
-                stdout=stdout.decode().strip(),
-                stderr=stderr.decode().strip(),
-                exit_code=exit_code,
-            )
+
+class ShellWorker(object):
+    """
+    Long-lived ``/bin/sh`` running the commands sent via its stdin
+
+    Each command is run via ``/bin/sh -c`` as by the :py:class:`~.ShellExecutor`,
+    so that it cannot change the state of the worker, with its stdin redirected
+    from ``stdin_input`` or ``/dev/null``. Its stdout and stderr are terminated
+    by a marker unique to the worker, the marker on stdout is followed by the
+    exit code.
+    """
+
+    #: maximum size of the output of a single command in bytes
+    limit = 2**30
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self._process = process
+        self._marker = uuid.uuid4().hex
+
+    @classmethod
+    async def start(cls) -> "ShellWorker":
+        process = await asyncio.create_subprocess_exec(
+            "/bin/sh",
+            "-s",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=cls.limit,
+            # allows to kill the worker and the commands it started at once
+            start_new_session=True,
+        )
+        return cls(process)
+
+    async def run_command(
+        self, command: str, stdin_input: Optional[str] = None
+    ) -> Tuple[int, bytes, bytes]:
+        """Run ``command`` and provide its exit code, stdout and stderr"""
+        script = f"/bin/sh -c {shlex.quote(command)}"
+        if stdin_input:
+            script = f"printf '%s' {shlex.quote(stdin_input)} | {script}"
         else:
-            raise CommandExecutionFailure(
-                message=f"Run command {command} via ShellExecutor failed",
-                exit_code=exit_code,
-                stdout=stdout.decode().strip(),
-                stderr=stderr.decode().strip(),
-                stdin=stdin_input,
+            script = f"{script} </dev/null"
+        script = (
+            f"{script}; printf '\\n%s %d\\n' {self._marker} \"$?\";"
+            f" printf '\\n%s\\n' {self._marker} >&2\n"
+        )
+        self._process.stdin.write(script.encode())
+        await self._process.stdin.drain()
+        stdout_marker = f"\n{self._marker} ".encode()
+        stderr_marker = f"\n{self._marker}\n".encode()
+        stdout, stderr = await asyncio.gather(
+            self._process.stdout.readuntil(stdout_marker),
+            self._process.stderr.readuntil(stderr_marker),
+        )
+        exit_code = int(await self._process.stdout.readline())
+        return (
+            exit_code,
+            stdout[: -len(stdout_marker)],
+            stderr[: -len(stderr_marker)],
+        )
+
+    def kill(self) -> None:
+        kill_process_group(self._process)
+
+
+@enable_yaml_load("!PersistentShellExecutor")
+class PersistentShellExecutor(Executor):
+    """
+    Execute shell commands via a pool of long-lived shells
+
+    In contrast to the :py:class:`~.ShellExecutor`, TARDIS does not start a new
+    process per command. Instead, commands are passed to one of at most
+    ``workers`` long-lived shells, which are started on demand and reused
+    afterwards. The shells run each command via ``/bin/sh -c``, so results and
+    failures are the same as for the :py:class:`~.ShellExecutor`.
+
+    :param workers: maximum number of shells running commands concurrently
+    :param timeout: seconds after which commands are killed, no limit by default
+    """
+
+    def __init__(self, workers: int = 4, timeout: Optional[float] = None):
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError(f"expected 'workers' > 0, got {workers!r} instead")
+        verify_timeout(timeout)
+        self._workers = workers
+        self.timeout = timeout
+        self._idle = None
+
+    @property
+    def idle_workers(self) -> asyncio.Queue:
+        """
+        Queue of idle workers, :py:data:`None` stands for a worker to be started
+        """
+        # Create queue once tardis event loop is running.
+        # To avoid got Future <Future pending> attached to a different loop exception
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self._workers):
+                self._idle.put_nowait(None)
+        return self._idle
+
+    async def run_command(self, command, stdin_input=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        worker = await self.idle_workers.get()
+        try:
+            if worker is None:
+                worker = await ShellWorker.start()
+            exit_code, stdout, stderr = await asyncio.wait_for(
+                worker.run_command(command, stdin_input), timeout
             )
+        except BaseException as err:
+            # the state of the worker is unknown, e.g. when being cancelled
+            if worker is not None:
+                worker.kill()
+            self.idle_workers.put_nowait(None)
+            if isinstance(err, asyncio.IncompleteReadError):
+                raise ExecutorFailure(
+                    description="Shell worker terminated while running a command",
+                    executor=self,
+                ) from err
+            elif isinstance(err, asyncio.TimeoutError):
+                raise CommandExecutionTimeout(
+                    message=f"Run command {command} via PersistentShellExecutor"
+                    " timed out",
+                    timeout=timeout,
+                    stdin=stdin_input,
+                ) from err
+            raise
+        self.idle_workers.put_nowait(worker)
+        return command_result(self, command, exit_code, stdout, stderr, stdin_input)
@@ -1,7 +1,11 @@
-from typing import Optional, NamedTuple
+from typing import List, Optional
 from ...configuration.utilities import enable_yaml_load
 from ...exceptions.tardisexceptions import TardisAuthError
-from ...exceptions.executorexceptions import CommandExecutionFailure, ExecutorFailure
+from ...exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+    ExecutorFailure,
+)
 from ...interfaces.executor import Executor
 from ..attributedict import AttributeDict
 from cobald.daemon.plugins import yaml_tag
@@ -10,6 +14,7 @@ import asyncio
 import asyncssh
 import logging
 import pyotp
+import time
 from asyncssh.auth import KbdIntPrompts, KbdIntResponse
 from asyncssh.client import SSHClient
 from asyncssh.misc import MaybeAwait
@@ -19,6 +24,7 @@ from asyncstdlib import (
     contextmanager as asynccontextmanager,
 )
 
+from contextlib import suppress
 from functools import partial
 
 logger = logging.getLogger("cobald.runtime.tardis.utilities.executors.sshexecutor")
@@ -85,13 +91,27 @@ class MFASSHClient(SSHClient):
             raise TardisAuthError(msg) from ke
 
 
-class ConnectionState(NamedTuple):
+class ConnectionState(object):
     """State associated with an active SSH connection"""
 
-    #: the SSH connection itself
-    connection: asyncssh.SSHClientConnection
-    #: bound on concurrent sessions over the connection
-    bound: asyncio.Semaphore
+    def __init__(self, connection: asyncssh.SSHClientConnection, max_session: int):
+        if max_session <= 0:
+            raise ValueError(f"expected 'max_session' > 0, got {max_session!r} instead")
+        #: the SSH connection itself
+        self.connection = connection
+        #: the multiplexing limit of the connection
+        self.max_session = max_session
+        #: bound on concurrent sessions over the connection
+        self.bound = asyncio.Semaphore(value=max_session)
+        #: number of commands running or queued on the connection
+        self.sessions = 0
+        #: pending check whether the connection is still idle, if any
+        self.idle_timer: "asyncio.TimerHandle | None" = None
+
+    @property
+    def saturated(self) -> bool:
+        """Whether further commands have to queue for the connection"""
+        return self.sessions >= self.max_session
 
 
 @enable_yaml_load("!SSHExecutor")
@@ -106,26 +126,65 @@ class SSHExecutor(Executor):
     - An established connection is multiplexed for concurrent commands
     - Executing commands are used as feedback on the connection state
     - On connection failure both connection and commands are automatically retried
+    - Further connections are opened if all connections are multiplexed to the
+      limit and closed again once they have been idle for a while
 
     Notably, these features work in accord:
     Once a single command fails due to a broken connection,
     multiplexing means all commands are queued until the connection is reestablished.
     Retrying failed commands efficiently waits for the single connection to be retried.
 
+    The total time commands were ``queued`` waiting for a free session and
+    the longest wait (``max_queued``) are available via
+    :py:attr:`~.statistics`, together with the current number of
+    ``connections`` and ``commands``.
+
     :param on_disconnect_retry: Whether to retry commands if the connection is lost
+    :param max_connections: Maximum number of connections to the host
+    :param idle_timeout: Seconds after which idle connections beyond the first
+        one are closed
+    :param timeout: Seconds after which commands are killed, no limit by default
     """
 
-    def __init__(self, *, on_disconnect_retry: "int | bool" = 3, **parameters):
+    def __init__(
+        self,
+        *,
+        on_disconnect_retry: "int | bool" = 3,
+        max_connections: int = 1,
+        idle_timeout: float = 60,
+        timeout: "float | None" = None,
+        **parameters,
+    ):
         self.on_disconnect_retry = int(on_disconnect_retry)
+        self._verify_settings(max_connections, idle_timeout, timeout)
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
         self._parameters = parameters
         # enable Multi-factor Authentication if required
         if mfa_config := self._parameters.pop("mfa_config", None):
             self._parameters["client_factory"] = partial(
                 MFASSHClient, mfa_config=mfa_config
             )
-        # the current SSH connection unless it must be (re-)established
-        self._connection_state: "ConnectionState | None" = None
+        # the current SSH connections, (re-)established on demand
+        self._connections: List[ConnectionState] = []
         self._lock = None
+        self._commands = 0
+        self._queued = 0.0
+        self._max_queued = 0.0
+
+    @staticmethod
+    def _verify_settings(max_connections, idle_timeout, timeout):
+        if not isinstance(max_connections, int) or max_connections <= 0:
+            raise ValueError(
+                f"expected 'max_connections' > 0, got {max_connections!r} instead"
+            )
+        if idle_timeout < 0:
+            raise ValueError(
+                f"expected 'idle_timeout' >= 0, got {idle_timeout!r} instead"
+            )
+        if timeout is not None and not timeout > 0:
+            raise ValueError(f"expected 'timeout' > 0, got {timeout!r} instead")
 
     async def _establish_connection(self):
         for retry in range(9):
@@ -147,11 +206,11 @@ class SSHExecutor(Executor):
     ):
         # clear broken connection to get it replaced
         # by a new connection during next command
-        if (
-            self._connection_state is not None
-            and ssh_connection is self._connection_state.connection
-        ):
-            self._connection_state = None
+        self._connections = [
+            state
+            for state in self._connections
+            if state.connection is not ssh_connection
+        ]
         raise ExecutorFailure(
             description="SSH connection lost",
             executor=self,
@@ -161,25 +220,83 @@ class SSHExecutor(Executor):
     @asynccontextmanager
     async def bounded_connection(self):
         """
-        Get the current connection with a single reserved session slot
+        Get the least loaded connection with a single reserved session slot
 
-        This is a context manager that guards the current
+        This is a context manager that guards the
         :py:class:`~asyncssh.SSHClientConnection`
-        so that only `MaxSessions` commands run at once.
+        so that only `MaxSessions` commands run at once per connection.
+        A new connection is opened if all connections are saturated and there
+        are less than ``max_connections``.
         """
-        if self._connection_state is None:
+        state = self._least_loaded
+        if state is None or (
+            state.saturated and len(self._connections) < self.max_connections
+        ):
             async with self.lock:
                 # check that connection has not been initialized in a different task
-                while self._connection_state is None:
+                state = self._least_loaded
+                while state is None or (
+                    state.saturated and len(self._connections) < self.max_connections
+                ):
                     connection = await self._establish_connection()
                     max_session = await probe_max_session(connection)
-                    self._connection_state = ConnectionState(
-                        connection, asyncio.Semaphore(value=max_session)
-                    )
-        assert self._connection_state is not None
-        session, bound = self._connection_state
-        async with bound:
-            yield session
+                    if max_session <= 0:
+                        connection.close()
+                        raise ExecutorFailure(
+                            description="SSH connection does not permit any session",
+                            executor=self,
+                        )
+                    state = ConnectionState(connection, max_session)
+                    self._connections.append(state)
+        state.sessions += 1
+        self._commands += 1
+        if state.idle_timer is not None:
+            state.idle_timer.cancel()
+            state.idle_timer = None
+        queued_since = time.monotonic()
+        try:
+            async with state.bound:
+                queued = time.monotonic() - queued_since
+                self._queued += queued
+                self._max_queued = max(self._max_queued, queued)
+                yield state.connection
+        finally:
+            state.sessions -= 1
+            self._commands -= 1
+            if not state.sessions:
+                state.idle_timer = asyncio.get_running_loop().call_later(
+                    self.idle_timeout, self._close_idle_connection, state
+                )
+
+    @property
+    def _least_loaded(self) -> "ConnectionState | None":
+        return min(
+            self._connections,
+            key=lambda state: state.sessions / max(state.max_session, 1),
+            default=None,
+        )
+
+    def _close_idle_connection(self, state: ConnectionState):
+        """Close a connection idle for ``idle_timeout`` unless it is the first one"""
+        state.idle_timer = None
+        if not state.sessions and state in self._connections[1:]:
+            self._connections.remove(state)
+            state.connection.close()
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """Current load of the connections and time commands spent queued"""
+        return AttributeDict(
+            connections=len(self._connections),
+            commands=self._commands,
+            queued=self._queued,
+            max_queued=self._max_queued,
+        )
+
+    @property
+    def host(self) -> "str | None":
+        """Host the commands are executed on"""
+        return self._parameters.get("host")
 
     @property
     def lock(self):
@@ -190,23 +307,46 @@ class SSHExecutor(Executor):
             self._lock = asyncio.Lock()
         return self._lock
 
-    async def run_command(self, command: str, stdin_input: "str | None" = None):
+    async def run_command(
+        self,
+        command: str,
+        stdin_input: "str | None" = None,
+        timeout: "float | None" = None,
+    ):
+        if timeout is None:
+            timeout = self.timeout
         try:
-            return await self._run_command_once(command, stdin_input)
+            return await self._run_command_once(command, stdin_input, timeout)
         except ExecutorFailure:
             for _ in range(self.on_disconnect_retry):
+                if self.metrics is not None:
+                    self.metrics.retried(command)
                 try:
-                    return await self._run_command_once(command, stdin_input)
+                    return await self._run_command_once(command, stdin_input, timeout)
                 except ExecutorFailure:
                     pass
             raise
 
-    async def _run_command_once(self, command, stdin_input=None):
+    async def _run_command_once(self, command, stdin_input=None, timeout=None):
+        waiting_since = time.monotonic()
         async with self.bounded_connection as ssh_connection:
+            if self.metrics is not None:
+                self.metrics.queued(command, time.monotonic() - waiting_since)
             try:
-                response = await ssh_connection.run(
-                    command, check=True, input=stdin_input
+                process = await ssh_connection.create_process(
+                    command, input=stdin_input
                 )
+                response = await process.wait(check=True, timeout=timeout)
+            except asyncssh.TimeoutError as te:
+                # stop the remote command and free its session for other commands
+                with suppress(OSError):
+                    process.kill()
+                process.close()
+                raise CommandExecutionTimeout(
+                    message=f"Run command {command} via SSHExecutor timed out",
+                    timeout=timeout,
+                    stdin=stdin_input,
+                ) from te
             except asyncssh.ProcessError as pe:
                 raise CommandExecutionFailure(
                     message=f"Run command {command} via SSHExecutor failed",
@@ -239,6 +379,8 @@ class DupingSSHExecutor(SSHExecutor):
         self._wrapper_script = wrapper
         super().__init__(**parameters)
 
-    async def run_command(self, command, stdin_input=None):
+    async def run_command(self, command, stdin_input=None, timeout=None):
         stdin_input = f"{command}\n{stdin_input}\n" if stdin_input else f"{command}\n"
-        return await super().run_command(self._wrapper_script, stdin_input=stdin_input)
+        return await super().run_command(
+            self._wrapper_script, stdin_input=stdin_input, timeout=timeout
+        )
@@ -0,0 +1,209 @@
+from .attributedict import AttributeDict
+
+from contextlib import asynccontextmanager
+from functools import cached_property
+from typing import AsyncIterator, Dict, Hashable, Iterable, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import sys
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.heartbeatscheduler")
+
+
+class HeartbeatScheduler(object):
+    """
+    Shared scheduler for the periodic state runs of many drones
+
+    :param max_concurrent: how many state runs may be in flight at the same time
+    :param lag_warning: lag in seconds of state runs that is reported as warning
+
+    Instead of every drone sleeping on a timer of its own, drones register
+    their next heartbeat with the :py:class:`~.HeartbeatScheduler`. Pending
+    heartbeats are kept in a heap keyed by the time they are due and a single
+    timer of the event loop is armed for the earliest one. Once it fires, all
+    heartbeats due by then are released at once.
+
+    Heartbeats may register ``wake_keys`` to be released early via
+    :py:meth:`~.wake`, for example when the status of the corresponding
+    resource is known to have changed. The regular heartbeat then only serves as
+    a safety net in case a change went unnoticed.
+
+    A random ``jitter`` can be added to each heartbeat to spread the state runs
+    of drones over time instead of having them wake up in bursts. The
+    ``max_concurrent`` parameter bounds the number of state runs in flight;
+    heartbeats exceeding that bound wait for a free slot. Possible values for
+    ``max_concurrent`` are :py:data:`None` for unlimited concurrency or an
+    integer above 0 to set a precise concurrency limit.
+
+    How far behind schedule state runs are started, including the time spent
+    waiting for a free slot, is available via :py:attr:`~.statistics`. If the
+    lag of a state run exceeds ``lag_warning`` seconds, a warning is logged at
+    most every :py:attr:`~.lag_report_interval` seconds until state runs are
+    back on schedule. Possible values for ``lag_warning`` are :py:data:`None`
+    to disable the warning or a number above 0.
+    """
+
+    #: smoothing factor of the exponential moving average of the lag
+    lag_smoothing = 0.05
+    #: minimum time in seconds between two warnings about the lag
+    lag_report_interval = 60.0
+
+    def __init__(
+        self, max_concurrent: Optional[int] = None, lag_warning: Optional[float] = None
+    ):
+        self._concurrency = sys.maxsize if max_concurrent is None else max_concurrent
+        self._lag_warning = lag_warning
+        # loop time of the last warning about the lag, None if on schedule
+        self._lag_reported: Optional[float] = None
+        # pending heartbeats as (due time, sequence number, waiter)
+        self._heartbeats: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # pending heartbeats that may be woken up early
+        self._wakeable: Dict[Hashable, asyncio.Future] = {}
+        self._woken = 0
+        self._in_flight = 0
+        self._lag_last = 0.0
+        self._lag_mean = 0.0
+        self._lag_max = 0.0
+        self._verify_settings()
+
+    @cached_property
+    def _concurrent(self) -> asyncio.Semaphore:
+        """synchronized counter for state runs in flight"""
+        return asyncio.Semaphore(value=self._concurrency)
+
+    def _verify_settings(self):
+        if not isinstance(self._concurrency, int) or self._concurrency <= 0:
+            raise ValueError(
+                "'max_concurrent' must be None or an integer above 0"
+                f", got {self._concurrency!r} instead"
+            )
+        if self._lag_warning is not None and not self._lag_warning > 0:
+            raise ValueError(
+                f"expected 'lag_warning' > 0, got {self._lag_warning!r} instead"
+            )
+
+    @asynccontextmanager
+    async def heartbeat(
+        self, delay: float, jitter: float = 0.0, wake_keys: Iterable[Hashable] = ()
+    ) -> AsyncIterator:
+        """
+        Wait for the next heartbeat and reserve a slot for a state run
+
+        :param delay: time in seconds until the heartbeat is due
+        :param jitter: upper bound of a random time in seconds added to a
+            non-zero ``delay``
+        :param wake_keys: keys to release the heartbeat early via :py:meth:`~.wake`
+        """
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        if delay > 0:
+            due += delay + random.uniform(0, jitter)
+            await self._wait_until(due, wake_keys)
+        async with self._concurrent:
+            # heartbeats that have been woken up early are not lagging behind
+            self._record_lag(max(loop.time() - due, 0.0))
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+
+    async def _wait_until(self, due: float, wake_keys: Iterable[Hashable]) -> None:
+        """Wait until the loop time ``due`` has passed or any key is woken up"""
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heartbeats, (due, next(self._sequence), waiter))
+        # only re-arm the timer if this is the new earliest heartbeat
+        if self._heartbeats[0][2] is waiter:
+            self._arm_timer()
+        wake_keys = tuple(wake_keys)
+        for key in wake_keys:
+            self._wakeable[key] = waiter
+        try:
+            await waiter
+        finally:
+            for key in wake_keys:
+                if self._wakeable.get(key) is waiter:
+                    del self._wakeable[key]
+
+    def wake(self, keys: Iterable[Hashable]) -> None:
+        """
+        Release the pending heartbeats registered for any of the ``keys`` now
+
+        Keys without a pending heartbeat are ignored, this includes keys whose
+        state run is currently in flight.
+        """
+        for key in keys:
+            waiter = self._wakeable.pop(key, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+                self._woken += 1
+
+    def _arm_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_at(
+            self._heartbeats[0][0], self._release_heartbeats
+        )
+
+    def _release_heartbeats(self) -> None:
+        """Release all heartbeats that are due and arm the timer for the next"""
+        self._timer = None
+        now = asyncio.get_running_loop().time()
+        heartbeats = self._heartbeats
+        while heartbeats and heartbeats[0][0] <= now:
+            _, _, waiter = heapq.heappop(heartbeats)
+            # the waiting drone may have been cancelled meanwhile
+            if not waiter.done():
+                waiter.set_result(None)
+        if heartbeats:
+            self._arm_timer()
+
+    def _record_lag(self, lag: float) -> None:
+        self._lag_last = lag
+        self._lag_mean += self.lag_smoothing * (lag - self._lag_mean)
+        self._lag_max = max(self._lag_max, lag)
+        if self._lag_warning is not None:
+            self._report_lag(lag)
+
+    def _report_lag(self, lag: float) -> None:
+        now = asyncio.get_running_loop().time()
+        if lag > self._lag_warning:
+            if (
+                self._lag_reported is None
+                or now - self._lag_reported >= self.lag_report_interval
+            ):
+                self._lag_reported = now
+                logger.warning(
+                    f"State runs are {lag:.1f}s behind schedule"
+                    f" (mean {self._lag_mean:.1f}s, max {self._lag_max:.1f}s,"
+                    f" {self._in_flight} in flight)"
+                )
+        elif self._lag_reported is not None:
+            self._lag_reported = None
+            logger.info(f"State runs are back on schedule, lag {lag:.1f}s")
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """
+        Current state of the scheduler
+
+        Contains the number of ``pending`` heartbeats, the number of state runs
+        ``in_flight``, the number of heartbeats ``woken`` up early and the lag
+        in seconds between the time a heartbeat was due and its state run
+        started. The lag is given for the most recent state run (``lag_last``),
+        as moving average (``lag_mean``) and as maximum observed so far
+        (``lag_max``).
+        """
+        return AttributeDict(
+            pending=sum(not waiter.done() for *_, waiter in self._heartbeats),
+            in_flight=self._in_flight,
+            woken=self._woken,
+            lag_last=self._lag_last,
+            lag_mean=self._lag_mean,
+            lag_max=self._lag_max,
+        )
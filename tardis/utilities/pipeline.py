@@ -1,6 +1,3 @@
-import asyncio
-
-
 class StopProcessing(BaseException):
     def __init__(self, last_result):
         super().__init__(last_result)
@@ -20,12 +17,10 @@ class PipelineProcessor(object):
             self._processing_pipeline.append(func)
 
     async def run_pipeline(self, pipeline_input, *args, **kwargs):
+        result = pipeline_input
         try:
-            pipeline = asyncio.Future()
-            pipeline.set_result(pipeline_input)
-
             for func_call in self._processing_pipeline:
-                pipeline = func_call(await pipeline, *args, **kwargs)
-            return await pipeline
+                result = await func_call(result, *args, **kwargs)
         except StopProcessing as ex:
             return ex.last_result
+        return result
@@ -0,0 +1,309 @@
+from ..interfaces.metricssink import MetricsSink
+from ..interfaces.plugin import Plugin
+from ..interfaces.state import State
+from .attributedict import AttributeDict
+
+from cobald.daemon import service
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import asyncio
+import itertools
+import logging
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.plugindispatcher")
+
+
+@service(flavour=asyncio)
+class PluginDispatcher(Plugin):
+    """
+    Deliver notifications to a plugin in the background
+
+    :param plugin: the plugin to notify
+    :param queue_size: maximum number of notifications waiting for delivery
+    :param policy: how to handle notifications exceeding the ``queue_size``
+    :param timeout: maximum time in seconds a single notification may take
+    :param shutdown_timeout: maximum time in seconds to deliver the pending
+        notifications when TARDIS shuts down
+    :param metrics: optional destination of the metrics of the dispatcher
+
+    The :py:class:`~.PluginDispatcher` wraps a ``plugin`` so that notifying it
+    merely queues the notification, which is then delivered by a worker task
+    in order. A slow or unavailable plugin hence does not delay the state
+    changes of drones.
+
+    The ``policy`` determines what happens once ``queue_size`` notifications
+    are waiting for delivery:
+
+    ``"block"``
+        wait until there is space in the queue, the default so that no
+        notification is lost unless an operator opts in
+    ``"drop_oldest"``
+        discard the oldest notification waiting for delivery
+    ``"coalesce"``
+        keep only the latest notification per drone, if the queue is still
+        full discard the oldest notification waiting for delivery
+
+    Notifications exceeding the ``timeout`` are cancelled, possible values for
+    ``timeout`` are :py:data:`None` for no timeout or a number above 0.
+
+    The number of queued, dropped, timed out and failed notifications as well
+    as the delivery latency are available via :py:attr:`~.statistics`. If a
+    ``metrics`` sink is given, the following metrics labelled by the ``plugin``
+    name are reported as well:
+
+    ``tardis_plugin_notifications_queued``
+        number of notifications waiting for delivery
+    ``tardis_plugin_notification_latency_seconds``
+        distribution of the time between queueing and delivering notifications
+    ``tardis_plugin_notifications_dropped_total``
+        number of notifications dropped due to a full queue
+    ``tardis_plugin_notification_failures_total``
+        number of failed notifications, by ``reason`` ``timeout`` or ``error``
+
+    When TARDIS shuts down, the notifications still waiting for delivery are
+    delivered for at most ``shutdown_timeout`` seconds.
+    """
+
+    policies = ("block", "drop_oldest", "coalesce")
+
+    #: smoothing factor of the exponential moving average of the latency
+    latency_smoothing = 0.05
+
+    def __init__(
+        self,
+        plugin: Plugin,
+        queue_size: int = 1000,
+        policy: str = "block",
+        timeout: Optional[float] = None,
+        shutdown_timeout: float = 30,
+        metrics: Optional[MetricsSink] = None,
+    ):
+        self._plugin = plugin
+        self._queue_size = queue_size
+        self._policy = policy
+        self._timeout = timeout
+        self._shutdown_timeout = shutdown_timeout
+        self._metrics = metrics
+        # queue depth last reported to the metrics sink
+        self._reported_queue_depth = 0
+        # notifications waiting for delivery as key -> (state, attributes, time)
+        self._pending: "OrderedDict[Hashable, Tuple[State, AttributeDict, float]]" = (
+            OrderedDict()
+        )
+        self._sequence = itertools.count()
+        self._space: Optional[asyncio.Condition] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._overflowing = False
+        self._dropped = 0
+        self._coalesced = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._latency_last = 0.0
+        self._latency_mean = 0.0
+        self._latency_max = 0.0
+        self._verify_settings()
+
+    def _verify_settings(self):
+        if not isinstance(self._queue_size, int) or self._queue_size <= 0:
+            raise ValueError(
+                f"expected 'queue_size' > 0, got {self._queue_size!r} instead"
+            )
+        if self._policy not in self.policies:
+            raise ValueError(
+                f"expected 'policy' to be one of {self.policies}"
+                f", got {self._policy!r} instead"
+            )
+        if self._timeout is not None and self._timeout <= 0:
+            raise ValueError(
+                "'timeout' must be None or a number above 0"
+                f", got {self._timeout!r} instead"
+            )
+        if self._shutdown_timeout <= 0:
+            raise ValueError(
+                "expected 'shutdown_timeout' > 0"
+                f", got {self._shutdown_timeout!r} instead"
+            )
+
+    @property
+    def plugin(self) -> Plugin:
+        return self._plugin
+
+    @property
+    def _plugin_name(self) -> str:
+        return self._plugin.__class__.__name__
+
+    @property
+    def _labels(self) -> Dict[str, str]:
+        return {"plugin": self._plugin_name}
+
+    @property
+    def _async_space(self) -> asyncio.Condition:
+        # Create condition once tardis event loop is running.
+        if self._space is None:
+            self._space = asyncio.Condition()
+        return self._space
+
+    async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
+        """
+        Queue a notification of the ``plugin`` about a state change
+
+        :param state: New state of the Drone
+        :param resource_attributes: Contains all meta-data of the Drone (created and
+            updated timestamps, dns name, unique id, site_name, machine_type, etc.)
+        """
+        if self._policy == "coalesce":
+            key = resource_attributes.drone_uuid
+            # the latest notification of a drone supersedes the pending one
+            if self._pending.pop(key, None) is not None:
+                self._coalesced += 1
+        else:
+            key = next(self._sequence)
+        if len(self._pending) >= self._queue_size:
+            if self._policy == "block":
+                async with self._async_space:
+                    await self._async_space.wait_for(
+                        lambda: len(self._pending) < self._queue_size
+                    )
+            else:
+                self._pending.popitem(last=False)
+                self._dropped += 1
+                if self._metrics is not None:
+                    self._metrics.increase(
+                        "tardis_plugin_notifications_dropped_total", self._labels
+                    )
+                if not self._overflowing:
+                    self._overflowing = True
+                    logger.warning(
+                        f"Notification queue of {self._plugin_name} is full,"
+                        " dropping the oldest notifications"
+                    )
+        # resource attributes are modified by the drone in the meantime
+        self._pending[key] = (
+            state,
+            AttributeDict(resource_attributes),
+            asyncio.get_running_loop().time(),
+        )
+        self._report_queue_depth()
+        # ensure there is a worker to deliver the notifications
+        if self._dispatch_task is None:
+            self._dispatch_task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Deliver notifications to the plugin until none is pending"""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                _, (state, resource_attributes, queued) = self._pending.popitem(
+                    last=False
+                )
+                self._report_queue_depth()
+                if self._policy == "block":
+                    async with self._async_space:
+                        self._async_space.notify()
+                await self._deliver(state, resource_attributes)
+                self._record_latency(loop.time() - queued)
+        finally:
+            self._dispatch_task = None
+            self._overflowing = False
+
+    async def _deliver(self, state: State, resource_attributes: AttributeDict):
+        try:
+            await asyncio.wait_for(
+                self._plugin.notify(state, resource_attributes), self._timeout
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            self._report_failure("timeout")
+            logger.warning(
+                f"Notification of {self._plugin_name} about drone"
+                f" {resource_attributes.drone_uuid} timed out after {self._timeout}s"
+            )
+        except Exception as err:
+            self._failures += 1
+            self._report_failure("error")
+            logger.warning(
+                f"Notification of {self._plugin_name} about drone"
+                f" {resource_attributes.drone_uuid} failed: {err!r}"
+            )
+
+    async def run(self) -> None:
+        """Deliver the pending notifications once TARDIS shuts down"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        except asyncio.CancelledError:
+            await self._drain_on_shutdown()
+            raise
+
+    async def _drain_on_shutdown(self) -> None:
+        drained = asyncio.ensure_future(
+            asyncio.wait_for(self.drain(), self._shutdown_timeout)
+        )
+        # the runner keeps cancelling its tasks until they are done
+        while not drained.done():
+            try:
+                await asyncio.shield(drained)
+            except asyncio.CancelledError:
+                continue
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Dropping {len(self._pending)} notifications of"
+                    f" {self._plugin_name} not delivered within"
+                    f" {self._shutdown_timeout}s on shutdown"
+                )
+
+    async def drain(self) -> None:
+        """Wait until all pending notifications have been delivered"""
+        while self._dispatch_task is not None:
+            await asyncio.shield(self._dispatch_task)
+
+    def _record_latency(self, latency: float) -> None:
+        self._latency_last = latency
+        self._latency_mean += self.latency_smoothing * (latency - self._latency_mean)
+        self._latency_max = max(self._latency_max, latency)
+        if self._metrics is not None:
+            self._metrics.observe(
+                "tardis_plugin_notification_latency_seconds", self._labels, latency
+            )
+
+    def _report_queue_depth(self) -> None:
+        queue_depth = len(self._pending)
+        if self._metrics is not None and queue_depth != self._reported_queue_depth:
+            self._metrics.adjust(
+                "tardis_plugin_notifications_queued",
+                self._labels,
+                queue_depth - self._reported_queue_depth,
+            )
+            self._reported_queue_depth = queue_depth
+
+    def _report_failure(self, reason: str) -> None:
+        if self._metrics is not None:
+            self._metrics.increase(
+                "tardis_plugin_notification_failures_total",
+                {**self._labels, "reason": reason},
+            )
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """
+        Current state of the dispatcher
+
+        Contains the number of notifications waiting for delivery
+        (``queue_depth``), the number of notifications ``dropped`` due to a full
+        queue, the number of notifications ``coalesced`` with a later one of the
+        same drone, the number of ``timeouts`` and ``failures`` of the
+        plugin as well as the latency in seconds between queueing and delivering
+        a notification. The latency is given for the most recent notification
+        (``latency_last``), as moving average (``latency_mean``) and as maximum
+        observed so far (``latency_max``).
+        """
+        return AttributeDict(
+            queue_depth=len(self._pending),
+            dropped=self._dropped,
+            coalesced=self._coalesced,
+            timeouts=self._timeouts,
+            failures=self._failures,
+            latency_last=self._latency_last,
+            latency_mean=self._latency_mean,
+            latency_max=self._latency_max,
+        )
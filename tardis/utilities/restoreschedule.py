@@ -0,0 +1,80 @@
+from .attributedict import AttributeDict
+
+from typing import Optional
+import logging
+import random
+import time
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.restoreschedule")
+
+
+class RestoreSchedule(object):
+    """
+    Spread the start of drones restored after a restart over time
+
+    :param wave_size: how many drones start per wave
+    :param wave_interval: time in seconds between two waves
+
+    Drones restored from a previous run of TARDIS would otherwise all start
+    their first state run at the same instant, flooding the batch system and
+    the sites with status queries right after a restart. Instead, the
+    :py:class:`~.RestoreSchedule` assigns a start delay to each restored drone,
+    so that ``wave_size`` drones start per ``wave_interval``. The start within
+    each wave is randomly spread over the ``wave_interval``.
+
+    The number of ``scheduled`` and ``restored`` drones as well as the time
+    from the restart until all restored drones completed their first state
+    run are available via :py:attr:`~.statistics`.
+    """
+
+    def __init__(self, wave_size: int = 100, wave_interval: float = 1.0):
+        self._wave_size = wave_size
+        self._wave_interval = wave_interval
+        self._verify_settings()
+        self._started = time.monotonic()
+        self._scheduled = 0
+        self._restored = 0
+        self._duration: Optional[float] = None
+
+    def _verify_settings(self):
+        if not isinstance(self._wave_size, int) or self._wave_size <= 0:
+            raise ValueError(
+                f"expected 'wave_size' > 0, got {self._wave_size!r} instead"
+            )
+        if self._wave_interval < 0:
+            raise ValueError(
+                f"expected 'wave_interval' >= 0, got {self._wave_interval!r} instead"
+            )
+
+    def start_delay(self) -> float:
+        """Schedule the start of a restored drone and return its delay in seconds"""
+        wave = self._scheduled // self._wave_size
+        self._scheduled += 1
+        self._duration = None
+        return (wave + random.random()) * self._wave_interval
+
+    def restored(self) -> None:
+        """Record that a restored drone has completed its first state run"""
+        self._restored += 1
+        if self._restored == self._scheduled:
+            self._duration = time.monotonic() - self._started
+            logger.info(
+                f"Restored {self._restored} drones {self._duration:.1f}s after"
+                " the restart"
+            )
+
+    @property
+    def statistics(self) -> AttributeDict:
+        """
+        Current state of the restore
+
+        Contains the number of drones ``scheduled`` to restore, the number of
+        drones ``restored`` so far and the ``duration`` in seconds from the
+        restart until all of them were restored or :py:data:`None` if the
+        restore is still ongoing.
+        """
+        return AttributeDict(
+            scheduled=self._scheduled,
+            restored=self._restored,
+            duration=self._duration,
+        )
@@ -7,15 +7,17 @@ from tardis.adapters.batchsystems.htcondor import (
     htcondor_get_collectors,
     htcondor_get_collector_start_dates,
 )
+from tardis.interfaces.batchsystemadapter import MachineSnapshot
 from tardis.interfaces.batchsystemadapter import MachineStatus
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.exceptions.executorexceptions import CommandExecutionTimeout
 from tardis.utilities.attributedict import AttributeDict
 
 from datetime import datetime
 from functools import partial
 from shlex import quote
 from types import MappingProxyType
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
 
 import logging
@@ -233,6 +235,9 @@ class TestHTCondorAdapter(TestCase):
                 stderr="Does not exists",
                 stdout="Does not exists",
             ),  # test exit code 1: HTCondor can't connect to StartD of Drone
+            CommandExecutionTimeout(
+                message="Timed out", timeout=60
+            ),  # test timeout, drone is drained again later on
             CommandExecutionFailure(
                 message="Unhandled error",
                 exit_code=2,
@@ -270,6 +275,13 @@ class TestHTCondorAdapter(TestCase):
 
         self.mock_executor.reset_mock()
 
+        with self.assertLogs(level=logging.WARNING):
+            self.assertIsNone(
+                run_async(self.htcondor_adapter.drain_machine, drone_uuid="test")
+            )
+
+        self.mock_executor.reset_mock()
+
         with self.assertRaises(CommandExecutionFailure):
             with self.assertLogs(level=logging.CRITICAL):
                 self.assertIsNone(
@@ -672,6 +684,83 @@ class TestHTCondorAdapter(TestCase):
         )
         self.mock_executor.return_value.run_command.assert_called_with(self.command)
 
+    @mock_executor_run_command_new(
+        [
+            AttributeDict(
+                stdout=CONDOR_COLLECTOR_STATUS_RETURN, stderr="", exit_code=0
+            ),  # call in htcondor_get_collectors
+            AttributeDict(
+                stdout=CONDOR_MASTER_STATUS_RETURN, stderr="", exit_code=0
+            ),  # call in htcondor_get_collector_start_dates
+            AttributeDict(
+                stdout=CONDOR_STATUS_RETURN, stderr="", exit_code=0
+            ),  # call in htcondor_status_updater
+        ]
+    )
+    def test_get_machine_snapshot(self):
+        snapshot_mapping = {
+            "test": MachineSnapshot(
+                MachineStatus.Available, self.cpu_ratio, self.memory_ratio
+            ),
+            "test_drain": MachineSnapshot(
+                MachineStatus.Draining, self.cpu_ratio, self.memory_ratio
+            ),
+            "test_drained": MachineSnapshot(
+                MachineStatus.Drained, self.cpu_ratio, self.memory_ratio
+            ),
+            "test_owner": MachineSnapshot(
+                MachineStatus.NotAvailable, self.cpu_ratio, self.memory_ratio
+            ),
+            "test_undefined": MachineSnapshot(MachineStatus.Available, 0.0, 0.0),
+            "test_error": MachineSnapshot(MachineStatus.Available, 0.0, 0.0),
+            "not_exists": MachineSnapshot(MachineStatus.NotAvailable, 0.0, 0.0),
+        }
+
+        for drone_uuid, snapshot in snapshot_mapping.items():
+            with self.subTest(drone_uuid=drone_uuid):
+                self.assertEqual(
+                    run_async(
+                        self.htcondor_adapter.get_machine_snapshot,
+                        drone_uuid=drone_uuid,
+                    ),
+                    snapshot,
+                )
+        self.mock_executor.return_value.run_command.assert_called_with(self.command)
+
+        # snapshots are derived only once per update of the status cache
+        snapshots = self.htcondor_adapter._machine_snapshots
+        run_async(self.htcondor_adapter.get_machine_snapshot, drone_uuid="test")
+        self.assertIs(self.htcondor_adapter._machine_snapshots, snapshots)
+
+    def test_subscribe_status_changes(self):
+        callback = MagicMock()
+        with patch.object(
+            self.htcondor_adapter._htcondor_status, "subscribe"
+        ) as subscribe:
+            self.htcondor_adapter.subscribe_status_changes(callback)
+            subscribe.assert_called_once_with(callback)
+
+    def test_status_changes(self):
+        changes = []
+        self.htcondor_adapter.subscribe_status_changes(changes.append)
+        htcondor_status = self.htcondor_adapter._htcondor_status
+        old_data = {
+            "test": dict(State="Claimed", Activity="Busy", cpu_ratio="0.5"),
+        }
+
+        # changes of the ratios do not wake up the drone
+        htcondor_status._data = {
+            "test": dict(State="Claimed", Activity="Busy", cpu_ratio="1.0"),
+        }
+        htcondor_status._publish_changes(old_data)
+        self.assertEqual(changes, [])
+
+        htcondor_status._data = {
+            "test": dict(State="Claimed", Activity="Retiring", cpu_ratio="0.5"),
+        }
+        htcondor_status._publish_changes(old_data)
+        self.assertEqual(changes, [{"test"}])
+
     def test_machine_meta_data_translation_mapping(self):
         self.assertEqual(
             AttributeDict(Cores=1, Memory=1024, Disk=1024 * 1024),
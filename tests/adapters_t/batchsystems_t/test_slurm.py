@@ -1,18 +1,21 @@
 import logging
 
 from tests.utilities.utilities import run_async
+from tests.utilities.utilities import async_return
 from tests.utilities.utilities import mock_executor_run_command
 from tardis.adapters.batchsystems.slurm import SlurmAdapter
 from tardis.utilities.attributedict import AttributeDict
 
 from tardis.adapters.batchsystems.slurm import slurm_status_updater
+from tardis.interfaces.batchsystemadapter import MachineSnapshot
 from tardis.interfaces.batchsystemadapter import MachineStatus
 
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.exceptions.executorexceptions import CommandExecutionTimeout
 
 from functools import partial
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
 
 SINFO_RETURN = """\
@@ -90,6 +93,20 @@ class TestSlurmAdapter(TestCase):
             run_async(self.slurm_adapter.drain_machine, drone_uuid="not_exists")
         )
 
+    @mock_executor_run_command(stdout=SINFO_RETURN)
+    def test_drain_machine_timeout(self):
+        self.mock_executor.return_value.run_command.side_effect = [
+            async_return(
+                return_value=AttributeDict(stdout=SINFO_RETURN, stderr="", exit_code=0)
+            ),
+            CommandExecutionTimeout(message="Timed out", timeout=60),
+        ]
+        # the drone is drained again later on instead of crashing
+        with self.assertLogs(level=logging.WARNING):
+            self.assertIsNone(
+                run_async(self.slurm_adapter.drain_machine, drone_uuid="VM-1")
+            )
+
     @mock_executor_run_command(
         stdout="",
         raise_exception=CommandExecutionFailure(
@@ -218,6 +235,81 @@ class TestSlurmAdapter(TestCase):
             0.0,
         )
 
+    @mock_executor_run_command(stdout=SINFO_RETURN)
+    def test_get_machine_snapshot(self):
+        snapshot_mapping = {
+            "VM-1": MachineSnapshot(
+                MachineStatus.Available, self.cpu_ratio, self.memory_ratio
+            ),
+            "draining_m": MachineSnapshot(MachineStatus.Draining, 17803 / 22011, 0.0),
+            "not_exists": MachineSnapshot(MachineStatus.NotAvailable, 0.0, 0.0),
+        }
+
+        for drone_uuid, snapshot in snapshot_mapping.items():
+            with self.subTest(drone_uuid=drone_uuid):
+                self.assertEqual(
+                    run_async(
+                        self.slurm_adapter.get_machine_snapshot, drone_uuid=drone_uuid
+                    ),
+                    snapshot,
+                )
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            self.command
+        )
+
+        # snapshots are derived only once per update of the status cache
+        snapshots = self.slurm_adapter._machine_snapshots
+        run_async(self.slurm_adapter.get_machine_snapshot, drone_uuid="VM-1")
+        self.assertIs(self.slurm_adapter._machine_snapshots, snapshots)
+
+    @mock_executor_run_command(
+        stdout=SINFO_RETURN
+        + "\nidle       0/0/0/0   0       0       no_cpu_m   no_cpu_m"
+        + "\nidle       0/4/0/4   0       0       no_mem_m   no_mem_m"
+    )
+    def test_get_machine_snapshot_without_capacity(self):
+        """Test that nodes without CPUs or memory do not spoil the snapshots"""
+        snapshot_mapping = {
+            "VM-1": MachineSnapshot(
+                MachineStatus.Available, self.cpu_ratio, self.memory_ratio
+            ),
+            "no_cpu_m": MachineSnapshot(MachineStatus.Available, 0.0, 0.0),
+            "no_mem_m": MachineSnapshot(MachineStatus.Available, 0.0, 0.0),
+        }
+
+        for drone_uuid, snapshot in snapshot_mapping.items():
+            with self.subTest(drone_uuid=drone_uuid):
+                self.assertEqual(
+                    run_async(
+                        self.slurm_adapter.get_machine_snapshot, drone_uuid=drone_uuid
+                    ),
+                    snapshot,
+                )
+        self.assertEqual(
+            run_async(self.slurm_adapter.get_allocation, drone_uuid="no_cpu_m"), 0.0
+        )
+
+    def test_subscribe_status_changes(self):
+        callback = MagicMock()
+        with patch.object(self.slurm_adapter._slurm_status, "subscribe") as subscribe:
+            self.slurm_adapter.subscribe_status_changes(callback)
+            subscribe.assert_called_once_with(callback)
+
+    def test_status_changes(self):
+        changes = []
+        self.slurm_adapter.subscribe_status_changes(changes.append)
+        slurm_status = self.slurm_adapter._slurm_status
+        old_data = {"VM-1": dict(State="mixed", CPUs=[2.0, 2.0, 0.0, 4.0])}
+
+        # changes of the resource usage do not wake up the drone
+        slurm_status._data = {"VM-1": dict(State="mixed", CPUs=[3.0, 1.0, 0.0, 4.0])}
+        slurm_status._publish_changes(old_data)
+        self.assertEqual(changes, [])
+
+        slurm_status._data = {"VM-1": dict(State="draining", CPUs=[2.0, 2.0, 0.0, 4.0])}
+        slurm_status._publish_changes(old_data)
+        self.assertEqual(changes, [{"VM-1"}])
+
     def test_machine_meta_data_translation(self):
         self.assertEqual(
             AttributeDict(Cores=1, Memory=1000, Disk=1000),
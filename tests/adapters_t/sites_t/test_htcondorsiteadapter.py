@@ -1,6 +1,6 @@
 from tardis.adapters.sites.htcondor import HTCondorAdapter
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
-from tardis.exceptions.tardisexceptions import TardisError
+from tardis.exceptions.tardisexceptions import TardisError, TardisTimeout
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.interfaces.siteadapter import ResourceStatus
 from tardis.utilities.attributedict import AttributeDict
@@ -469,6 +469,7 @@ class TestHTCondorSiteAdapter(TestCase):
 
         matrix = [
             (Exception, TardisError),
+            (TimeoutError, TardisTimeout),
             (TardisResourceStatusUpdateFailed, TardisResourceStatusUpdateFailed),
         ]
 
@@ -1,5 +1,6 @@
 from tardis.adapters.sites.moab import MoabAdapter
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.exceptions.executorexceptions import CommandExecutionTimeout
 from tardis.exceptions.tardisexceptions import TardisError
 from tardis.exceptions.tardisexceptions import TardisTimeout
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
@@ -402,6 +403,8 @@ class TestMoabAdapter(TestCase):
 
         matrix = [
             (asyncio.TimeoutError(), TardisTimeout),
+            (TimeoutError(), TardisTimeout),
+            (CommandExecutionTimeout(message="Test", timeout=60), TardisTimeout),
             (
                 asyncssh.Error(code=255, reason="Test", lang="Test"),
                 TardisResourceStatusUpdateFailed,
@@ -3,6 +3,7 @@ from tardis.exceptions.tardisexceptions import TardisError
 from tardis.exceptions.tardisexceptions import TardisTimeout
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.exceptions.executorexceptions import CommandExecutionTimeout
 from tardis.interfaces.siteadapter import ResourceStatus
 from tardis.utilities.attributedict import AttributeDict
 from tests.utilities.utilities import mock_executor_run_command, run_async
@@ -463,6 +464,8 @@ class TestSlurmAdapter(TestCase):
 
         matrix = [
             (asyncio.TimeoutError(), TardisTimeout),
+            (TimeoutError(), TardisTimeout),
+            (CommandExecutionTimeout(message="Test", timeout=60), TardisTimeout),
             (
                 CommandExecutionFailure(
                     message="Test", exit_code=255, stdout="Test", stderr="Test"
@@ -38,11 +38,23 @@ class TestBatchSystemAgent(TestCase):
         run_async(self.batch_system_agent.get_machine_status, drone_uuid="test")
         self.batch_system_adapter.get_machine_status.assert_called_with("test")
 
+    def test_get_machine_snapshot(self):
+        self.batch_system_adapter.get_machine_snapshot.side_effect = async_return
+        run_async(self.batch_system_agent.get_machine_snapshot, drone_uuid="test")
+        self.batch_system_adapter.get_machine_snapshot.assert_called_with("test")
+
     def test_get_utilisation(self):
         self.batch_system_adapter.get_utilisation.side_effect = async_return
         run_async(self.batch_system_agent.get_utilisation, drone_uuid="test")
         self.batch_system_adapter.get_utilisation.assert_called_with("test")
 
+    def test_subscribe_status_changes(self):
+        def callback(changed):
+            pass
+
+        self.batch_system_agent.subscribe_status_changes(callback)
+        self.batch_system_adapter.subscribe_status_changes.assert_called_with(callback)
+
     def test_machine_meta_data_translation_mapping(self):
         machine_meta_data_translation_mock = PropertyMock(
             return_value=AttributeDict(Cores=1, Memory=1024, Disk=1024)
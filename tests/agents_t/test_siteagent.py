@@ -28,6 +28,27 @@ class TestSiteAgent(TestCase):
         self.assertEqual(self.site_agent.drone_heartbeat_interval(), 60)
         self.site_adapter.drone_heartbeat_interval.assert_called_with()
 
+    def test_drone_heartbeat_backoff(self):
+        self.site_adapter.drone_heartbeat_backoff.return_value = 1
+        self.assertEqual(self.site_agent.drone_heartbeat_backoff(), 1)
+        self.site_adapter.drone_heartbeat_backoff.assert_called_with()
+
+    def test_drone_heartbeat_max_interval(self):
+        self.site_adapter.drone_heartbeat_max_interval.return_value = 600
+        self.assertEqual(self.site_agent.drone_heartbeat_max_interval(), 600)
+        self.site_adapter.drone_heartbeat_max_interval.assert_called_with()
+
+    def test_drone_heartbeat_jitter(self):
+        self.site_adapter.drone_heartbeat_jitter.return_value = 0
+        self.assertEqual(self.site_agent.drone_heartbeat_jitter(), 0)
+        self.site_adapter.drone_heartbeat_jitter.assert_called_with()
+
+    def test_drone_state_heartbeat_intervals(self):
+        self.site_adapter.drone_state_heartbeat_intervals = {"BootingState": 30}
+        self.assertEqual(
+            self.site_agent.drone_state_heartbeat_intervals, {"BootingState": 30}
+        )
+
     def test_drone_minimum_lifetime(self):
         self.site_adapter.drone_minimum_lifetime.return_value = None
         self.assertIsNone(self.site_agent.drone_minimum_lifetime())
@@ -1,6 +1,8 @@
 from tardis.interfaces.batchsystemadapter import BatchSystemAdapter
+from tardis.interfaces.batchsystemadapter import MachineSnapshot
+from tardis.interfaces.batchsystemadapter import MachineStatus
 
-from tests.utilities.utilities import run_async
+from tests.utilities.utilities import async_return, run_async
 
 from unittest import TestCase
 from unittest.mock import patch
@@ -31,10 +33,31 @@ class TestBatchSystemAdapter(TestCase):
         with self.assertRaises(NotImplementedError):
             run_async(self.batch_system_adapter.get_machine_status, "test-123")
 
+    def test_get_machine_snapshot(self):
+        with patch.multiple(
+            self.batch_system_adapter,
+            get_machine_status=lambda drone_uuid: async_return(
+                return_value=MachineStatus.Available
+            ),
+            get_allocation=lambda drone_uuid: async_return(return_value=0.75),
+            get_utilisation=lambda drone_uuid: async_return(return_value=0.25),
+        ):
+            self.assertEqual(
+                run_async(self.batch_system_adapter.get_machine_snapshot, "test-123"),
+                MachineSnapshot(
+                    status=MachineStatus.Available, allocation=0.75, utilisation=0.25
+                ),
+            )
+
     def test_get_utilisation(self):
         with self.assertRaises(NotImplementedError):
             run_async(self.batch_system_adapter.get_utilisation, "test-123")
 
+    def test_subscribe_status_changes(self):
+        self.assertIsNone(
+            self.batch_system_adapter.subscribe_status_changes(lambda changed: None)
+        )
+
     def test_machine_meta_data_translation_mapping(self):
         with self.assertRaises(NotImplementedError):
             self.batch_system_adapter.machine_meta_data_translation_mapping
@@ -96,6 +96,132 @@ class TestSiteAdapter(TestCase):
             # noinspection PyStatementEffect
             self.site_adapter.drone_heartbeat_interval
 
+    def test_drone_heartbeat_backoff(self):
+        self.assertEqual(self.site_adapter.drone_heartbeat_backoff, 1)
+
+        # lru_cache needs to be cleared before manipulating site configuration
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_backoff"] = 1.5
+        self.assertEqual(self.site_adapter.drone_heartbeat_backoff, 1.5)
+
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_backoff"] = 0.5
+        with self.assertRaises(ValidationError):
+            # noinspection PyStatementEffect
+            self.site_adapter.drone_heartbeat_backoff
+
+    def test_drone_heartbeat_max_interval(self):
+        self.assertEqual(self.site_adapter.drone_heartbeat_max_interval, 600)
+
+        # lru_cache needs to be cleared before manipulating site configuration
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_max_interval"] = 3600
+        self.assertEqual(self.site_adapter.drone_heartbeat_max_interval, 3600)
+
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_max_interval"] = -1
+        with self.assertRaises(ValidationError):
+            # noinspection PyStatementEffect
+            self.site_adapter.drone_heartbeat_max_interval
+
+    def test_drone_heartbeat_jitter(self):
+        self.assertEqual(self.site_adapter.drone_heartbeat_jitter, 0)
+
+        # lru_cache needs to be cleared before manipulating site configuration
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_jitter"] = 2.5
+        self.assertEqual(self.site_adapter.drone_heartbeat_jitter, 2.5)
+
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_jitter"] = -1
+        with self.assertRaises(ValidationError):
+            # noinspection PyStatementEffect
+            self.site_adapter.drone_heartbeat_jitter
+
+    def test_drone_state_heartbeat_intervals(self):
+        def clear_caches():
+            # noinspection PyUnresolvedReferences
+            SiteAdapter.site_configuration.fget.cache_clear()
+            self.site_adapter.__dict__.pop("drone_state_heartbeat_intervals", None)
+
+        self.assertEqual(self.site_adapter.drone_state_heartbeat_intervals, {})
+
+        # caches need to be cleared before manipulating site configuration
+        clear_caches()
+
+        self.config.Sites[0]["drone_state_heartbeat_intervals"] = {
+            "BootingState": 300,
+            "DrainingState": 30,
+        }
+        self.assertEqual(
+            self.site_adapter.drone_state_heartbeat_intervals,
+            {"BootingState": 300, "DrainingState": 30},
+        )
+
+        clear_caches()
+        self.config.TestSite["MachineTypeHeartbeatIntervals"] = AttributeDict(
+            TestMachineType=AttributeDict(BootingState=600)
+        )
+        self.assertEqual(
+            self.site_adapter.drone_state_heartbeat_intervals,
+            {"BootingState": 600, "DrainingState": 30},
+        )
+
+        clear_caches()
+        self.config.TestSite["MachineTypeHeartbeatIntervals"] = AttributeDict(
+            TestMachineType=AttributeDict(BootingState=-1)
+        )
+        with self.assertRaises(ValidationError):
+            # noinspection PyStatementEffect
+            self.site_adapter.drone_state_heartbeat_intervals
+
+        clear_caches()
+
+        self.config.Sites[0]["drone_state_heartbeat_intervals"] = {"BootingState": -1}
+        with self.assertRaises(ValidationError):
+            # noinspection PyStatementEffect
+            self.site_adapter.drone_state_heartbeat_intervals
+
+    def test_drone_state_heartbeat_intervals_cached(self):
+        self.config.Sites[0]["drone_state_heartbeat_intervals"] = {"BootingState": 30}
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        heartbeat_intervals = self.site_adapter.drone_state_heartbeat_intervals
+        self.assertIs(
+            heartbeat_intervals, self.site_adapter.drone_state_heartbeat_intervals
+        )
+        with self.assertRaises(TypeError):
+            heartbeat_intervals["BootingState"] = 60
+
+        # the cache is bound to the site adapter instance
+        with patch.multiple(SiteAdapter, __abstractmethods__=set()):
+            other_site_adapter = SiteAdapter()
+        other_site_adapter._site_name = "TestSite"
+        other_site_adapter._machine_type = "TestMachineType"
+        self.config.TestSite["MachineTypeHeartbeatIntervals"] = AttributeDict(
+            TestMachineType=AttributeDict(BootingState=600)
+        )
+        self.assertEqual(
+            other_site_adapter.drone_state_heartbeat_intervals, {"BootingState": 600}
+        )
+        self.assertEqual(heartbeat_intervals, {"BootingState": 30})
+
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
     def test_drone_minimum_lifetime(self):
         self.assertEqual(self.site_adapter.drone_minimum_lifetime, None)
 
@@ -216,6 +342,10 @@ class TestSiteAdapter(TestCase):
                 quota=1,
                 drone_minimum_lifetime=None,
                 drone_heartbeat_interval=60,
+                drone_heartbeat_jitter=0,
+                drone_state_heartbeat_intervals={},
+                drone_heartbeat_backoff=1,
+                drone_heartbeat_max_interval=600,
             ),
         )
 
@@ -232,6 +362,10 @@ class TestSiteAdapter(TestCase):
                 quota=inf,
                 drone_minimum_lifetime=None,
                 drone_heartbeat_interval=60,
+                drone_heartbeat_jitter=0,
+                drone_state_heartbeat_intervals={},
+                drone_heartbeat_backoff=1,
+                drone_heartbeat_max_interval=600,
             ),
         )
 
@@ -249,6 +383,10 @@ class TestSiteAdapter(TestCase):
                     quota=inf,
                     drone_minimum_lifetime=None,
                     drone_heartbeat_interval=60,
+                    drone_heartbeat_jitter=0,
+                    drone_state_heartbeat_intervals={},
+                    drone_heartbeat_backoff=1,
+                    drone_heartbeat_max_interval=600,
                 ),
             )
 
@@ -1,7 +1,8 @@
 import logging
 
 from tardis.resources.dronestates import BootingState
-from tardis.resources.dronestates import RequestState, DownState
+from tardis.resources.dronestates import DrainState, RequestState, DownState
+from tardis.resources.dronestates import IntegrateState
 from tardis.interfaces.state import State
 from tardis.plugins.sqliteregistry import (
     SqliteRegistry,
@@ -15,9 +16,11 @@ from unittest import TestCase
 from unittest.mock import patch
 from unittest.mock import Mock
 
+import asyncio
 import datetime
 import os
 import sqlite3
+import threading
 
 
 class TestSqliteRegistry(TestCase):
@@ -28,7 +31,13 @@ class TestSqliteRegistry(TestCase):
         cls.test_site_name = "MyGreatTestSite"
         cls.other_test_site_name = "MyOtherTestSite"
         cls.test_machine_type = "MyGreatTestMachineType"
-        cls.tables_in_db = {"MachineTypes", "Resources", "ResourceStates", "Sites"}
+        cls.tables_in_db = {
+            "DrainRequests",
+            "MachineTypes",
+            "Resources",
+            "ResourceStates",
+            "Sites",
+        }
         cls.test_resource_attributes = {
             "remote_resource_uuid": None,
             "drone_uuid": f"{cls.test_site_name}-07af52405e",
@@ -93,10 +102,17 @@ class TestSqliteRegistry(TestCase):
 
         config = self.mock_config.return_value
         config.Plugins.SqliteRegistry.db_file = self.test_db
+        config.Plugins.SqliteRegistry.write_behind = None
+        config.Plugins.SqliteRegistry.history = None
         config.Sites = [AttributeDict(name=self.test_site_name)]
         getattr(config, self.test_site_name).MachineTypes = [self.test_machine_type]
 
         self.registry = SqliteRegistry()
+        SqliteRegistry._drain_requests.clear()
+        SqliteRegistry._stored_drain_requests.clear()
+
+    def tearDown(self):
+        self.registry.close()
 
     def execute_db_query(self, sql_query):
         with sqlite3.connect(self.test_db) as connection:
@@ -194,6 +210,177 @@ class TestSqliteRegistry(TestCase):
         }
         self.assertEqual(created_tables, self.tables_in_db)
 
+    def test_persistent_connection(self):
+        self.registry.add_site(self.test_site_name)
+        self.assertEqual(
+            run_async(self.registry.async_execute, "SELECT site_name FROM Sites", {}),
+            [{"site_name": self.test_site_name}],
+        )
+        connection = self.registry._connection
+        self.assertIsNotNone(connection)
+        self.assertEqual(
+            run_async(self.registry.async_execute, "SELECT site_name FROM Sites", {}),
+            [{"site_name": self.test_site_name}],
+        )
+        self.assertIs(self.registry._connection, connection)
+
+        self.registry.close()
+        self.assertIsNone(self.registry._connection)
+        # the connection is re-opened on demand
+        self.assertEqual(
+            run_async(self.registry.async_execute, "SELECT site_name FROM Sites", {}),
+            [{"site_name": self.test_site_name}],
+        )
+
+    def test_execute(self):
+        """Test that synchronous queries do not depend on the thread pool"""
+        self.registry.add_site(self.test_site_name)
+        expected = [{"site_name": self.test_site_name}]
+        sql_query = "SELECT site_name FROM Sites"
+
+        # not queued behind work of the thread pool
+        release = threading.Event()
+        blocking = self.registry.thread_pool_executor.submit(release.wait, 5)
+        try:
+            self.assertEqual(self.registry.execute(sql_query, {}), expected)
+        finally:
+            release.set()
+            blocking.result()
+
+        # no deadlock if called from the thread of the thread pool
+        self.assertEqual(
+            self.registry.thread_pool_executor.submit(
+                self.registry.execute, sql_query, {}
+            ).result(timeout=5),
+            expected,
+        )
+
+    def test_cached_ids(self):
+        self.assertEqual(len(self.registry._state_ids), len(State.get_all_states()))
+        # sites and machine types of the configuration are added at startup
+        site_id = self.registry._site_ids[self.test_site_name]
+        self.assertEqual(
+            self.registry._machine_type_ids,
+            {(self.test_site_name, self.test_machine_type): 1},
+        )
+        # the ids are refreshed as soon as sites or machine types are added
+        self.registry.add_site(self.other_test_site_name)
+        self.registry.add_machine_types(
+            self.other_test_site_name, self.test_machine_type
+        )
+        self.assertIn(self.other_test_site_name, self.registry._site_ids)
+        self.assertEqual(
+            self.registry._machine_type_ids[
+                self.other_test_site_name, self.test_machine_type
+            ],
+            2,
+        )
+        self.assertEqual(
+            self.registry._bind_ids(
+                {"state": "BootingState", **self.test_resource_attributes}
+            ),
+            {
+                "state": "BootingState",
+                **self.test_resource_attributes,
+                "state_id": self.registry._state_ids["BootingState"],
+                "site_id": site_id,
+                "machine_type_id": 1,
+            },
+        )
+
+        # state changes of drones of unknown sites are skipped
+        with self.assertLogs(level=logging.WARNING):
+            run_async(
+                self.registry.notify,
+                RequestState(),
+                {**self.test_resource_attributes, "site_name": "UnknownSite"},
+            )
+        self.assertEqual(self.execute_db_query("SELECT * FROM Resources"), [])
+
+    def test_versions(self):
+        resources_version = self.registry.resources_version
+        types_version = self.registry.types_version
+        # the versions are shared by all registries
+        other_registry = SqliteRegistry()
+
+        self.registry.add_site(self.other_test_site_name)
+        self.registry.add_site(self.other_test_site_name)
+        self.assertEqual(other_registry.types_version, types_version + 1)
+        self.registry.add_machine_types(
+            self.other_test_site_name, self.test_machine_type
+        )
+        self.assertEqual(other_registry.types_version, types_version + 2)
+
+        for state in (RequestState(), BootingState(), DownState()):
+            run_async(self.registry.notify, state, self.test_resource_attributes)
+        self.assertEqual(other_registry.resources_version, resources_version + 3)
+        # skipped state changes do not change the resources
+        with self.assertLogs(level=logging.WARNING):
+            run_async(
+                self.registry.notify,
+                RequestState(),
+                {**self.test_resource_attributes, "site_name": "UnknownSite"},
+            )
+        self.assertEqual(self.registry.resources_version, resources_version + 3)
+        other_registry.close()
+
+    def test_state_changes(self):
+        async def check_state_changes():
+            subscription = self.registry.state_changes.subscribe()
+            await self.registry.notify(RequestState(), self.test_resource_attributes)
+            await self.registry.notify(
+                BootingState(), self.test_updated_resource_attributes
+            )
+            subscription.close()
+            self.assertEqual(
+                [(await subscription.get())[1] for _ in range(2)],
+                [
+                    {"state": "RequestState", **self.test_resource_attributes},
+                    {"state": "BootingState", **self.test_updated_resource_attributes},
+                ],
+            )
+
+        run_async(check_state_changes)
+
+    def test_statistics(self):
+        drone_uuid = self.test_resource_attributes["drone_uuid"]
+        run_async(self.registry.notify, RequestState(), self.test_resource_attributes)
+        self.registry.report_usage(drone_uuid, 1.0, 0.5, 0.25)
+        statistics = self.registry.statistics()
+        self.assertEqual(
+            (statistics.drones, statistics.states, statistics.supply),
+            (1, {"RequestState": 1}, 1.0),
+        )
+
+        # drones are restored from the database by new registries
+        other_registry = SqliteRegistry()
+        statistics = other_registry.statistics()
+        self.assertEqual(
+            (statistics.drones, statistics.sites, statistics.supply),
+            (1, {self.test_site_name: 1}, 0.0),
+        )
+        other_registry.close()
+
+        run_async(
+            self.registry.notify, BootingState(), self.test_updated_resource_attributes
+        )
+        statistics = self.registry.statistics(dwell_times=True)
+        self.assertEqual(statistics.states, {"BootingState": 1})
+        self.assertEqual(statistics.dwell_times["RequestState"].count, 1)
+
+    def test_shared(self):
+        SqliteRegistry._shared = None
+        registry = SqliteRegistry()
+        self.assertIs(SqliteRegistry.shared(), registry)
+        # later registries do not replace the shared one
+        other_registry = SqliteRegistry()
+        self.assertIs(other_registry.shared(), registry)
+        other_registry.close()
+        self.assertIs(SqliteRegistry.shared(), registry)
+        # closed registries are not shared anymore
+        registry.close()
+        self.assertIsNone(SqliteRegistry.shared())
+
     def test_double_schema_deployment(self):
         SqliteRegistry()
         SqliteRegistry()
@@ -233,6 +420,36 @@ class TestSqliteRegistry(TestCase):
             [self.test_get_resources_result],
         )
 
+    def test_get_all_resources(self):
+        self.registry.add_site(self.other_test_site_name)
+        self.registry.add_machine_types(
+            self.other_test_site_name, self.test_machine_type
+        )
+        run_async(self.registry.notify, RequestState(), self.test_resource_attributes)
+        other_resource_attributes = {
+            **self.test_resource_attributes,
+            "drone_uuid": f"{self.other_test_site_name}-045285abef1",
+            "site_name": self.other_test_site_name,
+        }
+        run_async(self.registry.notify, RequestState(), other_resource_attributes)
+
+        self.assertListEqual(
+            self.registry.get_all_resources(),
+            [
+                {
+                    **self.test_get_resources_result,
+                    "site_name": self.test_site_name,
+                    "machine_type": self.test_machine_type,
+                },
+                {
+                    **self.test_get_resources_result,
+                    "drone_uuid": other_resource_attributes["drone_uuid"],
+                    "site_name": self.other_test_site_name,
+                    "machine_type": self.test_machine_type,
+                },
+            ],
+        )
+
     @patch("tardis.plugins.sqliteregistry.logging", Mock())
     def test_notify(self):
         # Database has to be queried multiple times
@@ -274,6 +491,263 @@ class TestSqliteRegistry(TestCase):
 
         self.assertListEqual([], fetch_all())
 
+    def test_drain_requests(self):
+        drone_uuid = self.test_resource_attributes["drone_uuid"]
+        self.registry.add_site(self.test_site_name)
+        self.registry.add_machine_types(self.test_site_name, self.test_machine_type)
+        run_async(self.registry.notify, RequestState(), self.test_resource_attributes)
+
+        self.assertFalse(self.registry.drain_requested(drone_uuid))
+        # drain requests are shared among all registries, e.g. the REST API's one
+        SqliteRegistry().add_drain_request(drone_uuid)
+        self.assertTrue(self.registry.drain_requested(drone_uuid))
+
+        # the request persists until the drone starts draining
+        run_async(self.registry.notify, BootingState(), self.test_resource_attributes)
+        self.assertTrue(self.registry.drain_requested(drone_uuid))
+        run_async(self.registry.notify, DrainState(), self.test_resource_attributes)
+        self.assertFalse(self.registry.drain_requested(drone_uuid))
+
+        self.registry.add_drain_request(drone_uuid)
+        run_async(self.registry.notify, DownState(), self.test_resource_attributes)
+        self.assertFalse(self.registry.drain_requested(drone_uuid))
+
+        # delayed requests take effect later on
+        with patch("tardis.plugins.sqliteregistry.time") as mock_time:
+            mock_time.monotonic.return_value = 100.0
+            self.registry.add_drain_request(drone_uuid, delay=10)
+            self.assertFalse(self.registry.drain_requested(drone_uuid))
+            mock_time.monotonic.return_value = 110.0
+            self.assertTrue(self.registry.drain_requested(drone_uuid))
+
+        # stored requests survive a restart until the drone starts draining
+        run_async(
+            self.registry.async_execute_transaction,
+            lambda connection: self.registry.store_drain_requests(
+                connection, {drone_uuid: 3600}
+            ),
+        )
+        self.registry.add_drain_request(drone_uuid, delay=3600)
+        SqliteRegistry._drain_requests.clear()
+        SqliteRegistry._stored_drain_requests.clear()
+        restarted_registry = SqliteRegistry()
+        self.assertIn(drone_uuid, SqliteRegistry._drain_requests)
+        self.assertFalse(restarted_registry.drain_requested(drone_uuid))
+        run_async(self.registry.notify, DrainState(), self.test_resource_attributes)
+        self.assertEqual(self.execute_db_query("SELECT * FROM DrainRequests"), [])
+        restarted_registry.close()
+
+    def fetch_states(self):
+        return self.execute_db_query(
+            sql_query="""SELECT R.drone_uuid, RS.state FROM Resources R
+            JOIN ResourceStates RS ON R.state_id = RS.state_id
+            ORDER BY R.drone_uuid"""
+        )
+
+    @patch("tardis.plugins.sqliteregistry.atexit")
+    def test_write_behind(self, mock_atexit):
+        config = self.mock_config.return_value
+        config.Plugins.SqliteRegistry.write_behind = AttributeDict(
+            flush_interval=0.05, flush_size=3
+        )
+        self.registry.close()
+        self.registry = SqliteRegistry()
+        mock_atexit.register.assert_called_once_with(self.registry._flush_at_exit)
+
+        def attributes(index):
+            return {
+                **self.test_resource_attributes,
+                "drone_uuid": f"{self.test_site_name}-{index}",
+            }
+
+        async def check_write_behind():
+            await self.registry.notify(RequestState(), attributes(0))
+            await self.registry.notify(BootingState(), attributes(0))
+            await self.registry.notify(RequestState(), attributes(1))
+            # changes of a drone never written cancel out
+            await self.registry.notify(DownState(), attributes(1))
+            self.assertEqual(self.fetch_states(), [])
+            resources_version = self.registry.resources_version
+            # written after the flush_interval as a single insert
+            await asyncio.sleep(0.1)
+            self.assertEqual(self.registry.resources_version, resources_version + 1)
+            self.assertEqual(
+                self.fetch_states(), [(f"{self.test_site_name}-0", "BootingState")]
+            )
+
+            # written as soon as flush_size drones have changed
+            for index in range(1, 4):
+                await self.registry.notify(RequestState(), attributes(index))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(self.fetch_states()), 4)
+
+            await self.registry.notify(DownState(), attributes(0))
+            await self.registry.notify(IntegrateState(), attributes(1))
+            await self.registry.flush()
+            self.assertEqual(
+                self.fetch_states(),
+                [
+                    (f"{self.test_site_name}-1", "IntegrateState"),
+                    (f"{self.test_site_name}-2", "RequestState"),
+                    (f"{self.test_site_name}-3", "RequestState"),
+                ],
+            )
+
+            # pending changes are written at exit without the executor
+            await self.registry.notify(IntegrateState(), attributes(2))
+            self.registry._flush_at_exit()
+            self.assertEqual(
+                self.fetch_states()[1], (f"{self.test_site_name}-2", "IntegrateState")
+            )
+
+            # rejected changes do not affect the other ones
+            with self.assertLogs(level=logging.WARNING):
+                await self.registry.notify(RequestState(), attributes(3))
+                await self.registry.notify(RequestState(), attributes(4))
+                await self.registry.flush()
+            self.assertEqual(len(self.fetch_states()), 4)
+
+        run_async(check_write_behind)
+
+    def test_history(self):
+        config = self.mock_config.return_value
+        config.Plugins.SqliteRegistry.history = AttributeDict(retention=3600)
+        self.registry.close()
+        self.registry = SqliteRegistry()
+
+        def change_state(drone, state, minutes):
+            run_async(
+                self.registry.notify,
+                state,
+                {
+                    **self.test_resource_attributes,
+                    "drone_uuid": f"{self.test_site_name}-{drone}",
+                    "updated": datetime.datetime(2018, 11, 16, 10) + minutes,
+                },
+            )
+
+        minute = datetime.timedelta(minutes=1)
+        change_state("a", RequestState(), 0 * minute)
+        change_state("a", BootingState(), 0.5 * minute)
+        change_state("a", IntegrateState(), 1.5 * minute)
+        change_state("a", DownState(), 30 * minute)
+        change_state("b", RequestState(), 10 * minute)
+        change_state("b", BootingState(), 65 * minute)
+
+        self.assertEqual(
+            [
+                row["state"]
+                for row in run_async(
+                    self.registry.get_history, f"{self.test_site_name}-a"
+                )
+            ],
+            ["RequestState", "BootingState", "IntegrateState", "DownState"],
+        )
+
+        def hourly(hour, state, entries, stays, total_duration, max_duration):
+            return {
+                "hour": datetime.datetime(2018, 11, 16, hour),
+                "site_name": self.test_site_name,
+                "machine_type": self.test_machine_type,
+                "state": state,
+                "entries": entries,
+                "stays": stays,
+                "total_duration": total_duration,
+                "max_duration": max_duration,
+            }
+
+        run_async(self.registry.compact_history)
+        self.assertEqual(
+            run_async(self.registry.get_hourly_history),
+            [
+                hourly(10, "BootingState", 1, 1, 60, 60),
+                hourly(10, "DownState", 1, 0, 0, None),
+                hourly(10, "IntegrateState", 1, 1, 1710, 1710),
+                hourly(10, "RequestState", 2, 2, 3330, 3300),
+            ],
+        )
+        # the stay in the current state of a drone is not yet completed
+        self.assertEqual(
+            run_async(self.registry.get_history, f"{self.test_site_name}-a"), []
+        )
+        self.assertEqual(
+            run_async(self.registry.get_history, f"{self.test_site_name}-b"),
+            [
+                {
+                    "state": "BootingState",
+                    "entered": datetime.datetime(2018, 11, 16, 11, 5),
+                }
+            ],
+        )
+
+        change_state("b", DownState(), 70 * minute)
+        run_async(self.registry.compact_history)
+        self.assertEqual(
+            run_async(self.registry.get_hourly_history)[-2:],
+            [
+                hourly(11, "BootingState", 1, 1, 300, 300),
+                hourly(11, "DownState", 1, 0, 0, None),
+            ],
+        )
+        self.assertEqual(self.execute_db_query("SELECT * FROM StateHistory"), [])
+
+    @patch("tardis.plugins.sqliteregistry.atexit")
+    def test_history_write_behind(self, mock_atexit):
+        config = self.mock_config.return_value
+        config.Plugins.SqliteRegistry.history = AttributeDict(
+            retention=0, compaction_interval=60
+        )
+        config.Plugins.SqliteRegistry.write_behind = AttributeDict()
+        self.registry.close()
+        self.registry = SqliteRegistry()
+        drone_uuid = self.test_resource_attributes["drone_uuid"]
+
+        async def check_history():
+            await self.registry.notify(RequestState(), self.test_resource_attributes)
+            await self.registry.notify(BootingState(), self.test_resource_attributes)
+            await self.registry.flush()
+            # state changes are coalesced, but not in the history
+            self.assertEqual(self.fetch_states(), [(drone_uuid, "BootingState")])
+            self.assertEqual(
+                [row["state"] for row in await self.registry.get_history(drone_uuid)],
+                ["RequestState", "BootingState"],
+            )
+
+            # the history is compacted every compaction_interval
+            self.assertIsNone(self.registry._compaction_task)
+            self.registry._next_compaction = 0
+            await self.registry.notify(DownState(), self.test_resource_attributes)
+            await self.registry.flush()
+            await self.registry._compaction_task
+            self.assertEqual(await self.registry.get_history(drone_uuid), [])
+            self.assertEqual(len(await self.registry.get_hourly_history()), 3)
+
+        run_async(check_history)
+
+    def test_history_sanity_checks(self):
+        config = self.mock_config.return_value
+        for wrong_settings in (
+            AttributeDict(retention=-1),
+            AttributeDict(compaction_interval=0),
+        ):
+            with self.subTest(history=wrong_settings):
+                config.Plugins.SqliteRegistry.history = wrong_settings
+                with self.assertRaises(ValueError):
+                    SqliteRegistry()
+
+    def test_write_behind_sanity_checks(self):
+        config = self.mock_config.return_value
+        for wrong_settings in (
+            AttributeDict(flush_interval=0),
+            AttributeDict(flush_size=0),
+            AttributeDict(flush_size=1.5),
+        ):
+            with self.subTest(write_behind=wrong_settings):
+                config.Plugins.SqliteRegistry.write_behind = wrong_settings
+                with self.assertRaises(ValueError):
+                    SqliteRegistry()
+
     def test_insert_resources(self):
         # Database has to be queried multiple times
         # Define inline function to re-use code
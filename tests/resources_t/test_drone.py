@@ -11,7 +11,10 @@ from tardis.resources.drone import Drone
 from tardis.resources.dronestates import DrainState, DownState, RequestState
 from tardis.plugins.sqliteregistry import SqliteRegistry
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.heartbeatscheduler import HeartbeatScheduler
+from tardis.utilities.restoreschedule import RestoreSchedule
 
+from contextlib import asynccontextmanager, nullcontext
 from logging import DEBUG
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
@@ -40,6 +43,10 @@ class TestDrone(TestCase):
         self.mock_site_agent.machine_meta_data = AttributeDict(Cores=8)
         self.mock_site_agent.drone_minimum_lifetime = None
         self.mock_site_agent.drone_heartbeat_interval = 60
+        self.mock_site_agent.drone_heartbeat_jitter = 0
+        self.mock_site_agent.drone_heartbeat_backoff = 1
+        self.mock_site_agent.drone_heartbeat_max_interval = 600
+        self.mock_site_agent.drone_state_heartbeat_intervals = {}
         self.mock_plugin = MagicMock(spec=Plugin)()
         self.mock_plugin.notify.return_value = async_return()
         self.drone = Drone(
@@ -84,6 +91,39 @@ class TestDrone(TestCase):
         del self.drone.resource_attributes.drone_uuid
         self.assertIsNone(run_async(self.drone.database_state))
 
+    def test_drain_requested(self):
+        self.assertFalse(self.drone.drain_requested)
+
+        sql_registry = MagicMock(spec=SqliteRegistry)
+        sql_registry.drain_requested.return_value = True
+        self.drone.register_plugins(sql_registry)
+        self.drone.__dict__.pop("_database")  # reset cached_property's cache
+
+        self.assertTrue(self.drone.drain_requested)
+        sql_registry.drain_requested.assert_called_once_with(
+            self.drone.resource_attributes.drone_uuid
+        )
+
+    def test_report_usage(self):
+        sql_registry = MagicMock(spec=SqliteRegistry)
+        self.drone.register_plugins(sql_registry)
+        self.drone.__dict__.pop("_database", None)  # reset cached_property's cache
+        self.drone._heartbeat_scheduler = MagicMock(spec=HeartbeatScheduler)
+        self.drone.heartbeat_scheduler.heartbeat.side_effect = (
+            lambda *args, **kwargs: nullcontext()
+        )
+        mocked_down_state = MagicMock(spec=DownState)
+        mocked_down_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_down_state)
+
+        run_async(self.drone.run)
+        sql_registry.report_usage.assert_called_once_with(
+            self.drone.resource_attributes.drone_uuid,
+            self.drone.supply,
+            self.drone.allocation,
+            self.drone.utilisation,
+        )
+
     def test_demand(self):
         self.assertEqual(self.drone.demand, 8)
         self.drone.demand = 0
@@ -94,6 +134,53 @@ class TestDrone(TestCase):
         self.mock_site_agent.drone_heartbeat_interval = 10
         self.assertEqual(self.drone.heartbeat_interval, 10)
 
+        self.drone._state = DrainState()
+        self.mock_site_agent.drone_state_heartbeat_intervals = {"DrainState": 30}
+        self.assertEqual(self.drone.heartbeat_interval, 30)
+        self.drone._state = DownState()
+        self.assertEqual(self.drone.heartbeat_interval, 10)
+
+    def test_heartbeat_backoff(self):
+        self.mock_site_agent.drone_heartbeat_interval = 10
+        self.mock_site_agent.drone_heartbeat_backoff = 2
+        self.mock_site_agent.drone_heartbeat_max_interval = 60
+        self.drone._state = DrainState()
+
+        intervals = []
+        for _ in range(5):
+            self.drone._back_off_heartbeat()
+            intervals.append(self.drone.heartbeat_interval)
+        self.assertEqual(intervals, [20, 40, 60, 60, 60])
+
+        # a state transition resets the backoff
+        run_async(self.drone.set_state, DownState())
+        self.assertEqual(self.drone.heartbeat_interval, 10)
+
+        # intervals above the maximum are not shortened
+        self.mock_site_agent.drone_state_heartbeat_intervals = {"DownState": 120}
+        self.drone._back_off_heartbeat()
+        self.assertEqual(self.drone.heartbeat_interval, 120)
+
+        # a heartbeat interval of zero is not stretched
+        self.mock_site_agent.drone_state_heartbeat_intervals = {"DownState": 0}
+        self.drone._back_off_heartbeat()
+        self.assertEqual(self.drone.heartbeat_interval, 0)
+
+    def test_heartbeat_jitter(self):
+        self.assertEqual(self.drone.heartbeat_jitter, 0)
+        self.mock_site_agent.drone_heartbeat_jitter = 5
+        self.assertEqual(self.drone.heartbeat_jitter, 5)
+
+    def test_heartbeat_scheduler(self):
+        self.assertIsInstance(self.drone.heartbeat_scheduler, HeartbeatScheduler)
+        heartbeat_scheduler = HeartbeatScheduler()
+        drone = Drone(
+            site_agent=self.mock_site_agent,
+            batch_system_agent=self.mock_batch_system_agent,
+            heartbeat_scheduler=heartbeat_scheduler,
+        )
+        self.assertIs(drone.heartbeat_scheduler, heartbeat_scheduler)
+
     def test_life_time(self):
         self.assertIsNone(self.drone.minimum_lifetime, None)
         self.mock_site_agent.drone_minimum_lifetime = 3600
@@ -135,9 +222,17 @@ class TestDrone(TestCase):
             self.drone.resource_attributes.resource_status, ResourceStatus.Booting
         )
 
-    @patch("tardis.resources.drone.asyncio.sleep")
-    def test_run(self, mocked_asyncio_sleep):
-        mocked_asyncio_sleep.side_effect = async_return
+    def test_run(self):
+        heartbeat_delays = []
+
+        @asynccontextmanager
+        async def mocked_heartbeat(delay, jitter, wake_keys):
+            self.assertEqual(wake_keys, (self.drone.resource_attributes.drone_uuid,))
+            heartbeat_delays.append((delay, jitter))
+            yield
+
+        self.drone._heartbeat_scheduler = MagicMock(spec=HeartbeatScheduler)
+        self.drone.heartbeat_scheduler.heartbeat.side_effect = mocked_heartbeat
         mocked_down_state = MagicMock(spec=DownState)
         mocked_down_state.run.return_value = async_return()
 
@@ -150,13 +245,12 @@ class TestDrone(TestCase):
         run_async(self.drone.set_state, mocked_state)
         self.drone.demand = 8
         self.mock_site_agent.drone_heartbeat_interval = 10
+        self.mock_site_agent.drone_heartbeat_jitter = 2
         with self.assertLogs(level=DEBUG):
             run_async(self.drone.run)
 
-        # duration skipped via asyncio.sleep
-        # use the `sum` to avoid `asyncio.sleep(0)` context switches to skew the result
-        mock_elapsed = sum(args[0] for args, _ in mocked_asyncio_sleep.call_args_list)
-        self.assertEqual(mock_elapsed, self.mock_site_agent.drone_heartbeat_interval)
+        # first state run is immediate, the next one after the heartbeat interval
+        self.assertEqual(heartbeat_delays, [(0, 2), (10, 2)])
 
         self.assertIsInstance(self.drone.state, DownState)
         self.assertEqual(self.drone.demand, 0)
@@ -164,6 +258,32 @@ class TestDrone(TestCase):
         mocked_state.run.assert_called_once()
         mocked_down_state.run.assert_called_once()
 
+    def test_run_restored(self):
+        heartbeat_delays = []
+
+        @asynccontextmanager
+        async def mocked_heartbeat(delay, jitter, wake_keys):
+            heartbeat_delays.append(delay)
+            yield
+
+        restore_schedule = MagicMock(spec=RestoreSchedule)
+        restore_schedule.start_delay.return_value = 5
+        drone = Drone(
+            site_agent=self.mock_site_agent,
+            batch_system_agent=self.mock_batch_system_agent,
+            state=DownState(),
+            heartbeat_scheduler=MagicMock(spec=HeartbeatScheduler),
+            restore_schedule=restore_schedule,
+        )
+        drone.heartbeat_scheduler.heartbeat.side_effect = mocked_heartbeat
+        with patch.object(DownState, "run", return_value=async_return()):
+            with self.assertLogs(level=DEBUG):
+                run_async(drone.run)
+
+        # the first state run of a restored drone is delayed
+        self.assertEqual(heartbeat_delays, [5])
+        restore_schedule.restored.assert_called_once_with()
+
     def test_register_plugins(self):
         self.assertEqual(self.drone._plugins, [])
         self.drone.register_plugins(self.mock_plugin)
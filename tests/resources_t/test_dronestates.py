@@ -3,6 +3,7 @@ from tardis.exceptions.tardisexceptions import TardisDroneCrashed
 from tardis.exceptions.tardisexceptions import TardisTimeout
 from tardis.exceptions.tardisexceptions import TardisQuotaExceeded
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
+from tardis.interfaces.batchsystemadapter import MachineSnapshot
 from tardis.interfaces.batchsystemadapter import MachineStatus
 from tardis.interfaces.siteadapter import ResourceStatus
 from tardis.resources.dronestates import RequestState
@@ -87,6 +88,9 @@ class TestDroneStates(TestCase):
         self.drone.batch_system_agent.get_utilisation.return_value = async_return(
             return_value=None
         )
+        self.drone.batch_system_agent.get_machine_snapshot.return_value = async_return(
+            return_value=None
+        )
 
     def run_the_matrix(self, matrix, initial_state):
         for resource_status, machine_status, new_state in matrix:
@@ -96,6 +100,13 @@ class TestDroneStates(TestCase):
             self.drone.batch_system_agent.get_machine_status.return_value = (
                 async_return(return_value=machine_status)
             )
+            self.drone.batch_system_agent.get_machine_snapshot.return_value = (
+                async_return(
+                    return_value=MachineSnapshot(
+                        status=machine_status, allocation=1.0, utilisation=0.5
+                    )
+                )
+            )
             self.drone.state.return_value = initial_state
             with self.assertLogs(None, level="DEBUG"):
                 run_async(self.drone.state.return_value.run, self.drone)
@@ -112,6 +123,30 @@ class TestDroneStates(TestCase):
 
         api_call_to_test.side_effect = None
 
+    def test_state_singletons(self):
+        self.assertIs(AvailableState(), AvailableState())
+        self.assertIsNot(AvailableState(), DrainingState())
+
+    def test_compiled_transitions(self):
+        transition_table = AvailableState._transition_table
+        self.assertIs(transition_table[ResourceStatus.Deleted], DownState())
+        self.assertIs(
+            transition_table[ResourceStatus.Running][MachineStatus.Draining],
+            DrainingState(),
+        )
+        # each state resolves all entries of its declarative transition table
+        for state in (BootingState, IntegratingState, DrainingState, CleanupState):
+            self.assertEqual(state._transition_table.keys(), state.transition.keys())
+
+    def test_machine_status_not_required(self):
+        self.drone.batch_system_agent.get_machine_status.reset_mock()
+        self.drone.site_agent.resource_status.return_value = async_return(
+            return_value=AttributeDict(resource_status=ResourceStatus.Deleted)
+        )
+        run_async(IntegratingState().run, self.drone)
+        self.assertIsInstance(self.drone.state, DownState)
+        self.drone.batch_system_agent.get_machine_status.assert_not_called()
+
     def test_request_state(self):
         self.drone.state.return_value = RequestState()
         run_async(self.drone.state.return_value.run, self.drone)
@@ -195,7 +230,7 @@ class TestDroneStates(TestCase):
         self.run_the_matrix(matrix, initial_state=IntegratingState)
 
     def test_available_state(self):
-        self.drone.database_state.return_value = async_return()
+        self.drone.drain_requested = False
 
         matrix = [
             (ResourceStatus.Running, MachineStatus.Available, AvailableState),
@@ -211,6 +246,23 @@ class TestDroneStates(TestCase):
 
         self.run_the_matrix(matrix, initial_state=AvailableState)
 
+        # Test that allocation and utilisation are taken from the same snapshot
+        self.drone.batch_system_agent.get_allocation.reset_mock()
+        self.drone.batch_system_agent.get_utilisation.reset_mock()
+        self.drone.site_agent.resource_status.return_value = async_return(
+            return_value=AttributeDict(resource_status=ResourceStatus.Running)
+        )
+        self.drone.batch_system_agent.get_machine_snapshot.return_value = async_return(
+            return_value=MachineSnapshot(MachineStatus.Available, 0.75, 0.25)
+        )
+        self.drone.state.return_value = AvailableState()
+        run_async(self.drone.state.return_value.run, self.drone)
+        self.assertIsInstance(self.drone.state, AvailableState)
+        self.assertEqual(self.drone._allocation, 0.75)
+        self.assertEqual(self.drone._utilisation, 0.25)
+        self.drone.batch_system_agent.get_allocation.assert_not_called()
+        self.drone.batch_system_agent.get_utilisation.assert_not_called()
+
         # Test draining procedure if cobald sets drone demand to zero
         self.drone.demand = 0.0
         self.drone.state.return_value = AvailableState()
@@ -225,8 +277,8 @@ class TestDroneStates(TestCase):
         run_async(self.drone.state.return_value.run, self.drone)
         self.assertIsInstance(self.drone.state, DrainState)
 
-        # Test remote draining procedure via REST service and database
-        self.drone.database_state.return_value = async_return(return_value=DrainState)
+        # Test remote draining procedure via REST service
+        self.drone.drain_requested = True
         self.drone.state.return_value = AvailableState()
         run_async(self.drone.state.return_value.run, self.drone)
         self.assertIsInstance(self.drone.state, DrainState)
@@ -1,13 +1,20 @@
-from tardis.resources.dronestates import RequestState
+from tardis.interfaces.plugin import Plugin
+from tardis.resources.dronestates import BootingState, RequestState
 from tardis.resources.poolfactory import create_composite_pool
 from tardis.resources.poolfactory import create_drone
+from tardis.resources.poolfactory import create_heartbeat_scheduler
+from tardis.resources.poolfactory import create_restore_schedule
 from tardis.resources.poolfactory import get_drones_to_restore
 from tardis.resources.poolfactory import load_plugins
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.plugindispatcher import PluginDispatcher
+from tests.utilities.utilities import run_async
 
 from unittest import TestCase
 from unittest.mock import ANY, MagicMock, call, patch
 
+import asyncio
+
 
 class TestPoolFactory(TestCase):
     mock_config_patcher = None
@@ -40,8 +47,21 @@ class TestPoolFactory(TestCase):
             SqliteRegistry=AttributeDict(db_file="test.db")
         )
         self.config.BatchSystem = AttributeDict(adapter="TestBatchSystem")
+        self.config.HeartbeatScheduler = AttributeDict(max_concurrent=10)
+        self.config.RestoreSchedule = AttributeDict(wave_size=50, wave_interval=2)
         sqlite_registry = self.mock_sqliteregistry.return_value
-        sqlite_registry.get_resources.return_value = [{"state": "RequestState"}]
+        sqlite_registry.get_all_resources.return_value = [
+            {
+                "state": "RequestState",
+                "site_name": "TestSite",
+                "machine_type": "TestMachineType",
+            },
+            {
+                "state": "BootingState",
+                "site_name": "TestSite",
+                "machine_type": "OtherMachineType",
+            },
+        ]
 
     @patch("tardis.resources.poolfactory.FactoryPool")
     @patch("tardis.resources.poolfactory.Logger")
@@ -80,6 +100,7 @@ class TestPoolFactory(TestCase):
         machine_type = getattr(self.config, site_name).MachineTypes[0]
 
         mock_batch_system_adapter.TestBatchSystemAdapter.assert_called_with()
+        mock_batch_system_adapter.TestBatchSystemAdapter().subscribe_status_changes.assert_called_once()  # noqa B950
         mock_site_adapter.TestSiteAdapter.assert_called_with(
             machine_type=machine_type, site_name=site_name
         )
@@ -130,30 +151,103 @@ class TestPoolFactory(TestCase):
                     state=None,
                     created=None,
                     updated=None,
+                    heartbeat_scheduler=None,
+                    restore_schedule=None,
                 )
             ],
         )
 
+    @patch("tardis.resources.poolfactory.HeartbeatScheduler")
+    def test_create_heartbeat_scheduler(self, mock_heartbeat_scheduler):
+        self.assertEqual(
+            create_heartbeat_scheduler(), mock_heartbeat_scheduler.return_value
+        )
+        mock_heartbeat_scheduler.assert_called_with(max_concurrent=10)
+
+        del self.config.HeartbeatScheduler
+        create_heartbeat_scheduler()
+        mock_heartbeat_scheduler.assert_called_with()
+
+    @patch("tardis.resources.poolfactory.RestoreSchedule")
+    def test_create_restore_schedule(self, mock_restore_schedule):
+        self.assertEqual(create_restore_schedule(), mock_restore_schedule.return_value)
+        mock_restore_schedule.assert_called_with(wave_size=50, wave_interval=2)
+
+        del self.config.RestoreSchedule
+        create_restore_schedule()
+        mock_restore_schedule.assert_called_with()
+
     def test_load_plugins(self):
         self.assertEqual(load_plugins(), {"SqliteRegistry": self.mock_sqliteregistry()})
 
+        with patch(
+            "tardis.plugins.prometheusmonitoring.PrometheusMonitoring"
+        ) as mock_prometheus_monitoring:
+            self.config.Plugins.PrometheusMonitoring = AttributeDict(
+                addr="127.0.0.1",
+                port=8080,
+                dispatch=AttributeDict(queue_size=10, policy="coalesce"),
+            )
+            plugins = load_plugins()
+            self.assertEqual(plugins["SqliteRegistry"], self.mock_sqliteregistry())
+            self.assertIsInstance(plugins["PrometheusMonitoring"], PluginDispatcher)
+            self.assertEqual(
+                plugins["PrometheusMonitoring"].plugin, mock_prometheus_monitoring()
+            )
+            self.assertEqual(plugins["PrometheusMonitoring"]._queue_size, 10)
+            self.assertEqual(plugins["PrometheusMonitoring"]._policy, "coalesce")
+            del self.config.Plugins.PrometheusMonitoring
+
         self.mock_config.side_effect = AttributeError
         self.assertEqual(load_plugins(), {})
         self.mock_config.side_effect = None
 
+    def test_load_plugins_without_dispatch(self):
+        class RecordingPlugin(Plugin):
+            def __init__(self):
+                self.notifications = []
+
+            async def notify(self, state, resource_attributes):
+                await asyncio.sleep(0)
+                self.notifications.append(resource_attributes.drone_uuid)
+
+        async def notify_all(dispatcher, drone_uuids):
+            for drone_uuid in drone_uuids:
+                await dispatcher.notify(
+                    BootingState(), AttributeDict(drone_uuid=drone_uuid)
+                )
+            await dispatcher.drain()
+
+        with patch(
+            "tardis.plugins.prometheusmonitoring.PrometheusMonitoring",
+            RecordingPlugin,
+        ):
+            self.config.Plugins.PrometheusMonitoring = AttributeDict(
+                addr="127.0.0.1", port=8080
+            )
+            dispatcher = load_plugins()["PrometheusMonitoring"]
+            del self.config.Plugins.PrometheusMonitoring
+
+        # a plugin without dispatch configuration never loses a notification,
+        # even if the notifications exceed the queue
+        drone_uuids = [f"test-{index}" for index in range(2500)]
+        run_async(notify_all, dispatcher, drone_uuids)
+        self.assertEqual(dispatcher.plugin.notifications, drone_uuids)
+        self.assertEqual(dispatcher.statistics.dropped, 0)
+
     def test_get_drones_to_restore(self):
-        self.assertEqual(
-            get_drones_to_restore(
-                plugins={}, site=self.config.Sites[0], machine_type="TestMachineType"
-            ),
-            [],
-        )
+        self.assertEqual(get_drones_to_restore(plugins={}), {})
 
-        self.assertIsInstance(
-            get_drones_to_restore(
-                plugins={"SqliteRegistry": self.mock_sqliteregistry()},
-                site=self.config.Sites[0],
-                machine_type="TestMachineType",
-            )[0]["state"],
-            RequestState,
+        sqlite_registry = self.mock_sqliteregistry()
+        drones_to_restore = get_drones_to_restore(
+            plugins={"SqliteRegistry": sqlite_registry}
+        )
+        # all resources are loaded at once
+        sqlite_registry.get_all_resources.assert_called_once_with()
+        self.assertEqual(
+            drones_to_restore,
+            {
+                ("TestSite", "TestMachineType"): [{"state": RequestState()}],
+                ("TestSite", "OtherMachineType"): [{"state": BootingState()}],
+            },
         )
@@ -1,9 +1,15 @@
 from tardis.rest.app import crud
 from tardis.plugins.sqliteregistry import SqliteRegistry
+from tardis.resources.dronestates import DrainState
+from tardis.utilities.attributedict import AttributeDict
 from tests.utilities.utilities import run_async
 
+from datetime import datetime
+from tempfile import TemporaryDirectory
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+import os
 
 
 class TestCRUD(TestCase):
@@ -98,11 +104,209 @@ class TestCRUD(TestCase):
 
         self.sql_registry_mock.async_execute.assert_called_with(
             """
-    SELECT R.remote_resource_uuid , RS.state, R.drone_uuid, S.site_name,
-    MT.machine_type, R.created, R.updated
+    SELECT R.remote_resource_uuid, RS.state, R.drone_uuid, S.site_name, MT.machine_type, R.created, R.updated
     FROM Resources R
     JOIN ResourceStates RS ON R.state_id = RS.state_id
     JOIN Sites S ON R.site_id = S.site_id
-    JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id""",
+    JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id
+    ORDER BY R.drone_uuid""",
             {},
         )
+
+        run_async(
+            crud.get_resources,
+            sql_registry=self.sql_registry_mock,
+            site_name="Test",
+            machine_type="m1.test",
+            state="AvailableState",
+            updated_since=datetime(2021, 10, 8, 12, 42),
+            after="test-0125bc9fd8",
+            limit=10,
+            fields=["state"],
+        )
+
+        self.sql_registry_mock.async_execute.assert_called_with(
+            """
+    SELECT R.drone_uuid, RS.state
+    FROM Resources R
+    JOIN ResourceStates RS ON R.state_id = RS.state_id
+    JOIN Sites S ON R.site_id = S.site_id
+    JOIN MachineTypes MT ON R.machine_type_id = MT.machine_type_id
+    WHERE S.site_name = :site_name AND MT.machine_type = :machine_type AND RS.state = :state AND R.updated >= :updated_since AND R.drone_uuid > :after
+    ORDER BY R.drone_uuid LIMIT :limit""",  # noqa B950
+            {
+                "site_name": "Test",
+                "machine_type": "m1.test",
+                "state": "AvailableState",
+                "updated_since": datetime(2021, 10, 8, 12, 42),
+                "after": "test-0125bc9fd8",
+                "limit": 10,
+            },
+        )
+
+
+class TestSetStatesToDraining(TestCase):
+    mock_config_patcher = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_config_patcher = patch("tardis.plugins.sqliteregistry.Configuration")
+        cls.mock_config = cls.mock_config_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_config_patcher.stop()
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        config = self.mock_config.return_value
+        config.Plugins.SqliteRegistry.db_file = os.path.join(
+            self.test_dir.name, "test.db"
+        )
+        config.Plugins.SqliteRegistry.write_behind = None
+        config.Plugins.SqliteRegistry.history = None
+        config.Sites = [AttributeDict(name="Test")]
+        config.Test.MachineTypes = ["m1.test", "m1.other"]
+        self.clear_drain_requests()
+        self.sql_registry = SqliteRegistry()
+
+        self.drone_uuids = [f"test-{index:010d}" for index in range(4)]
+        for drone_uuid, machine_type in zip(
+            self.drone_uuids, ("m1.test", "m1.test", "m1.test", "m1.other")
+        ):
+            run_async(
+                self.sql_registry.insert_resource,
+                dict(
+                    remote_resource_uuid=None,
+                    drone_uuid=drone_uuid,
+                    state="AvailableState",
+                    site_name="Test",
+                    machine_type=machine_type,
+                    created=datetime(2021, 10, 8, 12, 0),
+                    updated=datetime(2021, 10, 8, 12, 0),
+                ),
+            )
+
+    def tearDown(self):
+        self.sql_registry.close()
+        self.clear_drain_requests()
+        self.test_dir.cleanup()
+
+    @staticmethod
+    def clear_drain_requests():
+        SqliteRegistry._drain_requests.clear()
+        SqliteRegistry._stored_drain_requests.clear()
+
+    def states(self):
+        return {
+            row["drone_uuid"]: row["state"]
+            for row in run_async(crud.get_resources, self.sql_registry)
+        }
+
+    def test_set_state_to_draining(self):
+        self.assertTrue(
+            run_async(
+                crud.set_state_to_draining,
+                sql_registry=self.sql_registry,
+                drone_uuid=self.drone_uuids[0],
+            )
+        )
+        self.assertEqual(self.states()[self.drone_uuids[0]], "DrainState")
+        # drones learn about the request without querying the database
+        self.assertTrue(self.sql_registry.drain_requested(self.drone_uuids[0]))
+
+    def test_set_state_to_draining_unknown(self):
+        self.assertFalse(
+            run_async(
+                crud.set_state_to_draining,
+                sql_registry=self.sql_registry,
+                drone_uuid="test-unknown0000",
+            )
+        )
+        # requests for unknown drones would never be withdrawn
+        self.assertEqual(SqliteRegistry._drain_requests, {})
+        self.assertEqual(set(self.states().values()), {"AvailableState"})
+
+    def test_set_states_to_draining(self):
+        unknown = [f"test-unknown-{index}" for index in range(2000)]
+        self.assertEqual(
+            run_async(
+                crud.set_states_to_draining,
+                sql_registry=self.sql_registry,
+                drone_uuids=[*self.drone_uuids, *unknown],
+                machine_type="m1.test",
+                state="AvailableState",
+                created_before=datetime(2021, 10, 8, 12, 42),
+                rate=0.1,
+            ),
+            [
+                {"drone_uuid": self.drone_uuids[0], "result": "draining", "delay": 0},
+                {"drone_uuid": self.drone_uuids[1], "result": "draining", "delay": 10},
+                {"drone_uuid": self.drone_uuids[2], "result": "draining", "delay": 20},
+                {"drone_uuid": self.drone_uuids[3], "result": "not found"},
+                *({"drone_uuid": uuid, "result": "not found"} for uuid in unknown),
+            ],
+        )
+        # only the drone draining right away has changed its state
+        self.assertEqual(
+            self.states(),
+            {
+                self.drone_uuids[0]: "DrainState",
+                self.drone_uuids[1]: "AvailableState",
+                self.drone_uuids[2]: "AvailableState",
+                self.drone_uuids[3]: "AvailableState",
+            },
+        )
+        self.assertTrue(self.sql_registry.drain_requested(self.drone_uuids[0]))
+        self.assertFalse(self.sql_registry.drain_requested(self.drone_uuids[1]))
+
+        # delayed requests are restored after a restart, but do not take effect
+        self.sql_registry.close()
+        self.clear_drain_requests()
+        self.sql_registry = SqliteRegistry()
+        self.assertEqual(
+            set(SqliteRegistry._drain_requests), set(self.drone_uuids[1:3])
+        )
+        self.assertFalse(self.sql_registry.drain_requested(self.drone_uuids[1]))
+
+        # requests are withdrawn once the drone drains
+        run_async(
+            self.sql_registry.notify,
+            DrainState(),
+            AttributeDict(
+                remote_resource_uuid=None,
+                drone_uuid=self.drone_uuids[1],
+                site_name="Test",
+                machine_type="m1.test",
+                created=datetime(2021, 10, 8, 12, 0),
+                updated=datetime(2021, 10, 8, 12, 50),
+            ),
+        )
+        self.sql_registry.close()
+        self.clear_drain_requests()
+        self.sql_registry = SqliteRegistry()
+        self.assertEqual(set(SqliteRegistry._drain_requests), {self.drone_uuids[2]})
+
+    def test_set_states_to_draining_without_rate(self):
+        self.assertEqual(
+            run_async(
+                crud.set_states_to_draining,
+                sql_registry=self.sql_registry,
+                site_name="Test",
+            ),
+            [
+                {"drone_uuid": drone_uuid, "result": "draining", "delay": 0}
+                for drone_uuid in self.drone_uuids
+            ],
+        )
+        self.assertEqual(
+            self.states(), {drone_uuid: "DrainState" for drone_uuid in self.drone_uuids}
+        )
+        self.assertEqual(
+            run_async(
+                crud.set_states_to_draining,
+                sql_registry=self.sql_registry,
+                site_name="Unknown",
+            ),
+            [],
+        )
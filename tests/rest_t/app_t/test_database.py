@@ -1,10 +1,47 @@
-from tardis.rest.app.database import get_sql_registry
+from tardis.rest.app.database import get_sql_registry, sql_registry_lifespan
+from tests.utilities.utilities import run_async
+
+from fastapi import FastAPI
 
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 
 class TestDatabase(TestCase):
+    def setUp(self):
+        self.app = FastAPI()
+
+    def run_lifespan(self, callback):
+        async def lifespan():
+            async with sql_registry_lifespan(self.app):
+                return callback()
+
+        return run_async(lifespan)
+
+    def test_get_sql_registry(self):
+        request = MagicMock()
+        self.assertEqual(
+            run_async(get_sql_registry(), request), request.app.state.sql_registry
+        )
+
+    @patch("tardis.rest.app.database.SqliteRegistry")
+    def test_lifespan_shared_registry(self, mocked_sqlite_registry):
+        sql_registry = mocked_sqlite_registry.shared.return_value
+        self.assertIs(
+            self.run_lifespan(lambda: self.app.state.sql_registry), sql_registry
+        )
+        # the registry of the daemon is neither created nor closed by the app
+        mocked_sqlite_registry.assert_not_called()
+        sql_registry.close.assert_not_called()
+        self.assertFalse(hasattr(self.app.state, "sql_registry"))
+
     @patch("tardis.rest.app.database.SqliteRegistry")
-    def test_get_sql_registry(self, mocked_sqlite_registry):
-        self.assertEqual(get_sql_registry()(), mocked_sqlite_registry())
+    def test_lifespan_own_registry(self, mocked_sqlite_registry):
+        mocked_sqlite_registry.shared.return_value = None
+        sql_registry = mocked_sqlite_registry.return_value
+        self.assertIs(
+            self.run_lifespan(lambda: self.app.state.sql_registry), sql_registry
+        )
+        mocked_sqlite_registry.assert_called_once_with()
+        sql_registry.close.assert_called_once_with()
+        self.assertFalse(hasattr(self.app.state, "sql_registry"))
@@ -1,11 +1,13 @@
 from tardis.exceptions.tardisexceptions import TardisError
 from tardis.rest.app.security import (
+    authenticate,
     check_authentication,
     check_scope_permissions,
     get_user,
     hash_password,
 )
 from tardis.utilities.attributedict import AttributeDict
+from tests.utilities.utilities import run_async
 
 from fastapi import HTTPException, status
 
@@ -13,6 +15,8 @@ from fastapi import HTTPException, status
 from unittest import TestCase
 from unittest.mock import patch
 
+import threading
+
 
 class TestSecurity(TestCase):
     mock_config_patcher = None
@@ -90,6 +94,26 @@ class TestSecurity(TestCase):
             },
         )
 
+    def test_authenticate(self):
+        self.clear_lru_cache()
+        with patch(
+            "tardis.rest.app.security.check_authentication"
+        ) as mocked_check_authentication:
+            mocked_check_authentication.side_effect = lambda user_name, password: (
+                threading.current_thread().name
+            )
+            # passwords are checked outside the event loop
+            self.assertTrue(
+                run_async(authenticate, user_name="test", password="test").startswith(
+                    "bcrypt"
+                )
+            )
+            mocked_check_authentication.assert_called_once_with("test", "test")
+
+        with self.assertRaises(HTTPException) as he:
+            run_async(authenticate, user_name="test", password="test123")
+        self.assertEqual(he.exception.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_get_user(self):
         self.clear_lru_cache()
         self.assertEqual(
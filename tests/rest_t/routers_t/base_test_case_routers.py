@@ -33,6 +33,9 @@ class TestCaseRouters(TestCase):
         cls.mock_config_patcher.stop()
 
     def setUp(self) -> None:
+        self.sql_registry = self.mock_sqlite_registry.shared.return_value
+        self.sql_registry.resources_version = 0
+        self.sql_registry.types_version = 0
         self.config = self.mock_config.return_value
         self.config.Services.restapi.get_user.return_value = AttributeDict(
             user_name="test",
@@ -43,6 +46,11 @@ class TestCaseRouters(TestCase):
         from tardis.rest.app.main import (
             app,
         )  # has to be imported after SqliteRegistry patch
+        from tardis.rest.app.routers.types import types_cache
+
+        types_cache.clear()
+        # the lifespan of the app is not run by the ASGITransport
+        app.state.sql_registry = self.sql_registry
 
         self.client = AsyncClient(
             transport=ASGITransport(app=app), base_url="http://test"
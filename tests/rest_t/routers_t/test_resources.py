@@ -1,7 +1,15 @@
-from unittest.mock import ANY
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.eventbroadcast import EventBroadcast
 from tests.rest_t.routers_t.base_test_case_routers import TestCaseRouters
 from tests.utilities.utilities import async_return, run_async
 
+from datetime import datetime
+from unittest.mock import ANY, patch
+
+import asyncio
+import json
+import logging
+
 
 class TestResources(TestCaseRouters):
     # Reminder: When defining `setUp`, `setUpClass`, `tearDown` and `tearDownClass`
@@ -100,9 +108,187 @@ class TestResources(TestCaseRouters):
         response = run_async(self.client.get, "/resources/")
         self.assertEqual(response.status_code, 403)
 
+    def test_get_resources_filtered(self):
+        self.clear_lru_cache()
+        self.mock_crud.get_resources.reset_mock()
+        self.mock_crud.get_resources.return_value = async_return(
+            return_value=[{"drone_uuid": "test-6af3cfef14", "state": "BootingState"}]
+        )
+
+        response = run_async(
+            self.client.get,
+            "/resources/",
+            params={
+                "site_name": "Test",
+                "machine_type": "m1.test",
+                "state": "BootingState",
+                "updated_since": "2021-10-08T12:42:00",
+                "after": "test-0125bc9fd8",
+                "limit": 10,
+                "fields": ["state"],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [{"drone_uuid": "test-6af3cfef14", "state": "BootingState"}],
+        )
+        self.mock_crud.get_resources.assert_called_once_with(
+            ANY,
+            after="test-0125bc9fd8",
+            limit=10,
+            site_name="Test",
+            machine_type="m1.test",
+            state="BootingState",
+            updated_since=datetime(2021, 10, 8, 12, 42),
+            fields=["state"],
+        )
+
+        for params in ({"limit": 0}, {"fields": ["password"]}):
+            with self.subTest(params=params):
+                response = run_async(self.client.get, "/resources/", params=params)
+                self.assertEqual(response.status_code, 422)
+
+    def test_get_resources_paginated(self):
+        self.clear_lru_cache()
+        resources = [
+            {"drone_uuid": f"test-{index:010d}", "state": "AvailableState"}
+            for index in range(5)
+        ]
+
+        async def get_resources(sql_registry, after, limit, **filters):
+            start = 0 if after is None else int(after[5:]) + 1
+            return resources[start : start + limit]  # noqa: E203
+
+        self.mock_crud.get_resources.side_effect = get_resources
+
+        with patch("tardis.rest.app.routers.resources.page_size", 2):
+            response = run_async(self.client.get, "/resources/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), resources)
+
+            response = run_async(self.client.get, "/resources/", params={"limit": 3})
+            self.assertEqual(response.json(), resources[:3])
+
+            response = run_async(
+                self.client.get,
+                "/resources/",
+                headers={"Accept": "application/x-ndjson"},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+            self.assertEqual(
+                [json.loads(line) for line in response.text.splitlines()],
+                resources,
+            )
+
+        self.mock_crud.get_resources.side_effect = None
+        self.mock_crud.get_resources.return_value = async_return(return_value=[])
+        response = run_async(self.client.get, "/resources/")
+        self.assertEqual(response.json(), [])
+
+    def test_conditional_get(self):
+        self.clear_lru_cache()
+        self.mock_crud.get_resources.reset_mock()
+        self.mock_crud.get_resources.return_value = async_return(return_value=[])
+
+        response = run_async(self.client.get, "/resources/")
+        self.assertEqual(response.status_code, 200)
+        tag = response.headers["ETag"]
+
+        # the registry is not queried as long as the resources are unchanged
+        for if_none_match in (tag, f"W/{tag}", f'"other", {tag}', "*"):
+            with self.subTest(if_none_match=if_none_match):
+                response = run_async(
+                    self.client.get,
+                    "/resources/",
+                    headers={"If-None-Match": if_none_match},
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers["ETag"], tag)
+        self.mock_crud.get_resources.assert_called_once()
+
+        self.sql_registry.resources_version = 1
+        self.mock_crud.get_resources.return_value = async_return(return_value=[])
+        response = run_async(
+            self.client.get, "/resources/", headers={"If-None-Match": tag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], tag)
+
+        self.mock_crud.get_resource_state.return_value = async_return(
+            return_value=[{"drone_uuid": "test-0123456789", "state": "AvailableState"}]
+        )
+        response = run_async(self.client.get, "/resources/test-0123456789/state")
+        self.assertEqual(response.status_code, 200)
+        response = run_async(
+            self.client.get,
+            "/resources/test-0123456789/state",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # missing scope
+        self.set_scopes(["resources:patch"])
+        self.login()
+        response = run_async(
+            self.client.get, "/resources/", headers={"If-None-Match": "*"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream_events(self):
+        self.clear_lru_cache()
+        self.mock_crud.get_resources.side_effect = None
+        self.mock_crud.get_resources.return_value = async_return(
+            return_value=[{"drone_uuid": "test-0125bc9fd8", "state": "BootingState"}]
+        )
+        self.sql_registry.state_changes = state_changes = EventBroadcast()
+
+        async def stream_events():
+            response = asyncio.ensure_future(
+                self.client.get("/resources/events", params={"site_name": "Test"})
+            )
+            while not state_changes.statistics.subscribers:
+                await asyncio.sleep(0.001)
+            for site_name in ("Test", "Other", "Test", "Test"):
+                state_changes.publish(
+                    AttributeDict(drone_uuid="test-0125bc9fd8", site_name=site_name)
+                )
+            return await response
+
+        with patch("tardis.rest.app.routers.resources.event_buffer_size", 2):
+            with self.assertLogs(level=logging.WARNING):
+                response = run_async(stream_events)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.headers["content-type"], "text/event-stream; charset=utf-8"
+        )
+        drone = '"drone_uuid": "test-0125bc9fd8"'
+        self.assertEqual(
+            response.text.split("\n\n"),
+            [
+                f'event: snapshot\ndata: {{{drone}, "state": "BootingState"}}',
+                'event: snapshot_end\ndata: {"resources": 1}',
+                f'event: state_change\nid: 1\ndata: {{{drone}, "site_name": "Test"}}',
+                f'event: state_change\nid: 3\ndata: {{{drone}, "site_name": "Test"}}',
+                'event: evicted\ndata: {"detail": "Client did not keep up with the'
+                ' events"}',
+                "",
+            ],
+        )
+        self.assertEqual(state_changes.statistics.subscribers, 0)
+
+        # missing scope
+        self.set_scopes(["resources:patch"])
+        self.login()
+        response = run_async(self.client.get, "/resources/events")
+        self.assertEqual(response.status_code, 403)
+
     def test_drain_drone(self):
         self.clear_lru_cache()
-        self.mock_crud.set_state_to_draining.return_value = async_return()
+        self.mock_crud.set_state_to_draining.return_value = async_return(
+            return_value=True
+        )
 
         response = run_async(self.client.patch, "/resources/test-0125bc9fd8/drain")
         self.assertEqual(response.status_code, 200)
@@ -113,8 +299,62 @@ class TestResources(TestCaseRouters):
             ANY, "test-0125bc9fd8"
         )
 
+        # unknown drone
+        self.mock_crud.set_state_to_draining.return_value = async_return(
+            return_value=False
+        )
+        response = run_async(self.client.patch, "/resources/test-1234567890/drain")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Drone not found"})
+
         # missing scope
         self.set_scopes(["resources:get"])
         self.login()
         response = run_async(self.client.patch, "/resources/test-0125bc9fd8/drain")
         self.assertEqual(response.status_code, 403)
+
+    def test_drain_drones(self):
+        self.clear_lru_cache()
+        results = [
+            {"drone_uuid": "test-0125bc9fd8", "result": "draining", "delay": 0.0},
+            {"drone_uuid": "test-6af3cfef14", "result": "not found"},
+        ]
+        self.mock_crud.set_states_to_draining.return_value = async_return(
+            return_value=results
+        )
+
+        response = run_async(
+            self.client.patch,
+            "/resources/drain",
+            json={
+                "drone_uuids": ["test-0125bc9fd8", "test-6af3cfef14"],
+                "site_name": "Test",
+                "created_before": "2021-10-08T12:42:00",
+                "rate": 10,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), results)
+        self.mock_crud.set_states_to_draining.assert_called_once_with(
+            ANY,
+            rate=10,
+            drone_uuids=["test-0125bc9fd8", "test-6af3cfef14"],
+            site_name="Test",
+            created_before=datetime(2021, 10, 8, 12, 42),
+        )
+
+        # refuse to drain all drones by accident
+        for selection in ({}, {"rate": 10}, {"site_name": "Test", "rate": 0}):
+            with self.subTest(selection=selection):
+                response = run_async(
+                    self.client.patch, "/resources/drain", json=selection
+                )
+                self.assertEqual(response.status_code, 422)
+
+        # missing scope
+        self.set_scopes(["resources:get"])
+        self.login()
+        response = run_async(
+            self.client.patch, "/resources/drain", json={"site_name": "Test"}
+        )
+        self.assertEqual(response.status_code, 403)
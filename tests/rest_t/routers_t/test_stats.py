@@ -0,0 +1,47 @@
+from tardis.utilities.attributedict import AttributeDict
+
+from tests.rest_t.routers_t.base_test_case_routers import TestCaseRouters
+from tests.utilities.utilities import run_async
+
+
+class TestStats(TestCaseRouters):
+    def setUp(self) -> None:
+        super().setUp()
+        self.reset_scopes()
+        self.login()
+
+    def test_get_statistics(self):
+        self.clear_lru_cache()
+        statistics = AttributeDict(
+            drones=1,
+            supply=1.0,
+            allocation=0.5,
+            utilisation=0.25,
+            states={"IntegrateState": 1},
+            sites={"site": 1},
+            machine_types={"type": 1},
+            groups=[
+                AttributeDict(
+                    site_name="site",
+                    machine_type="type",
+                    state="IntegrateState",
+                    drones=1,
+                )
+            ],
+        )
+        self.sql_registry.statistics.return_value = statistics
+        response = run_async(self.client.get, "/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), statistics)
+        self.sql_registry.statistics.assert_called_with(dwell_times=False)
+
+        self.clear_lru_cache()
+        run_async(self.client.get, "/stats/", params={"dwell_times": True})
+        self.sql_registry.statistics.assert_called_with(dwell_times=True)
+
+        # Invalid scope
+        self.clear_lru_cache()
+        self.set_scopes(["resources:patch"])
+        self.login()
+        response = run_async(self.client.get, "/stats/")
+        self.assertEqual(response.status_code, 403)
@@ -45,3 +45,33 @@ class TestTypes(TestCaseRouters):
         self.login()
         response = run_async(self.client.get, "/types/states")
         self.assertEqual(response.status_code, 403)
+
+    def test_types_cached(self):
+        self.clear_lru_cache()
+        self.mock_types.get_available_sites.reset_mock()
+        self.mock_types.get_available_sites.return_value = async_return(
+            return_value=[{"site": "site"}]
+        )
+
+        response = run_async(self.client.get, "/types/sites")
+        self.assertEqual(response.json(), ["site"])
+        tag = response.headers["ETag"]
+        response = run_async(self.client.get, "/types/sites")
+        self.assertEqual(response.json(), ["site"])
+        response = run_async(
+            self.client.get, "/types/sites", headers={"If-None-Match": tag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.mock_types.get_available_sites.assert_called_once()
+
+        # sites have been added in the meantime
+        self.sql_registry.types_version = 1
+        self.mock_types.get_available_sites.return_value = async_return(
+            return_value=[{"site": "site"}, {"site": "site2"}]
+        )
+        response = run_async(
+            self.client.get, "/types/sites", headers={"If-None-Match": tag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), ["site", "site2"])
+        self.assertEqual(self.mock_types.get_available_sites.call_count, 2)
@@ -0,0 +1,46 @@
+from tardis.resources.dronestates import AvailableState, BootingState, DownState
+from tardis.simulation.recorder import StateRecorder
+from tardis.simulation.virtualtime import VirtualTimeEventLoop
+from tardis.utilities.attributedict import AttributeDict
+
+from unittest import TestCase
+
+import asyncio
+
+
+class TestStateRecorder(TestCase):
+    def test_notify(self):
+        recorder = StateRecorder()
+
+        async def life_cycle(drone_uuid, states):
+            resource_attributes = AttributeDict(drone_uuid=drone_uuid)
+            for state, duration in states:
+                await recorder.notify(state, resource_attributes)
+                await asyncio.sleep(duration)
+
+        async def life_cycles():
+            await asyncio.gather(
+                life_cycle(
+                    "drone-1",
+                    [(BootingState(), 60), (AvailableState(), 120), (DownState(), 0)],
+                ),
+                life_cycle("drone-2", [(BootingState(), 180), (AvailableState(), 0)]),
+            )
+
+        loop = VirtualTimeEventLoop()
+        try:
+            loop.run_until_complete(life_cycles())
+        finally:
+            loop.close()
+
+        self.assertEqual(recorder.created, 2)
+        self.assertEqual(recorder.completed, 1)
+        self.assertEqual(recorder.state_changes, 5)
+        self.assertEqual(
+            recorder.dwell_times,
+            {
+                "AvailableState": AttributeDict(count=1, mean=120, max=120),
+                "BootingState": AttributeDict(count=2, mean=120, max=180),
+            },
+        )
+        self.assertEqual(recorder.occupancy, {"AvailableState": 1})
@@ -0,0 +1,75 @@
+from tardis.configuration.configuration import Configuration
+from tardis.simulation.runner import Simulation, adjust_factory_pool, factory_pools
+
+from cobald.composite.factory import FactoryPool
+from cobald.interfaces import Pool
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import asyncio
+import logging
+import os
+
+
+class TestSimulation(TestCase):
+    def setUp(self):
+        self.configuration = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            "..",
+            "data",
+            "simulation.yml",
+        )
+        self.shared_state = dict(Configuration._shared_state)
+        logging.getLogger("cobald.runtime").setLevel(logging.WARNING)
+
+    def tearDown(self):
+        Configuration._shared_state.clear()
+        Configuration._shared_state.update(self.shared_state)
+        logging.getLogger("cobald.runtime").setLevel(logging.NOTSET)
+
+    def test_run(self):
+        report = Simulation(
+            self.configuration, duration=7200, rate=1, controller_interval=10
+        ).run()
+
+        self.assertEqual(report.duration, 7200)
+        self.assertGreater(report.created, 0)
+        # drones are released again as the utilisation drops periodically
+        self.assertGreater(report.completed, 0)
+        self.assertEqual(report.failed, 0)
+        self.assertAlmostEqual(report.dwell_times["IntegrateState"].mean, 60)
+        self.assertGreaterEqual(len(report.samples), 7200 // 60)
+        self.assertEqual(report.heartbeats.in_flight, 0)
+        # the simulation does not leave an event loop behind
+        with self.assertRaises(RuntimeError):
+            asyncio.get_running_loop()
+
+    def test_factory_pools(self):
+        Configuration(self.configuration)
+        from tardis.resources.poolfactory import create_composite_pool
+
+        factories = list(factory_pools(create_composite_pool()))
+        self.assertEqual(len(factories), 1)
+        self.assertIsInstance(factories[0], FactoryPool)
+
+    def test_adjust_factory_pool(self):
+        # the simulation relies on private methods of cobald's FactoryPool
+        for method in ("_shrink", "_grow"):
+            with self.subTest(method=method):
+                self.assertTrue(callable(getattr(FactoryPool, method, None)))
+
+        def create_child():
+            return MagicMock(spec=Pool, demand=1, supply=0, utilisation=0)
+
+        factory = FactoryPool(factory=create_child)
+        factory.demand = 3
+        adjust_factory_pool(factory)
+        self.assertEqual(len(factory.children), 3)
+        self.assertEqual(factory.demand, 3)
+        for child in factory.children:
+            child.supply = 1
+        factory.demand = 1
+        adjust_factory_pool(factory)
+        # excess children are released by dropping their demand
+        self.assertEqual(sum(child.demand for child in factory.children), 1)
@@ -0,0 +1,56 @@
+from tardis.simulation.virtualtime import VirtualTimeEventLoop, virtual_datetime
+from tardis.resources import drone
+
+from datetime import datetime
+from unittest import TestCase
+
+import asyncio
+import time
+
+
+class TestVirtualTimeEventLoop(TestCase):
+    def setUp(self):
+        self.loop = VirtualTimeEventLoop(start=0)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_virtual_sleep(self):
+        async def sleep():
+            await asyncio.sleep(3600)
+            return self.loop.time()
+
+        started = time.perf_counter()
+        self.assertEqual(self.loop.run_until_complete(sleep()), 3600)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(self.loop.now(), datetime.fromtimestamp(3600))
+
+    def test_timer_order(self):
+        async def sleep(delay, results):
+            await asyncio.sleep(delay)
+            results.append((delay, self.loop.time()))
+
+        async def sleep_all():
+            results = []
+            await asyncio.gather(*(sleep(delay, results) for delay in (30, 10, 20)))
+            return results
+
+        self.assertEqual(
+            self.loop.run_until_complete(sleep_all()), [(10, 10), (20, 20), (30, 30)]
+        )
+
+    def test_executor(self):
+        """Test that results of threads are awaited"""
+
+        async def run_in_executor():
+            return await self.loop.run_in_executor(None, time.sleep, 0.01)
+
+        self.assertIsNone(self.loop.run_until_complete(run_in_executor()))
+        self.assertEqual(self.loop.time(), 0)
+
+    def test_virtual_datetime(self):
+        self.loop.advance(60)
+        with virtual_datetime(self.loop):
+            self.assertEqual(drone.datetime.now(), datetime.fromtimestamp(60))
+            self.assertIsInstance(drone.datetime.now(), datetime)
+        self.assertIs(drone.datetime, datetime)
@@ -0,0 +1,151 @@
+from tests.utilities.utilities import run_async
+from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.interfaces.executor import Executor
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.executors.dedupingexecutor import DedupingExecutor
+from tardis.utilities.executors.shellexecutor import ShellExecutor
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import asyncio
+import yaml
+
+
+class MockExecutor(Executor):
+    def __init__(self):
+        self.commands = []
+
+    async def run_command(self, command, stdin_input=None, timeout=None):
+        self.commands.append((command, stdin_input))
+        await asyncio.sleep(0.01)
+        if command == "fail":
+            raise CommandExecutionFailure(
+                message="Run command fail failed",
+                exit_code=1,
+                stdout="",
+                stderr="",
+                stdin=stdin_input,
+            )
+        return AttributeDict(stdout=f"{len(self.commands)}", stderr="", exit_code=0)
+
+
+class TestDedupingExecutor(TestCase):
+    def setUp(self):
+        self.mock_executor = MockExecutor()
+        self.executor = DedupingExecutor(
+            self.mock_executor, commands=["condor_status *", "fail"]
+        )
+
+    def run_concurrently(self, *commands, stdin_input=None):
+        async def run_commands():
+            return await asyncio.gather(
+                *(
+                    self.executor.run_command(command, stdin_input=stdin_input)
+                    for command in commands
+                ),
+                return_exceptions=True,
+            )
+
+        return run_async(run_commands)
+
+    def test_deduplicate(self):
+        results = self.run_concurrently(*["condor_status -af Name"] * 3)
+        self.assertEqual([result.stdout for result in results], ["1", "1", "1"])
+        self.assertEqual(
+            self.mock_executor.commands, [("condor_status -af Name", None)]
+        )
+
+        # commands are only deduplicated while in flight
+        results = self.run_concurrently("condor_status -af Name")
+        self.assertEqual(results[0].stdout, "2")
+
+        # different stdin_input is a different command
+        self.run_concurrently("condor_status -af Name", stdin_input="input")
+        self.assertEqual(
+            self.executor.statistics,
+            AttributeDict(executed=3, deduplicated=2, cached=0),
+        )
+
+    def test_not_allowed(self):
+        self.run_concurrently(*["condor_submit job.jdl"] * 2)
+        self.assertEqual(len(self.mock_executor.commands), 2)
+        self.assertEqual(self.executor.statistics.deduplicated, 0)
+
+    def test_failure(self):
+        results = self.run_concurrently("fail", "fail")
+        self.assertEqual(len(self.mock_executor.commands), 1)
+        for result in results:
+            self.assertIsInstance(result, CommandExecutionFailure)
+        self.assertIs(results[0], results[1])
+
+    def test_cancel(self):
+        async def cancel_first():
+            first = asyncio.ensure_future(
+                self.executor.run_command("condor_status -af Name")
+            )
+            second = asyncio.ensure_future(
+                self.executor.run_command("condor_status -af Name")
+            )
+            await asyncio.sleep(0)
+            first.cancel()
+            # the command keeps running for the remaining callers
+            return await second
+
+        self.assertEqual(run_async(cancel_first).stdout, "1")
+
+    @patch("tardis.utilities.executors.dedupingexecutor.time")
+    def test_cache(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        self.executor = DedupingExecutor(
+            self.mock_executor, commands=["condor_status *", "fail"], cache_ttl=5
+        )
+        self.assertEqual(self.run_concurrently("condor_status -af Name")[0].stdout, "1")
+        mock_time.monotonic.return_value = 4
+        self.assertEqual(self.run_concurrently("condor_status -af Name")[0].stdout, "1")
+        mock_time.monotonic.return_value = 6
+        self.assertEqual(self.run_concurrently("condor_status -af Name")[0].stdout, "2")
+
+        # failures are not cached
+        self.run_concurrently("fail")
+        self.run_concurrently("fail")
+        self.assertEqual(
+            self.executor.statistics,
+            AttributeDict(executed=4, deduplicated=0, cached=1),
+        )
+
+    @patch("tardis.utilities.executors.dedupingexecutor.time")
+    def test_cache_pruning(self, mock_time):
+        mock_time.monotonic.return_value = 0
+        self.executor = DedupingExecutor(
+            self.mock_executor, commands=["condor_status *"], cache_ttl=5
+        )
+        for index in range(10):
+            self.run_concurrently(f"condor_status -af Name{index}")
+        self.assertEqual(len(self.executor._cache), 10)
+        # expired results of commands that never rerun are dropped as well
+        mock_time.monotonic.return_value = 3
+        self.run_concurrently("condor_status -af Recent")
+        mock_time.monotonic.return_value = 6
+        self.run_concurrently("condor_status -af Other")
+        self.assertEqual(
+            set(self.executor._cache),
+            {("condor_status -af Recent", None), ("condor_status -af Other", None)},
+        )
+
+    def test_sanity_checks(self):
+        with self.assertRaises(ValueError):
+            DedupingExecutor(self.mock_executor, cache_ttl=-1)
+
+    def test_construction_by_yaml(self):
+        executor = yaml.safe_load("""
+                   !DedupingExecutor
+                   executor: !ShellExecutor
+                   commands:
+                     - "echo *"
+                   cache_ttl: 60
+                   """)
+        self.assertIsInstance(executor._executor, ShellExecutor)
+        self.assertTrue(executor.deduplicates('echo "Test"'))
+        self.assertFalse(executor.deduplicates("exit 0"))
+        self.assertEqual(run_async(executor.run_command, 'echo "Test"').stdout, "Test")
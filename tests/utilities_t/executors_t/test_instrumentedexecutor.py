@@ -0,0 +1,160 @@
+from tests.utilities.utilities import run_async
+from tardis.exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+    ExecutorFailure,
+)
+from tardis.interfaces.executor import Executor
+from tardis.interfaces.metricssink import MetricsSink
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.executors.instrumentedexecutor import (
+    InstrumentedExecutor,
+    PrometheusMetricsSink,
+    command_name,
+)
+from tardis.utilities.executors.shellexecutor import ShellExecutor
+
+from aioprometheus import REGISTRY
+
+from unittest import TestCase
+from unittest.mock import MagicMock, call
+
+import yaml
+
+
+class MockExecutor(Executor):
+    async def run_command(self, command, stdin_input=None, timeout=None):
+        if command.startswith("fail"):
+            raise CommandExecutionFailure(
+                message="Run command fail failed",
+                exit_code=1,
+                stdout="",
+                stderr="",
+                stdin=stdin_input,
+            )
+        elif command.startswith("hang"):
+            raise CommandExecutionTimeout(
+                message="Run command hang timed out", timeout=timeout
+            )
+        elif command.startswith("lost"):
+            raise ExecutorFailure(description="connection lost", executor=self)
+        return AttributeDict(stdout="Täst", stderr="", exit_code=0)
+
+
+class TestInstrumentedExecutor(TestCase):
+    def setUp(self):
+        self.sink = MagicMock(spec=MetricsSink)
+        self.mock_executor = MockExecutor()
+        self.executor = InstrumentedExecutor(self.mock_executor, self.sink)
+        self.labels = {
+            "executor": "MockExecutor",
+            "host": "localhost",
+            "command": "condor_q",
+        }
+
+    def test_command_name(self):
+        self.assertEqual(command_name("condor_q -af ClusterId"), "condor_q")
+        self.assertEqual(command_name("  squeue\n-o %i"), "squeue")
+        self.assertEqual(command_name(""), "")
+
+    def test_run_command(self):
+        self.assertEqual(
+            run_async(self.executor.run_command, "condor_q -af ClusterId").stdout,
+            "Täst",
+        )
+        self.assertEqual(
+            self.sink.adjust.call_args_list,
+            [
+                call("tardis_executor_commands_in_flight", self.labels, 1),
+                call("tardis_executor_commands_in_flight", self.labels, -1),
+            ],
+        )
+        duration, stdout_size = self.sink.observe.call_args_list
+        self.assertEqual(
+            duration.args[:2], ("tardis_executor_command_duration_seconds", self.labels)
+        )
+        self.assertGreaterEqual(duration.args[2], 0)
+        self.assertEqual(
+            stdout_size, call("tardis_executor_command_stdout_bytes", self.labels, 5)
+        )
+        self.sink.increase.assert_not_called()
+        # the executor reports its details to the same metrics
+        self.assertIs(self.mock_executor.metrics, self.executor.metrics)
+
+    def test_failures(self):
+        for command, exception, reason in (
+            ("fail", CommandExecutionFailure, "command"),
+            ("lost", ExecutorFailure, "executor"),
+            ("hang", CommandExecutionTimeout, "timeout"),
+        ):
+            with self.subTest(command=command):
+                self.sink.reset_mock()
+                with self.assertRaises(exception):
+                    run_async(self.executor.run_command, command)
+                self.sink.increase.assert_called_once_with(
+                    "tardis_executor_command_failures_total",
+                    {
+                        "executor": "MockExecutor",
+                        "host": "localhost",
+                        "command": command,
+                        "reason": reason,
+                    },
+                )
+                self.assertEqual(self.sink.adjust.call_count, 2)
+                self.assertEqual(self.sink.observe.call_count, 1)
+
+    def test_host(self):
+        self.mock_executor.host = "login.example"
+        executor = InstrumentedExecutor(self.mock_executor, self.sink)
+        self.assertEqual(executor.metrics.labels("ls")["host"], "login.example")
+        executor = InstrumentedExecutor(self.mock_executor, self.sink, host="other")
+        self.assertEqual(executor.metrics.labels("ls")["host"], "other")
+
+    def test_queued_and_retried(self):
+        self.executor.metrics.queued("condor_q -af ClusterId", 0.5)
+        self.sink.observe.assert_called_once_with(
+            "tardis_executor_command_queued_seconds", self.labels, 0.5
+        )
+        self.executor.metrics.retried("condor_q -af ClusterId")
+        self.sink.increase.assert_called_once_with(
+            "tardis_executor_command_retries_total", self.labels
+        )
+
+    def test_construction_by_yaml(self):
+        executor = yaml.safe_load("""
+                   !InstrumentedExecutor
+                   executor: !ShellExecutor
+                   sink: !PrometheusMetricsSink
+                   host: submit.example
+                   """)
+        self.assertIsInstance(executor._executor, ShellExecutor)
+        self.assertEqual(run_async(executor.run_command, 'echo "Test"').stdout, "Test")
+
+
+class TestPrometheusMetricsSink(TestCase):
+    def test_metrics(self):
+        sink = PrometheusMetricsSink(buckets=(0.1, 1.0, float("inf")))
+        labels = {"executor": "ShellExecutor", "host": "localhost", "command": "ls"}
+        sink.observe("tardis_test_duration_seconds", labels, 0.5)
+        sink.increase("tardis_test_failures_total", labels)
+        sink.increase("tardis_test_failures_total", labels, 2)
+        sink.adjust("tardis_test_in_flight", labels, 1)
+        # metrics are shared by all sinks
+        PrometheusMetricsSink().adjust("tardis_test_in_flight", labels, 1)
+
+        collectors = {collector.name: collector for collector in REGISTRY.get_all()}
+        histogram = collectors["tardis_test_duration_seconds"].get(labels)
+        self.assertEqual((histogram["count"], histogram[1.0]), (1, 1))
+        self.assertEqual(collectors["tardis_test_failures_total"].get(labels), 3)
+        self.assertEqual(collectors["tardis_test_in_flight"].get(labels), 2)
+
+    def test_size_buckets(self):
+        labels = {"executor": "ShellExecutor", "host": "localhost", "command": "cat"}
+        PrometheusMetricsSink().observe(
+            "tardis_executor_command_stdout_bytes", labels, 123456
+        )
+        collectors = {collector.name: collector for collector in REGISTRY.get_all()}
+        histogram = collectors["tardis_executor_command_stdout_bytes"].get(labels)
+        # a realistic size is distinguished from larger ones
+        self.assertEqual((histogram[1e5], histogram[1e6]), (0, 1))
+        self.assertEqual(histogram[float("inf")], 1)
@@ -1,13 +1,48 @@
 from tests.utilities.utilities import run_async
-from tardis.exceptions.executorexceptions import CommandExecutionFailure
-from tardis.utilities.executors.shellexecutor import ShellExecutor
+from tardis.exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+    ExecutorFailure,
+)
+from tardis.utilities.executors.shellexecutor import (
+    PersistentShellExecutor,
+    ShellExecutor,
+)
 
 from unittest import TestCase
 
+import asyncio
+import os
+import tempfile
 import yaml
 
 
-class TestAsyncRunCommand(TestCase):
+class TimeoutTestMixin(object):
+    def test_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, "marker")
+            command = f"sleep 0.5; touch {marker}"
+            with self.assertRaises(CommandExecutionTimeout) as cet:
+                run_async(self.executor.run_command, command, timeout=0.1)
+            self.assertEqual(cet.exception.timeout, 0.1)
+            run_async(asyncio.sleep, 0.6)
+            # commands started by the shell are killed as well
+            self.assertFalse(os.path.exists(marker))
+
+        executor = type(self.executor)(timeout=0.1)
+        with self.assertRaises(CommandExecutionTimeout):
+            run_async(executor.run_command, "sleep 1", stdin_input="Test")
+        self.assertEqual(
+            run_async(executor.run_command, 'echo "Test"', timeout=1).stdout, "Test"
+        )
+
+        for wrong_timeout in (0, -1):
+            with self.subTest(timeout=wrong_timeout):
+                with self.assertRaises(ValueError):
+                    type(self.executor)(timeout=wrong_timeout)
+
+
+class TestAsyncRunCommand(TimeoutTestMixin, TestCase):
     def setUp(self):
         self.executor = ShellExecutor()
 
@@ -53,3 +88,107 @@ class TestAsyncRunCommand(TestCase):
         self.assertEqual(
             run_async(executor.run_command, 'echo "Test" >>/dev/stderr').stderr, "Test"
         )
+
+
+class TestPersistentShellExecutor(TimeoutTestMixin, TestCase):
+    def setUp(self):
+        self.executor = PersistentShellExecutor(workers=2)
+
+    def test_run_command(self):
+        self.assertEqual(run_async(self.executor.run_command, "exit 0").exit_code, 0)
+        self.assertEqual(
+            run_async(self.executor.run_command, "exit 255").exit_code, 255
+        )
+
+        with self.assertRaises(CommandExecutionFailure) as cf:
+            run_async(self.executor.run_command, "exit 254")
+        self.assertEqual(cf.exception.exit_code, 254)
+
+        self.assertEqual(
+            run_async(self.executor.run_command, 'echo "Test"').stdout, "Test"
+        )
+
+        self.assertEqual(
+            run_async(self.executor.run_command, 'echo "Test" >>/dev/stderr').stderr,
+            "Test",
+        )
+
+        self.assertEqual(
+            run_async(
+                self.executor.run_command, "read test; echo $test", stdin_input="Test"
+            ).stdout,
+            "Test",
+        )
+
+    def test_same_results(self):
+        shell_executor = ShellExecutor()
+
+        async def result(executor, command, stdin_input=None):
+            try:
+                return await executor.run_command(command, stdin_input=stdin_input)
+            except CommandExecutionFailure as cf:
+                return cf.exit_code, cf.stdout, cf.stderr, cf.stdin
+
+        for command, stdin_input in (
+            ('echo "Test"; echo "Error" >&2', None),
+            ("printf 'no newline'", None),
+            ("cat", "multiple\nlines\n"),
+            ("seq 1 100000 >&2; seq 1 100000", None),
+            ("echo 'partial'; exit 3", None),
+            ("cd /; pwd", None),
+            ("pwd", None),
+            # commands without input must not read the stdin of TARDIS
+            ("cat", None),
+            ("cat", ""),
+            ("read line; echo $?", None),
+            # syntax errors and exit codes as reported by /bin/sh -c
+            ("echo 'unterminated", None),
+            ("if true; then", None),
+            ("exit 300", None),
+            ("unknown-command-for-tardis", None),
+            ('echo "$0"; exit', None),
+        ):
+            with self.subTest(command=command):
+                self.assertEqual(
+                    run_async(result, self.executor, command, stdin_input),
+                    run_async(result, shell_executor, command, stdin_input),
+                )
+
+    def test_workers(self):
+        async def run_commands():
+            pids = await asyncio.gather(
+                *(self.executor.run_command("sleep 0.1; echo $PPID") for _ in range(4))
+            )
+            return {result.stdout for result in pids}
+
+        # commands run on at most two workers which are reused
+        self.assertEqual(len(run_async(run_commands)), 2)
+
+    def test_broken_worker(self):
+        async def cancel_command():
+            command = asyncio.ensure_future(self.executor.run_command("sleep 10"))
+            await asyncio.sleep(0.1)
+            command.cancel()
+            await asyncio.gather(command, return_exceptions=True)
+
+        run_async(cancel_command)
+        with self.assertRaises(ExecutorFailure):
+            run_async(self.executor.run_command, "kill -9 $PPID")
+        # workers are replaced as needed
+        self.assertEqual(
+            run_async(self.executor.run_command, 'echo "Test"').stdout, "Test"
+        )
+
+    def test_sanity_checks(self):
+        for wrong_workers in (0, -1, 1.5):
+            with self.subTest(workers=wrong_workers):
+                with self.assertRaises(ValueError):
+                    PersistentShellExecutor(workers=wrong_workers)
+
+    def test_construction_by_yaml(self):
+        executor = yaml.safe_load("""
+                      !PersistentShellExecutor
+                      workers: 1
+        """)
+        self.assertEqual(run_async(executor.run_command, "exit 0").exit_code, 0)
+        self.assertEqual(run_async(executor.run_command, 'echo "Test"').stdout, "Test")
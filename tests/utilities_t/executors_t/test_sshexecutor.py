@@ -1,6 +1,8 @@
 from tests.utilities.utilities import async_return, run_async
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.executors.instrumentedexecutor import ExecutorMetrics
 from tardis.utilities.executors.sshexecutor import (
+    ConnectionState,
     SSHExecutor,
     probe_max_session,
     MFASSHClient,
@@ -8,24 +10,72 @@ from tardis.utilities.executors.sshexecutor import (
 )
 from tardis.exceptions.executorexceptions import (
     CommandExecutionFailure,
+    CommandExecutionTimeout,
     ExecutorFailure,
 )
 from tardis.exceptions.tardisexceptions import TardisAuthError
 
-from asyncssh import ChannelOpenError, ConnectionLost, DisconnectError, ProcessError
+from asyncssh import (
+    ChannelOpenError,
+    ConnectionLost,
+    DisconnectError,
+    ProcessError,
+    TimeoutError as SSHTimeoutError,
+)
 
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import asyncio
 import yaml
-import contextlib
 import logging
-from asyncstdlib import contextmanager as asynccontextmanager
 
 DEFAULT_MAX_SESSIONS = 10
 
 
+class MockProcess(object):
+    def __init__(self, connection: "MockConnection", command, input):
+        self.connection = connection
+        self.command = command
+        self.input = input
+        self.killed = False
+        self.closed = False
+
+    async def wait(self, check=False, timeout=None):
+        try:
+            return await asyncio.wait_for(
+                self.connection.execute(self.command, self.input), timeout
+            )
+        except asyncio.TimeoutError:
+            raise SSHTimeoutError(
+                env="Test",
+                command=self.command,
+                subsystem="Test",
+                exit_status=None,
+                exit_signal=None,
+                returncode=None,
+                stdout="",
+                stderr="",
+            ) from None
+        finally:
+            if not self.killed:
+                self.close()
+
+    def kill(self):
+        self.killed = True
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.connection.current_sessions -= 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class MockConnection(object):
     def __init__(
         self,
@@ -36,41 +86,36 @@ class MockConnection(object):
         # simulate limited multiplex sessions
         self.max_sessions = max_sessions
         self.current_sessions = 0
+        self.closed = False
+        self.processes = []
+
+    def close(self):
+        self.closed = True
+
+    async def execute(self, command, input=None):
+        if self.exception:
+            raise self.exception
+        if command.startswith("sleep"):
+            _, duration = command.split()
+            await asyncio.sleep(float(duration))
+        elif command == "lost_connection":
+            return AttributeDict(stdout="", stderr="", exit_status=None)
+        elif command not in ("Test", "/bin/bash", "test_wrapper"):
+            raise ValueError(f"Unsupported mock command: {command}")
+        return AttributeDict(
+            stdout=f"command={command}, stdin={input}",
+            stderr="TestError",
+            exit_status=0,
+        )
 
-    @contextlib.contextmanager
-    def _multiplex_session(self):
+    async def create_process(self, command=None, input=None, **kwargs):
+        # simulate a multiplex session held until the process is closed
         if self.current_sessions >= self.max_sessions:
             raise ChannelOpenError(code=2, reason="open failed")
         self.current_sessions += 1
-        try:
-            yield
-        finally:
-            self.current_sessions -= 1
-
-    async def run(self, command, input=None, **kwargs):
-        with self._multiplex_session():
-            if self.exception:
-                raise self.exception
-            if command.startswith("sleep"):
-                _, duration = command.split()
-                await asyncio.sleep(float(duration))
-            elif command == "lost_connection":
-                return AttributeDict(stdout="", stderr="", exit_status=None)
-            elif command not in ("Test", "/bin/bash", "test_wrapper"):
-                raise ValueError(f"Unsupported mock command: {command}")
-            return AttributeDict(
-                stdout=f"command={command}, stdin={input}",
-                stderr="TestError",
-                exit_status=0,
-            )
-
-    async def create_process(self):
-        @asynccontextmanager
-        async def fake_process():
-            with self._multiplex_session():
-                yield
-
-        return fake_process()
+        process = MockProcess(self, command, input)
+        self.processes.append(process)
+        return process
 
 
 class TestSSHExecutorUtilities(TestCase):
@@ -157,6 +202,7 @@ class TestSSHExecutor(TestCase):
         cls.mock_asyncssh.ConnectionLost = ConnectionLost
         cls.mock_asyncssh.DisconnectError = DisconnectError
         cls.mock_asyncssh.ProcessError = ProcessError
+        cls.mock_asyncssh.TimeoutError = SSHTimeoutError
 
     @classmethod
     def tearDownClass(cls):
@@ -164,6 +210,7 @@ class TestSSHExecutor(TestCase):
 
     def setUp(self) -> None:
         self.response = AttributeDict(stderr="", exit_status=0)
+        self.mock_asyncssh.connect.side_effect = None
         self.mock_asyncssh.connect.return_value = async_return(
             return_value=MockConnection()
         )
@@ -204,15 +251,14 @@ class TestSSHExecutor(TestCase):
             async with self.executor.bounded_connection as connection:
                 return connection
 
-        self.assertIsNone(self.executor._connection_state)
+        self.assertEqual(self.executor._connections, [])
         run_async(force_connection)
-        self.assertIsInstance(
-            self.executor._connection_state.connection, MockConnection
-        )
-        current_ssh_connection = self.executor._connection_state
+        self.assertEqual(len(self.executor._connections), 1)
+        self.assertIsInstance(self.executor._connections[0].connection, MockConnection)
+        current_ssh_connection = self.executor._connections[0]
         run_async(force_connection)
         # make sure the connection is not needlessly replaced
-        self.assertEqual(self.executor._connection_state, current_ssh_connection)
+        self.assertEqual(self.executor._connections, [current_ssh_connection])
 
     def test_connection_race(self):
         # see https://github.com/MatterMiners/tardis/issues/369
@@ -229,7 +275,7 @@ class TestSSHExecutor(TestCase):
         async def run_race_condition():
             first_connection = asyncio.ensure_future(run_bounded_connection())
             await asyncio.sleep(0.1)  # give some time to hit the waiter
-            self.assertIsNone(self.executor._connection_state)
+            self.assertEqual(self.executor._connections, [])
             second_connection = asyncio.ensure_future(run_bounded_connection())
             await asyncio.sleep(0.1)  # give some time to schedule the second tasks
             waiter.set()
@@ -268,6 +314,118 @@ class TestSSHExecutor(TestCase):
                     run_async(is_queued, sessions),
                 )
 
+    def test_connection_pool(self):
+        self.mock_asyncssh.connect.side_effect = lambda **kwargs: async_return(
+            return_value=MockConnection()
+        )
+        executor = SSHExecutor(
+            max_connections=2, idle_timeout=0, **self.test_asyncssh_params
+        )
+
+        async def run_commands(n: int):
+            """Check whether the n'th command is queued and the pool size"""
+            background = [
+                asyncio.ensure_future(executor.run_command("sleep 5"))
+                for _ in range(n - 1)
+            ]
+            probe = asyncio.ensure_future(executor.run_command("sleep 0.05"))
+            await asyncio.sleep(0.01)
+            statistics = executor.statistics
+            await asyncio.sleep(0.1)
+            queued = not probe.done()
+            for task in background + [probe]:
+                task.cancel()
+            await asyncio.gather(*background, probe, return_exceptions=True)
+            return queued, statistics.connections
+
+        for sessions, expected in (
+            (1, (False, 1)),
+            (10, (False, 1)),
+            (11, (False, 2)),
+            (20, (False, 2)),
+            (21, (True, 2)),
+        ):
+            with self.subTest(sessions=sessions):
+                self.assertEqual(run_async(run_commands, sessions), expected)
+                # idle connections are closed again, except for the first one
+                self.assertEqual(len(executor._connections), 1)
+                self.assertEqual(executor.statistics.commands, 0)
+        self.assertGreater(executor.statistics.max_queued, 0)
+        self.assertGreaterEqual(
+            executor.statistics.queued, executor.statistics.max_queued
+        )
+        self.mock_asyncssh.connect.side_effect = None
+
+    def test_least_loaded_connection(self):
+        self.mock_asyncssh.connect.side_effect = lambda **kwargs: async_return(
+            return_value=MockConnection()
+        )
+        executor = SSHExecutor(max_connections=2, **self.test_asyncssh_params)
+
+        async def run_commands():
+            commands = [
+                asyncio.ensure_future(executor.run_command("sleep 0.2"))
+                for _ in range(11)
+            ]
+            await asyncio.sleep(0.1)
+            # the second connection takes the load off the first one
+            first, second = executor._connections
+            self.assertEqual((first.sessions, second.sessions), (10, 1))
+            commands.append(asyncio.ensure_future(executor.run_command("sleep 0.2")))
+            await asyncio.sleep(0)
+            self.assertEqual((first.sessions, second.sessions), (10, 2))
+            await asyncio.gather(*commands)
+
+        run_async(run_commands)
+        # connections are kept until idle for the idle_timeout
+        self.assertEqual(len(executor._connections), 2)
+        self.mock_asyncssh.connect.side_effect = None
+
+    def test_idle_timeout(self):
+        self.mock_asyncssh.connect.side_effect = lambda **kwargs: async_return(
+            return_value=MockConnection()
+        )
+        executor = SSHExecutor(
+            max_connections=2, idle_timeout=0.1, **self.test_asyncssh_params
+        )
+
+        async def run_commands():
+            await asyncio.gather(
+                *(executor.run_command("sleep 0.05") for _ in range(11))
+            )
+            first, second = executor._connections
+            await asyncio.sleep(0.05)
+            self.assertEqual(executor._connections, [first, second])
+            # idle connections are closed without any further command
+            await asyncio.sleep(0.1)
+            self.assertEqual(executor._connections, [first])
+            self.assertTrue(second.connection.closed)
+            self.assertFalse(first.connection.closed)
+
+        run_async(run_commands)
+        self.mock_asyncssh.connect.side_effect = None
+
+    def test_connection_without_sessions(self):
+        self.mock_asyncssh.connect.side_effect = lambda **kwargs: async_return(
+            return_value=MockConnection(max_sessions=0)
+        )
+        executor = SSHExecutor(on_disconnect_retry=0, **self.test_asyncssh_params)
+        # commands must fail instead of waiting for a session forever
+        with self.assertRaises(ExecutorFailure):
+            run_async(asyncio.wait_for, executor.run_command("Test"), 1)
+        self.assertEqual(executor._connections, [])
+        self.mock_asyncssh.connect.side_effect = None
+
+    def test_sanity_checks(self):
+        with self.assertRaises(ValueError):
+            ConnectionState(MockConnection(), max_session=0)
+        for wrong_max_connections in (0, -1, 1.5):
+            with self.subTest(max_connections=wrong_max_connections):
+                with self.assertRaises(ValueError):
+                    SSHExecutor(max_connections=wrong_max_connections)
+        with self.assertRaises(ValueError):
+            SSHExecutor(idle_timeout=-1)
+
     def test_run_command(self):
         self.assertEqual(
             run_async(self.executor.run_command, command="Test").stdout,
@@ -359,6 +517,49 @@ class TestSSHExecutor(TestCase):
                 disconnected_executor.run_command, command="Test", stdin_input="Test"
             )
 
+    def test_timeout(self):
+        connection = MockConnection()
+        self.mock_asyncssh.connect.return_value = async_return(return_value=connection)
+        executor = SSHExecutor(timeout=0.05, **self.test_asyncssh_params)
+
+        with self.assertRaises(CommandExecutionTimeout) as cet:
+            run_async(executor.run_command, command="sleep 5", stdin_input="Test")
+        self.assertEqual((cet.exception.timeout, cet.exception.stdin), (0.05, "Test"))
+        # the remote command is killed and its session is released
+        process = connection.processes[-1]
+        self.assertTrue(process.killed and process.closed)
+        self.assertEqual(connection.current_sessions, 0)
+
+        # per command timeouts take precedence
+        self.assertEqual(
+            run_async(executor.run_command, command="sleep 0.1", timeout=1).exit_code,
+            0,
+        )
+        with self.assertRaises(CommandExecutionTimeout):
+            run_async(executor.run_command, command="sleep 0.1", timeout=0.01)
+
+        for wrong_timeout in (0, -1):
+            with self.subTest(timeout=wrong_timeout):
+                with self.assertRaises(ValueError):
+                    SSHExecutor(timeout=wrong_timeout)
+
+    def test_metrics(self):
+        broken_connection = MockConnection(
+            exception=ChannelOpenError(reason="test_reason", code=255)
+        )
+        self.mock_asyncssh.connect.side_effect = [
+            async_return(return_value=broken_connection),
+            async_return(return_value=MockConnection()),
+        ]
+        executor = SSHExecutor(on_disconnect_retry=1, **self.test_asyncssh_params)
+        self.assertEqual(executor.host, "test_host")
+        executor.metrics = MagicMock(spec=ExecutorMetrics)
+
+        run_async(executor.run_command, command="Test")
+        executor.metrics.retried.assert_called_once_with("Test")
+        self.assertEqual(executor.metrics.queued.call_count, 2)
+        self.mock_asyncssh.connect.side_effect = None
+
     def test_construction_by_yaml(self):
         def test_yaml_construction(test_executor, *args, **kwargs):
             self.assertEqual(
@@ -419,6 +620,7 @@ class TestDupingSSHExecutor(TestCase):
         cls.mock_asyncssh.ConnectionLost = ConnectionLost
         cls.mock_asyncssh.DisconnectError = DisconnectError
         cls.mock_asyncssh.ProcessError = ProcessError
+        cls.mock_asyncssh.TimeoutError = SSHTimeoutError
 
     @classmethod
     def tearDownClass(cls):
@@ -1,4 +1,7 @@
-from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.exceptions.executorexceptions import (
+    CommandExecutionFailure,
+    CommandExecutionTimeout,
+)
 from tardis.utilities.asynccachemap import AsyncCacheMap
 
 from tests.utilities.utilities import run_async
@@ -32,6 +35,9 @@ class TestAsyncCacheMap(TestCase):
             message="Failure", stdout="Failure", stderr="Failure", exit_code=2
         )
 
+    async def command_timeout_update_function(self):
+        raise CommandExecutionTimeout(message="Timeout", timeout=1)
+
     async def update_function(self):
         return self.test_data
 
@@ -56,6 +62,56 @@ class TestAsyncCacheMap(TestCase):
         for key, value in self.async_cache_map.items():
             self.assertEqual(value, self.test_data.get(key))
 
+    def test_subscribe(self):
+        changes = []
+        self.async_cache_map.subscribe(changes.append)
+        self.update_status()
+        self.assertEqual(changes, [{"testA", "testB"}])
+
+        # no notification if nothing has changed
+        self.async_cache_map._last_update = datetime.fromtimestamp(0)
+        self.update_status()
+        self.assertEqual(len(changes), 1)
+
+        self.test_data = {"testA": 456, "testC": "Another String"}
+        self.async_cache_map._last_update = datetime.fromtimestamp(0)
+        self.update_status()
+        self.assertEqual(changes[-1], {"testA", "testB", "testC"})
+
+        # no notification if the update fails
+        self.command_failing_async_cache_map.subscribe(changes.append)
+        with self.assertLogs(level=logging.WARNING):
+            run_async(self.command_failing_async_cache_map.update_status)
+        self.assertEqual(len(changes), 2)
+
+    def test_subscribe_change_fields(self):
+        self.test_data = {"testA": {"State": "Busy", "Ratio": 0.5}}
+        async_cache_map = AsyncCacheMap(
+            update_coroutine=self.update_function, change_fields=("State",)
+        )
+        changes = []
+        async_cache_map.subscribe(changes.append)
+
+        def update_status(data):
+            self.test_data = data
+            async_cache_map._last_update = datetime.fromtimestamp(0)
+            run_async(async_cache_map.update_status)
+
+        update_status(self.test_data)
+        self.assertEqual(changes, [{"testA"}])
+
+        # changes of other fields are not published
+        update_status({"testA": {"State": "Busy", "Ratio": 1.0}})
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(async_cache_map["testA"]["Ratio"], 1.0)
+
+        update_status({"testA": {"State": "Idle", "Ratio": 1.0}})
+        self.assertEqual(changes[-1], {"testA"})
+
+        # added and removed entries are always published
+        update_status({"testB": {"State": "Idle", "Ratio": 1.0}})
+        self.assertEqual(changes[-1], {"testA", "testB"})
+
     def test_json_failing_update(self):
         with self.assertLogs(level=logging.WARNING):
             run_async(self.json_failing_async_cache_map.update_status)
@@ -66,6 +122,14 @@ class TestAsyncCacheMap(TestCase):
             run_async(self.json_failing_async_cache_map.update_status)
             self.assertEqual(len(self.json_failing_async_cache_map), 0)
 
+    def test_command_timeout_update(self):
+        timeout_async_cache_map = AsyncCacheMap(
+            update_coroutine=self.command_timeout_update_function
+        )
+        with self.assertLogs(level=logging.WARNING):
+            run_async(timeout_async_cache_map.update_status)
+        self.assertEqual(len(timeout_async_cache_map), 0)
+
     def test_last_update(self):
         self.assertEqual(self.async_cache_map.last_update, datetime.fromtimestamp(0))
         run_async(self.async_cache_map.update_status)
@@ -0,0 +1,88 @@
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.dronestatistics import DroneStatistics
+
+from unittest import TestCase
+from unittest.mock import patch
+
+
+class TestDroneStatistics(TestCase):
+    def setUp(self):
+        self.statistics = DroneStatistics()
+
+    def test_state_changed(self):
+        self.statistics.state_changed("drone-1", "A", "m1", "RequestState")
+        self.statistics.state_changed("drone-2", "A", "m2", "RequestState")
+        self.statistics.state_changed("drone-3", "B", "m1", "RequestState")
+        self.statistics.state_changed("drone-1", "A", "m1", "BootingState")
+        summary = self.statistics.summary()
+        self.assertEqual(summary.drones, 3)
+        self.assertEqual(summary.states, {"BootingState": 1, "RequestState": 2})
+        self.assertEqual(summary.sites, {"A": 2, "B": 1})
+        self.assertEqual(summary.machine_types, {"m1": 2, "m2": 1})
+        self.assertEqual(
+            summary.groups,
+            [
+                AttributeDict(
+                    site_name="A", machine_type="m1", state="BootingState", drones=1
+                ),
+                AttributeDict(
+                    site_name="A", machine_type="m2", state="RequestState", drones=1
+                ),
+                AttributeDict(
+                    site_name="B", machine_type="m1", state="RequestState", drones=1
+                ),
+            ],
+        )
+        self.assertNotIn("dwell_times", summary)
+
+        # drones in DownState are gone
+        self.statistics.state_changed("drone-1", "A", "m1", "DownState")
+        summary = self.statistics.summary()
+        self.assertEqual(summary.drones, 2)
+        self.assertEqual(summary.states, {"RequestState": 2})
+
+    def test_usage_changed(self):
+        self.statistics.state_changed("drone-1", "A", "m1", "IntegrateState")
+        self.statistics.state_changed("drone-2", "A", "m1", "IntegrateState")
+        self.statistics.usage_changed("drone-1", 1.0, 0.5, 0.25)
+        self.statistics.usage_changed("drone-2", 1.0, 1.0, 1.0)
+        self.statistics.usage_changed("drone-1", 1.0, 1.0, 0.5)
+        summary = self.statistics.summary()
+        self.assertEqual(
+            (summary.supply, summary.allocation, summary.utilisation),
+            (2.0, 2.0, 1.5),
+        )
+
+        self.statistics.state_changed("drone-2", "A", "m1", "DownState")
+        # late reports of drones already gone are ignored
+        self.statistics.usage_changed("drone-2", 1.0, 1.0, 1.0)
+        summary = self.statistics.summary()
+        self.assertEqual(
+            (summary.supply, summary.allocation, summary.utilisation),
+            (1.0, 1.0, 0.5),
+        )
+
+    @patch("tardis.utilities.dronestatistics.time")
+    def test_dwell_times(self, mock_time):
+        mock_time.monotonic.return_value = 0.0
+        self.statistics.restored("drone-0", "A", "m1", "BootingState")
+        for index in range(10):
+            self.statistics.state_changed(f"drone-{index}", "A", "m1", "RequestState")
+        for index in range(10):
+            mock_time.monotonic.return_value = float(index + 1)
+            self.statistics.state_changed(f"drone-{index}", "A", "m1", "BootingState")
+        summary = self.statistics.summary(dwell_times=True)
+        # the stay of the restored drone has an unknown duration
+        self.assertEqual(list(summary.dwell_times), ["RequestState"])
+        self.assertEqual(
+            summary.dwell_times["RequestState"],
+            AttributeDict(count=10, p50=6.0, p90=10.0, p99=10.0, max=10.0),
+        )
+
+    def test_dwell_time_samples(self):
+        statistics = DroneStatistics(dwell_time_samples=2)
+        for _ in range(3):
+            statistics.state_changed("drone", "A", "m1", "RequestState")
+        self.assertEqual(
+            statistics.summary(dwell_times=True).dwell_times["RequestState"].count, 2
+        )
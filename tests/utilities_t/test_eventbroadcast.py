@@ -0,0 +1,79 @@
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.eventbroadcast import EventBroadcast
+
+from tests.utilities.utilities import run_async
+
+from unittest import TestCase
+
+import asyncio
+import logging
+
+
+class TestEventBroadcast(TestCase):
+    def test_publish(self):
+        async def check_publish():
+            broadcast = EventBroadcast()
+            # events without subscribers are discarded right away
+            broadcast.publish(AttributeDict(site_name="A"))
+            subscription = broadcast.subscribe()
+            site_a = broadcast.subscribe(lambda event: event.site_name == "A")
+            for site_name in ("A", "B", "A"):
+                broadcast.publish(AttributeDict(site_name=site_name))
+            self.assertEqual(
+                [await subscription.get() for _ in range(3)],
+                [
+                    (1, AttributeDict(site_name="A")),
+                    (2, AttributeDict(site_name="B")),
+                    (3, AttributeDict(site_name="A")),
+                ],
+            )
+            self.assertEqual(
+                [await site_a.get(), await site_a.get()],
+                [(1, AttributeDict(site_name="A")), (3, AttributeDict(site_name="A"))],
+            )
+            self.assertIsNone(await site_a.get(timeout=0.01))
+            self.assertEqual(broadcast.statistics.subscribers, 2)
+
+            # subscribers waiting for events are woken up
+            waiting = asyncio.ensure_future(subscription.get())
+            await asyncio.sleep(0)
+            broadcast.publish(AttributeDict(site_name="B"))
+            self.assertEqual(await waiting, (4, AttributeDict(site_name="B")))
+
+            subscription.close()
+            site_a.close()
+            self.assertEqual(
+                broadcast.statistics,
+                AttributeDict(subscribers=0, published=4, evicted=0),
+            )
+
+        run_async(check_publish)
+
+    def test_evict(self):
+        async def check_evict():
+            broadcast = EventBroadcast(buffer_size=2)
+            slow = broadcast.subscribe()
+            fast = broadcast.subscribe(buffer_size=10)
+            with self.assertLogs(level=logging.WARNING):
+                for index in range(3):
+                    broadcast.publish(AttributeDict(index=index))
+            self.assertTrue(slow.evicted)
+            # buffered events are still delivered before the iteration ends
+            self.assertEqual(
+                [event.index async for _, event in slow],
+                [0, 1],
+            )
+            self.assertFalse(fast.evicted)
+            self.assertEqual(len(fast._buffer), 3)
+            self.assertEqual(
+                broadcast.statistics,
+                AttributeDict(subscribers=1, published=3, evicted=1),
+            )
+
+        run_async(check_evict)
+
+    def test_sanity_checks(self):
+        for wrong_size in (0, -1, 0.5, "15"):
+            with self.subTest(buffer_size=wrong_size):
+                with self.assertRaises(ValueError):
+                    EventBroadcast(buffer_size=wrong_size)
@@ -0,0 +1,171 @@
+from tardis.utilities.heartbeatscheduler import HeartbeatScheduler
+
+from tests.utilities.utilities import run_async
+
+from unittest import TestCase
+
+import asyncio
+
+
+class TestHeartbeatScheduler(TestCase):
+    @staticmethod
+    async def beat(
+        scheduler: HeartbeatScheduler, delay, jitter=0.0, hold=0.0, wake_keys=()
+    ):
+        loop = asyncio.get_running_loop()
+        async with scheduler.heartbeat(delay, jitter=jitter, wake_keys=wake_keys):
+            started = loop.time()
+            await asyncio.sleep(hold)
+        return started
+
+    def test_immediate_heartbeat(self):
+        """Test that a zero delay does not wait for the timer"""
+
+        async def check_immediate():
+            scheduler = HeartbeatScheduler()
+            await self.beat(scheduler, 0, jitter=10)
+            self.assertEqual(scheduler.statistics.pending, 0)
+            self.assertIsNone(scheduler._timer)
+
+        run_async(check_immediate)
+
+    def test_heartbeat_order(self):
+        """Test that heartbeats are released in the order they are due"""
+
+        async def check_order():
+            scheduler = HeartbeatScheduler()
+            released = []
+
+            async def beat(name, delay):
+                async with scheduler.heartbeat(delay):
+                    released.append(name)
+
+            await asyncio.gather(
+                beat("late", 0.03), beat("early", 0.01), beat("middle", 0.02)
+            )
+            return released
+
+        self.assertEqual(run_async(check_order), ["early", "middle", "late"])
+
+    def test_heartbeat_delay(self):
+        """Test that heartbeats are not released before they are due"""
+
+        async def check_delay():
+            scheduler = HeartbeatScheduler()
+            loop = asyncio.get_running_loop()
+            before = loop.time()
+            started = await asyncio.gather(
+                *(self.beat(scheduler, 0.05, jitter=0.05) for _ in range(16))
+            )
+            for start in started:
+                self.assertGreaterEqual(start - before, 0.05)
+            self.assertEqual(scheduler.statistics.pending, 0)
+            self.assertGreaterEqual(scheduler.statistics.lag_max, 0)
+
+        run_async(check_delay)
+
+    def test_max_concurrent(self):
+        """Test that the number of state runs in flight is bounded"""
+
+        async def check_concurrency():
+            scheduler = HeartbeatScheduler(max_concurrent=2)
+            in_flight = []
+
+            async def beat():
+                async with scheduler.heartbeat(0.01):
+                    in_flight.append(scheduler.statistics.in_flight)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*(beat() for _ in range(8)))
+            self.assertEqual(max(in_flight), 2)
+            self.assertEqual(scheduler.statistics.in_flight, 0)
+            # waiting for a free slot is accounted as lag
+            self.assertGreaterEqual(scheduler.statistics.lag_max, 0.03)
+
+        run_async(check_concurrency)
+
+    def test_wake(self):
+        """Test that heartbeats are released early by their wake keys"""
+
+        async def check_wake():
+            scheduler = HeartbeatScheduler()
+            loop = asyncio.get_running_loop()
+            before = loop.time()
+            woken = asyncio.ensure_future(
+                self.beat(scheduler, 3600, wake_keys=("drone-1",))
+            )
+            sleeping = asyncio.ensure_future(
+                self.beat(scheduler, 3600, wake_keys=("drone-2",))
+            )
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.statistics.pending, 2)
+            scheduler.wake({"drone-1", "unknown"})
+            self.assertLess(await woken - before, 1)
+            self.assertFalse(sleeping.done())
+            self.assertEqual(scheduler.statistics.pending, 1)
+            self.assertEqual(scheduler.statistics.woken, 1)
+            self.assertEqual(scheduler.statistics.lag_max, 0)
+            # keys are released once the heartbeat is over
+            self.assertNotIn("drone-1", scheduler._wakeable)
+            sleeping.cancel()
+
+        run_async(check_wake)
+
+    def test_cancelled_heartbeat(self):
+        """Test that a cancelled heartbeat does not stall others"""
+
+        async def check_cancel():
+            scheduler = HeartbeatScheduler()
+            cancelled = asyncio.ensure_future(self.beat(scheduler, 0.01))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await self.beat(scheduler, 0.02)
+            self.assertTrue(cancelled.cancelled())
+            self.assertEqual(scheduler.statistics.pending, 0)
+
+        run_async(check_cancel)
+
+    def test_lag_warning(self):
+        """Test that state runs behind schedule are reported"""
+
+        async def check_lag_warning():
+            scheduler = HeartbeatScheduler(max_concurrent=1, lag_warning=0.01)
+            with self.assertLogs(
+                "cobald.runtime.tardis.utilities.heartbeatscheduler", level="INFO"
+            ) as logs:
+                # the second and third state run wait for the first one
+                await asyncio.gather(
+                    *(self.beat(scheduler, 0, hold=0.02) for _ in range(3))
+                )
+                await self.beat(scheduler, 0)
+            self.assertEqual(len(logs.records), 2)
+            warning, recovery = logs.records
+            self.assertEqual(warning.levelname, "WARNING")
+            self.assertIn("behind schedule", warning.getMessage())
+            self.assertEqual(recovery.levelname, "INFO")
+            self.assertIn("back on schedule", recovery.getMessage())
+
+        run_async(check_lag_warning)
+
+    def test_no_lag_warning(self):
+        """Test that state runs on schedule are not reported"""
+
+        async def check_no_lag_warning():
+            scheduler = HeartbeatScheduler(lag_warning=10)
+            with self.assertNoLogs(
+                "cobald.runtime.tardis.utilities.heartbeatscheduler", level="INFO"
+            ):
+                await asyncio.gather(*(self.beat(scheduler, 0.01) for _ in range(8)))
+
+        run_async(check_no_lag_warning)
+
+    def test_sanity_checks(self):
+        """Test against illegal settings"""
+        for wrong_concurrency in (0, -1, 2.5, "10"):
+            with self.subTest(max_concurrent=wrong_concurrency):
+                with self.assertRaises(ValueError):
+                    HeartbeatScheduler(max_concurrent=wrong_concurrency)
+        for wrong_lag_warning in (0, -1):
+            with self.subTest(lag_warning=wrong_lag_warning):
+                with self.assertRaises(ValueError):
+                    HeartbeatScheduler(lag_warning=wrong_lag_warning)
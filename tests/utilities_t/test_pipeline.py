@@ -55,3 +55,13 @@ class TestPipelineProcessor(TestCase):
             ),
             99,
         )
+
+    def test_empty_pipeline(self):
+        self.assertEqual(
+            run_async(
+                PipelineProcessor().run_pipeline,
+                pipeline_input=10,
+                drone="drone_place_holder",
+            ),
+            10,
+        )
@@ -0,0 +1,206 @@
+from tardis.interfaces.metricssink import MetricsSink
+from tardis.interfaces.plugin import Plugin
+from tardis.resources.dronestates import AvailableState, BootingState, DownState
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.plugindispatcher import PluginDispatcher
+
+from tests.utilities.utilities import run_async
+
+from unittest import TestCase
+from unittest.mock import MagicMock, call
+
+import asyncio
+import logging
+
+
+class RecordingPlugin(Plugin):
+    def __init__(self, delay=0.0, exception=None):
+        self.delay = delay
+        self.exception = exception
+        self.notifications = []
+
+    async def notify(self, state, resource_attributes):
+        await asyncio.sleep(self.delay)
+        if self.exception is not None:
+            raise self.exception
+        self.notifications.append((state, resource_attributes.drone_uuid))
+
+
+class TestPluginDispatcher(TestCase):
+    @staticmethod
+    async def drain(dispatcher: PluginDispatcher):
+        await dispatcher.drain()
+
+    def test_notify(self):
+        """Test that notifications are delivered in order in the background"""
+
+        async def check_notify():
+            plugin = RecordingPlugin(delay=0.01)
+            dispatcher = PluginDispatcher(plugin)
+            resource_attributes = AttributeDict(drone_uuid="test-1")
+            await dispatcher.notify(BootingState(), resource_attributes)
+            # the drone continues before the plugin has been notified
+            self.assertEqual(plugin.notifications, [])
+            # the snapshot is not affected by later changes of the drone
+            resource_attributes.drone_uuid = "test-2"
+            await dispatcher.notify(AvailableState(), resource_attributes)
+            self.assertEqual(dispatcher.statistics.queue_depth, 2)
+            await self.drain(dispatcher)
+            self.assertEqual(
+                plugin.notifications,
+                [(BootingState(), "test-1"), (AvailableState(), "test-2")],
+            )
+            self.assertGreaterEqual(dispatcher.statistics.latency_max, 0.01)
+
+        run_async(check_notify)
+
+    def test_drop_oldest(self):
+        async def check_drop_oldest():
+            plugin = RecordingPlugin(delay=0.01)
+            dispatcher = PluginDispatcher(plugin, queue_size=2, policy="drop_oldest")
+            with self.assertLogs(level=logging.WARNING):
+                for index in range(5):
+                    await dispatcher.notify(
+                        BootingState(), AttributeDict(drone_uuid=f"test-{index}")
+                    )
+            await self.drain(dispatcher)
+            self.assertEqual(
+                plugin.notifications,
+                [(BootingState(), "test-3"), (BootingState(), "test-4")],
+            )
+            self.assertEqual(dispatcher.statistics.dropped, 3)
+
+        run_async(check_drop_oldest)
+
+    def test_coalesce(self):
+        async def check_coalesce():
+            plugin = RecordingPlugin(delay=0.01)
+            dispatcher = PluginDispatcher(plugin, policy="coalesce")
+            for state in (BootingState(), AvailableState(), DownState()):
+                await dispatcher.notify(state, AttributeDict(drone_uuid="test-1"))
+            await dispatcher.notify(BootingState(), AttributeDict(drone_uuid="test-2"))
+            await self.drain(dispatcher)
+            self.assertEqual(
+                plugin.notifications,
+                [(DownState(), "test-1"), (BootingState(), "test-2")],
+            )
+            self.assertEqual(dispatcher.statistics.coalesced, 2)
+
+        run_async(check_coalesce)
+
+    def test_block(self):
+        async def check_block():
+            plugin = RecordingPlugin(delay=0.01)
+            dispatcher = PluginDispatcher(plugin, queue_size=1, policy="block")
+            for index in range(4):
+                await dispatcher.notify(
+                    BootingState(), AttributeDict(drone_uuid=f"test-{index}")
+                )
+                self.assertLessEqual(dispatcher.statistics.queue_depth, 1)
+            await self.drain(dispatcher)
+            self.assertEqual(
+                [drone_uuid for _, drone_uuid in plugin.notifications],
+                [f"test-{index}" for index in range(4)],
+            )
+            self.assertEqual(dispatcher.statistics.dropped, 0)
+
+        run_async(check_block)
+
+    def test_timeout_and_failure(self):
+        async def check_errors():
+            dispatcher = PluginDispatcher(RecordingPlugin(delay=1), timeout=0.01)
+            with self.assertLogs(level=logging.WARNING):
+                await dispatcher.notify(BootingState(), AttributeDict(drone_uuid="a"))
+                await self.drain(dispatcher)
+            self.assertEqual(dispatcher.statistics.timeouts, 1)
+
+            dispatcher = PluginDispatcher(RecordingPlugin(exception=ValueError()))
+            with self.assertLogs(level=logging.WARNING):
+                await dispatcher.notify(BootingState(), AttributeDict(drone_uuid="a"))
+                await self.drain(dispatcher)
+            self.assertEqual(dispatcher.statistics.failures, 1)
+
+        run_async(check_errors)
+
+    def test_metrics(self):
+        """Test that queue depth, latency, drops and failures are reported"""
+
+        async def check_metrics():
+            sink = MagicMock(spec=MetricsSink)
+            dispatcher = PluginDispatcher(
+                RecordingPlugin(exception=ValueError()),
+                queue_size=1,
+                policy="drop_oldest",
+                metrics=sink,
+            )
+            labels = {"plugin": "RecordingPlugin"}
+            with self.assertLogs(level=logging.WARNING):
+                for index in range(2):
+                    await dispatcher.notify(
+                        BootingState(), AttributeDict(drone_uuid=f"test-{index}")
+                    )
+                await self.drain(dispatcher)
+            self.assertEqual(
+                sink.adjust.call_args_list,
+                [
+                    call("tardis_plugin_notifications_queued", labels, 1),
+                    call("tardis_plugin_notifications_queued", labels, -1),
+                ],
+            )
+            self.assertEqual(
+                sink.increase.call_args_list,
+                [
+                    call("tardis_plugin_notifications_dropped_total", labels),
+                    call(
+                        "tardis_plugin_notification_failures_total",
+                        {**labels, "reason": "error"},
+                    ),
+                ],
+            )
+            ((metric, metric_labels, latency),) = (
+                args for args, _ in sink.observe.call_args_list
+            )
+            self.assertEqual(metric, "tardis_plugin_notification_latency_seconds")
+            self.assertEqual(metric_labels, labels)
+            self.assertGreaterEqual(latency, 0)
+
+        run_async(check_metrics)
+
+    def test_drain_on_shutdown(self):
+        """Test that pending notifications are delivered on shutdown"""
+
+        async def check_shutdown(delay, shutdown_timeout):
+            plugin = RecordingPlugin(delay=delay)
+            dispatcher = PluginDispatcher(plugin, shutdown_timeout=shutdown_timeout)
+            service = asyncio.ensure_future(dispatcher.run())
+            for index in range(3):
+                await dispatcher.notify(
+                    BootingState(), AttributeDict(drone_uuid=f"test-{index}")
+                )
+            await asyncio.sleep(0)
+            # the runner of cobald cancels its tasks repeatedly until they are done
+            while not service.done():
+                service.cancel()
+                await asyncio.sleep(0.005)
+            self.assertTrue(service.cancelled())
+            return plugin.notifications
+
+        self.assertEqual(len(run_async(check_shutdown, 0.01, 1)), 3)
+        with self.assertLogs(level=logging.WARNING):
+            self.assertEqual(len(run_async(check_shutdown, 0.1, 0.15)), 1)
+
+    def test_sanity_checks(self):
+        """Test against illegal settings"""
+        for wrong_size in (0, -1, 0.5, "15"):
+            with self.subTest(queue_size=wrong_size):
+                with self.assertRaises(ValueError):
+                    PluginDispatcher(RecordingPlugin(), queue_size=wrong_size)
+        with self.assertRaises(ValueError):
+            PluginDispatcher(RecordingPlugin(), policy="drop_newest")
+        for wrong_timeout in (0, -5):
+            with self.subTest(timeout=wrong_timeout):
+                with self.assertRaises(ValueError):
+                    PluginDispatcher(RecordingPlugin(), timeout=wrong_timeout)
+            with self.subTest(shutdown_timeout=wrong_timeout):
+                with self.assertRaises(ValueError):
+                    PluginDispatcher(RecordingPlugin(), shutdown_timeout=wrong_timeout)
@@ -0,0 +1,47 @@
+from tardis.utilities.restoreschedule import RestoreSchedule
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import logging
+
+
+class TestRestoreSchedule(TestCase):
+    def test_start_delay(self):
+        """Test that drones start in jittered waves of wave_size"""
+        schedule = RestoreSchedule(wave_size=3, wave_interval=10)
+        delays = [schedule.start_delay() for _ in range(7)]
+        self.assertEqual([int(delay // 10) for delay in delays], [0, 0, 0, 1, 1, 1, 2])
+        self.assertEqual(schedule.statistics.scheduled, 7)
+
+        with patch("tardis.utilities.restoreschedule.random.random", return_value=0.5):
+            self.assertEqual(schedule.start_delay(), 25)
+
+    def test_restored(self):
+        with patch("tardis.utilities.restoreschedule.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            schedule = RestoreSchedule()
+            for _ in range(2):
+                schedule.start_delay()
+
+            schedule.restored()
+            self.assertEqual(schedule.statistics.restored, 1)
+            self.assertIsNone(schedule.statistics.duration)
+
+            monotonic.return_value = 142
+            with self.assertLogs(level=logging.INFO):
+                schedule.restored()
+            self.assertEqual(
+                schedule.statistics, dict(scheduled=2, restored=2, duration=42)
+            )
+
+    def test_sanity_checks(self):
+        """Test against illegal settings"""
+        for wrong_size in (0, -1, 0.5, "15"):
+            with self.subTest(wave_size=wrong_size):
+                with self.assertRaises(ValueError):
+                    RestoreSchedule(wave_size=wrong_size)
+        with self.assertRaises(ValueError):
+            RestoreSchedule(wave_interval=-1)
+        # all drones may be started at once
+        RestoreSchedule(wave_interval=0)